@@ -1,118 +1,170 @@
 import re
-from typing import Optional
+from typing import Iterable, Union
 
 
-def extract_aps_clean_content(markdown_content: str) -> str:
+# 网页导航行关键字（标题行中出现即视为导航）
+_NAVIGATION_RE = re.compile(
+    r'Skip to Main Content|Physical Review|All Journals|Highlights|Recent|Collections'
+)
+
+# 分享按钮（单独成行或作为列表项）
+_SHARE_BUTTONS = frozenset(['X', 'Facebook', 'Mendeley', 'LinkedIn', 'Reddit', 'Sina Weibo'])
+
+# 纯符号/无意义行
+_MEANINGLESS_LINES = frozenset([
+    'open icon close icon',
+    'Shareopen icon close icon',
+    'Show metricsopen icon close icon',
+    'Export Citation',
+    '[ ]',
+])
+
+_LIST_ITEM_RE = re.compile(r'^[*\-+]\s+')
+_SHARE_WORD_RE = re.compile(r'Share|Facebook|Mendeley|LinkedIn|Reddit|Sina Weibo|\bX\b')
+
+_ABSTRACT_HEADING = '## Abstract'
+_ABSTRACT_MIN_LENGTH = 100  # 摘要通常是很长的段落
+
+# 状态机的各个状态
+_SEEK_TITLE, _SEEK_ABSTRACT, _SEEK_ABSTRACT_TEXT, _DONE = range(4)
+
+
+class APSMarkdownCleaner:
+    """
+    单遍扫描的APS markdown清洗状态机
+
+    按行推进：寻找标题 -> 寻找 ``## Abstract`` -> 寻找摘要正文，
+    摘要段落收集完毕后立即停止，不再读取后续内容。
+    支持通过 ``feed`` 逐块输入流式markdown。
+    """
+
+    def __init__(self):
+        self._state = _SEEK_TITLE
+        self._lines = []
+        self._pending = ''
+        self._prev_empty = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> bool:
+        """输入一块markdown文本，返回是否已完成提取"""
+        if self._state == _DONE:
+            return True
+        lines = (self._pending + chunk).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            if self.feed_line(line):
+                self._pending = ''
+                return True
+        return False
+
+    def feed_line(self, line: str) -> bool:
+        """处理单行，返回是否已完成提取"""
+        state = self._state
+        if state == _DONE:
+            return True
+
+        stripped = line.strip()
+
+        if state == _SEEK_TITLE:
+            if not stripped.startswith('# ') or _NAVIGATION_RE.search(line):
+                return False
+            self._state = _SEEK_ABSTRACT
+        elif state == _SEEK_ABSTRACT:
+            if stripped == _ABSTRACT_HEADING:
+                self._state = _SEEK_ABSTRACT_TEXT
+        elif len(stripped) > _ABSTRACT_MIN_LENGTH:
+            self._lines.append(line)
+            self._state = _DONE
+            return True
+
+        if _should_skip_line(line, stripped):
+            return False
+
+        # 只保留一个连续的空行
+        if not stripped:
+            if self._prev_empty:
+                return False
+            self._prev_empty = True
+        else:
+            self._prev_empty = False
+
+        self._lines.append(line)
+        return False
+
+    def close(self) -> str:
+        """结束输入并返回清洁内容；未找到对应部分时返回提示信息"""
+        if self._pending and self._state != _DONE:
+            self.feed_line(self._pending)
+        self._pending = ''
+
+        if self._state == _SEEK_TITLE:
+            return "未找到论文标题"
+        if self._state == _SEEK_ABSTRACT:
+            return "未找到摘要"
+        if self._state == _SEEK_ABSTRACT_TEXT:
+            return "未找到摘要内容"
+        return '\n'.join(self._lines).strip()
+
+
+def extract_aps_clean_content(markdown_content: Union[str, Iterable[str]]) -> str:
     """
     精确提取APS论文的标题到摘要内容，完全去除图片和分享按钮
-    
+
     Args:
-        markdown_content: 完整的markdown内容
-        
+        markdown_content: 完整的markdown内容，或按顺序产生的markdown文本块
+
     Returns:
         清洁的核心内容（标题、作者、机构、DOI、摘要）
     """
-    lines = markdown_content.split('\n')
-    
-    # 找到论文标题位置
-    title_start = None
-    for i, line in enumerate(lines):
-        if line.strip().startswith('# ') and not _is_navigation_line(line):
-            title_start = i
-            break
-    
-    if title_start is None:
-        return "未找到论文标题"
-    
-    # 找到摘要位置
-    abstract_line = None
-    for i in range(title_start, len(lines)):
-        if lines[i].strip() == '## Abstract':
-            abstract_line = i
-            break
-    
-    if abstract_line is None:
-        return "未找到摘要"
-    
-    # 找到摘要内容（通常是摘要标题后的第一个长段落）
-    abstract_content = None
-    for i in range(abstract_line + 1, len(lines)):
-        line = lines[i].strip()
-        if line and len(line) > 100:  # 摘要通常是很长的段落
-            abstract_content = i
-            break
-    
-    if abstract_content is None:
-        return "未找到摘要内容"
-    
-    # 收集标题到摘要的所有内容
-    result_lines = []
-    
-    for i in range(title_start, abstract_content + 1):
-        line = lines[i]
-        
-        # 跳过不需要的内容
-        if _should_skip_line(line):
-            continue
-            
-        result_lines.append(line)
-    
-    return '\n'.join(result_lines).strip()
-
-
-def _is_navigation_line(line: str) -> bool:
-    """判断是否为网页导航行"""
-    navigation_keywords = [
-        'Skip to Main Content', 'Physical Review', 'All Journals',
-        'Highlights', 'Recent', 'Collections'
-    ]
-    return any(keyword in line for keyword in navigation_keywords)
-
-
-def _should_skip_line(line: str) -> bool:
+    cleaner = APSMarkdownCleaner()
+    if isinstance(markdown_content, str):
+        cleaner.feed(markdown_content)
+    else:
+        for chunk in markdown_content:
+            if cleaner.feed(chunk):
+                break
+    return cleaner.close()
+
+
+# 旧模块 aps_content_extractor 的接口，保持兼容
+extract_aps_paper_content = extract_aps_clean_content
+
+
+def _should_skip_line(line: str, line_stripped: str) -> bool:
     """判断是否应该跳过这一行"""
-    line_stripped = line.strip()
-    
-    # 跳过纯符号行
-    if line_stripped in ['open icon close icon', 'Shareopen icon close icon']:
+    # 跳过纯符号行和分享按钮
+    if line_stripped in _MEANINGLESS_LINES or line_stripped in _SHARE_BUTTONS:
         return True
-    
-    # 跳过分享按钮（包括列表项格式）
-    share_buttons = ['X', 'Facebook', 'Mendeley', 'LinkedIn', 'Reddit', 'Sina Weibo']
-    if line_stripped in share_buttons:
+
+    # 跳过图片链接（包括列表中的图片）
+    if '![' in line_stripped and (line_stripped.startswith('![') or _LIST_ITEM_RE.match(line_stripped)):
         return True
-    
-    # 跳过包含分享按钮的列表项 - 更精确的匹配
-    if line_stripped.startswith('  *'):
-        # 提取列表项的内容（去掉 "  * " 前缀）
-        list_content = line_stripped[4:].strip()  # 去掉 "  * " 
-        if list_content in share_buttons:
-            return True
-    
+
+    # 跳过包含分享按钮的列表项
+    if _LIST_ITEM_RE.match(line_stripped) and _LIST_ITEM_RE.sub('', line_stripped) in _SHARE_BUTTONS:
+        return True
+
     # 跳过PDF分享相关行
-    if '[PDF]' in line and ('Share' in line or any(btn in line for btn in share_buttons)):
+    if '[PDF]' in line and _SHARE_WORD_RE.search(line):
         return True
-    
+
     # 跳过altmetric链接
-    if 'altmetric.com' in line or line_stripped == '[ ]':
-        return True
-    
-    # 跳过Export Citation等操作
-    if line_stripped in ['Export Citation', 'Show metricsopen icon close icon']:
+    if 'altmetric.com' in line:
         return True
-    
+
     return False
 
 
 if __name__ == "__main__":
-    # 测试功能
+    # 测试功能：流式读取，摘要结束后即停止读取文件
     with open("result.md", "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    extracted = extract_aps_clean_content(content)
-    
+        extracted = extract_aps_clean_content(iter(lambda: f.read(8192), ''))
+
     # 保存提取结果
     with open("clean_extracted.md", "w", encoding="utf-8") as f:
         f.write(extracted)
-    
-    print("清洁内容提取完成，已保存到 clean_extracted.md")
\ No newline at end of file
+
+    print("清洁内容提取完成，已保存到 clean_extracted.md")
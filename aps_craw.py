@@ -1,12 +1,19 @@
 import asyncio
 from crawl4ai import *
-import json
 from aps_clean_extractor import extract_aps_clean_content
+from aps_markdown_parser import parse_aps_markdown
+from paper_model import Paper
 import hashlib
+from journal_standin import route_url
+from deadline import remaining
+from single_flight import PARSE, coalesce
+from profiling import span
 
 async def async_crawl_aps(url):
     async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun(url=url)
+        # 整个抓取受每篇论文的截止时间约束（没有截止时间时 timeout=None，不限时）
+        with span("crawl4ai.arun"):
+            result = await asyncio.wait_for(crawler.arun(url=route_url(url)), timeout=remaining())
         result_json = result.json()
         
         # 使用URL的哈希值作为文件名前缀，避免文件名冲突
@@ -14,8 +21,9 @@ async def async_crawl_aps(url):
         
         # 将完整的result_json保存为json文件
         json_filename = f"result_{url_hash}.json"
+        # result.json() 已经是JSON字符串，直接写入，不再二次编码
         with open(json_filename, "w") as f:
-            json.dump(result_json, f)
+            f.write(result_json)
             
         # 将完整结果保存为markdown文件
         md_filename = f"result_{url_hash}.md"
@@ -23,12 +31,15 @@ async def async_crawl_aps(url):
             f.write(result.markdown)
             
         # 提取论文核心内容（标题到摘要）
-        extracted_content = extract_aps_clean_content(result.markdown)
+        with span("aps.clean_markdown", chars=len(result.markdown)):
+            extracted_content = extract_aps_clean_content(result.markdown)
 
-        # 将提取的核心内容转换为json
-        extracted_content_json = {
-            "content": extracted_content
-        }
+        # 将提取的核心内容解析为与Nature/Science相同的结构化json，
+        # 原始内容保留在 content 字段中，解析失败时可回退给LLM
+        with span("aps.parse_markdown"):
+            extracted_content_json = parse_aps_markdown(extracted_content, url)
+        extracted_content_json["content"] = extracted_content
+        paper = Paper.from_dict(extracted_content_json)
         
         # 保存提取的核心内容
         extracted_filename = f"extracted_content_{url_hash}.md"
@@ -40,17 +51,20 @@ async def async_crawl_aps(url):
         print(f"- 提取的核心内容已保存到: {extracted_filename}")
         print(f"- JSON数据已保存到: {json_filename}")
     
-    return extracted_content_json
+    return paper
 
+@coalesce(PARSE)
 def crawl_aps(url):
     """
     同步函数，用于爬取APS网站内容
+
+    同一篇论文的并发调用只启动一个crawl4ai浏览器，也不会同时写同一组 result_{hash}.* 文件
     
     Args:
         url (str): APS网站的URL
         
     Returns:
-        str: 提取的论文核心内容
+        Paper: 结构化论文信息，paper.extra["content"] 为清洗后的markdown
     """
     return asyncio.run(async_crawl_aps(url))
 
@@ -4,17 +4,75 @@ import json
 import time
 import hashlib
 import os
+import threading
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
+from dom_extractor import DocumentExtractor, meta_content
+from paper_model import Paper
+from single_flight import FETCH, PARSE, coalesce
+from selector_registry import get_registry
+from journal_standin import route_url
+from deadline import DeadlineExceeded, check, timeout_ms
+from profiling import span
 
 # 全局浏览器实例（复用提升性能）
 _browser_instance = None
 _context_instance = None
 
+# 持久化的浏览器会话（cookies、localStorage、OneTrust的同意状态）：
+# 恢复成功时不必每篇论文先访问首页预热、再点掉Cookie弹窗
+STORAGE_STATE_PATH = os.getenv("APS_STORAGE_STATE", "data/aps_storage_state.json")
+STORAGE_STATE_MAX_AGE = float(os.getenv("APS_STORAGE_STATE_MAX_AGE", str(12 * 3600)))  # 秒
+_CONSENT_COOKIE = "OptanonAlertBoxClosed"
+_session_ready = False  # 当前上下文已有APS会话（从文件恢复或已预热）
+_session_restored = False  # 会话是从文件恢复的，还没有被APS页面验证过
+_consent_given = False  # Cookie弹窗已经处理过
+_state_dirty = False  # 会话有变化，需要写回文件
+
+
+def load_storage_state(path: str = STORAGE_STATE_PATH, max_age: float = STORAGE_STATE_MAX_AGE):
+    """
+    读取保存的会话；文件不存在、超过 max_age、无法解析或没有未过期的 aps.org cookie 时返回None
+    """
+    try:
+        if time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    now = time.time()
+    cookies = [cookie for cookie in state.get("cookies", [])
+               if cookie.get("domain", "").endswith("aps.org")
+               and (cookie.get("expires", -1) < 0 or cookie["expires"] > now)]
+    return state if cookies else None
+
+
+def save_storage_state(context, path: str = STORAGE_STATE_PATH):
+    """把浏览器上下文的会话写入文件（先写临时文件再原子替换）"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    context.storage_state(path=tmp_path)
+    os.replace(tmp_path, path)
+
+
+def discard_storage_state(context=None, path: str = STORAGE_STATE_PATH):
+    """会话被拒绝时丢弃：删除文件并清空上下文中的cookies，下次访问重新预热"""
+    global _session_ready, _session_restored, _consent_given, _state_dirty
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    if context is not None:
+        context.clear_cookies()
+    _session_ready = _session_restored = _consent_given = _state_dirty = False
+
+
 def get_browser():
     """获取复用的浏览器实例，增强反检测"""
-    global _browser_instance, _context_instance
+    global _browser_instance, _context_instance, _session_ready, _session_restored, _consent_given
     if _browser_instance is None or _context_instance is None:
+        state = load_storage_state()
         p = sync_playwright().start()
         _browser_instance = p.chromium.launch(
             headless=True,
@@ -32,6 +90,7 @@ def get_browser():
             user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             locale="en-US",
             viewport={"width": 1920, "height": 1080},
+            storage_state=state,
             extra_http_headers={
                 "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
                 "Accept-Language": "en-US,en;q=0.9",
@@ -47,15 +106,31 @@ def get_browser():
             window.chrome = {runtime: {}};
             Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
         """)
+        _session_ready = _session_restored = state is not None
+        _consent_given = state is not None and any(cookie.get("name") == _CONSENT_COOKIE
+                                                   for cookie in state.get("cookies", []))
     return _browser_instance, _context_instance
 
+CACHE_DIR = os.getenv("APS_CACHE_DIR", "/tmp/aps_cache")
+# 缓存文件名是链接的MD5，无法反推链接；在页面开头记下来源，reextract 据此离线重新提取
+CACHE_SOURCE_MARKER = "<!-- source-url: {} -->\n"
+
 def get_cache_path(url):
     """生成缓存文件路径"""
-    cache_dir = "/tmp/aps_cache"
-    os.makedirs(cache_dir, exist_ok=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
     url_hash = hashlib.md5(url.encode()).hexdigest()
-    return os.path.join(cache_dir, f"{url_hash}.html")
-
+    return os.path.join(CACHE_DIR, f"{url_hash}.html")
+
+def _write_cache(cache_path: str, html: str, url: str = None):
+    """先写临时文件再原子替换，并发的读者不会读到写了一半的缓存"""
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if url:
+            f.write(CACHE_SOURCE_MARKER.format(url.replace("--", "%2D%2D")))
+        f.write(html)
+    os.replace(tmp_path, cache_path)
+
+@coalesce(FETCH)
 def get_html_with_playwright(url: str, use_cache: bool = True, wait_ms: int = 5000) -> str:
     """优化的Playwright HTML获取，支持缓存和浏览器复用"""
     # 检查缓存
@@ -68,49 +143,15 @@ def get_html_with_playwright(url: str, use_cache: bool = True, wait_ms: int = 50
     try:
         browser, context = get_browser()
         page = context.new_page()
+        _load_aps_page(page, url, wait_ms)
         
-        # 随机延迟避免被检测
-        time.sleep(0.5 + (time.time() % 1))
-        
-        # 先访问首页建立session
-        try:
-            page.goto("https://journals.aps.org/", timeout=15000)
-            time.sleep(1)
-        except:
-            pass
-        
-        # 访问目标页面
-        page.goto(url, wait_until="networkidle", timeout=45000)
-        
-        # 等待关键元素出现
-        key_selectors = [
-            "div.authors-wrapper",
-            "meta[name='citation_author']",
-            "#abstract-section-content",
-            "h1.title"
-        ]
-        
-        for selector in key_selectors:
-            try:
-                page.wait_for_selector(selector, timeout=wait_ms)
-                break
-            except:
-                continue
-        
-        # 处理弹窗
-        try_dismiss_banners(page)
-        
-        # 额外等待动态内容
-        time.sleep(1)
-        
-        html = page.content()
+        with span("playwright.content"):
+            html = page.content()
         page.close()
         
         # 保存到缓存
         if use_cache:
-            cache_path = get_cache_path(url)
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                f.write(html)
+            _write_cache(get_cache_path(url), html, url)
         
         return html
         
@@ -125,28 +166,246 @@ def get_html_with_playwright(url: str, use_cache: bool = True, wait_ms: int = 50
         raise
 
 
-def try_dismiss_banners(page):
-    """快速处理Cookie弹窗"""
+def _warm_up(page):
+    """先访问首页建立session"""
+    global _session_ready, _state_dirty
+    try:
+        with span("playwright.goto", page="home"):
+            page.goto(route_url("https://journals.aps.org/"), timeout=timeout_ms(15000, "APS home page"))
+        with span("playwright.wait", reason="after home page"):
+            time.sleep(1)
+        _session_ready = _state_dirty = True
+    except:
+        pass
+
+
+def _rejected(page, response) -> bool:
+    """APS是否拒绝了当前会话（403/429或验证页面）"""
+    if response is not None and response.status in (401, 403, 429):
+        return True
+    try:
+        return page.title().startswith("Just a moment")
+    except:
+        return False
+
+
+def _open_article(page, url: str):
+    with span("playwright.goto", page="article"):
+        return page.goto(route_url(url), wait_until="networkidle", timeout=timeout_ms(45000, "APS page"))
+
+
+def _load_aps_page(page, url: str, wait_ms: int):
+    """打开APS论文页面并等待关键内容加载完成"""
+    global _session_restored, _consent_given, _state_dirty
+    # 随机延迟避免被检测
+    with span("playwright.wait", reason="random delay"):
+        time.sleep(0.5 + (time.time() % 1))
+    
+    # 没有可用的会话时才访问首页预热
+    if not _session_ready:
+        _warm_up(page)
+    
+    # 访问目标页面
+    response = _open_article(page, url)
+    if _rejected(page, response):
+        if _session_restored:
+            # 恢复的会话过期或被风控：丢弃后预热一次再试
+            print("Saved APS session was rejected, warming up a new one")
+            discard_storage_state(page.context)
+            _warm_up(page)
+            response = _open_article(page, url)
+    else:
+        _session_restored = False
+    
+    # 等待任一关键元素出现：合并成一个选择器只等一次，
+    # 而不是每个缺失的选择器各等 wait_ms；之后记录是哪个出现了，供统计和重排
+    key_chain = get_registry().chain("aps.page_ready", [
+        "div.authors-wrapper",
+        "meta[name='citation_author']",
+        "#abstract-section-content",
+        "h1.title"
+    ])
+    key_selectors = key_chain.order()
+    try:
+        with span("playwright.wait", reason="key selectors"):
+            page.wait_for_selector(", ".join(key_selectors), state="attached", timeout=timeout_ms(wait_ms, "APS page"))
+        for selector in key_selectors:
+            hit = page.query_selector(selector) is not None
+            key_chain.record(selector, hit)
+            if hit:
+                break
+    except:
+        for selector in key_selectors:
+            key_chain.record(selector, False)
+    
+    # 处理弹窗（同意状态已随会话保存时跳过）
+    if not _consent_given:
+        with span("playwright.banners"):
+            if try_dismiss_banners(page):
+                _consent_given = _state_dirty = True
+    
+    # 额外等待动态内容
+    with span("playwright.wait", reason="dynamic content"):
+        time.sleep(1)
+
+    if _state_dirty and not _rejected(page, response):
+        try:
+            save_storage_state(page.context)
+            _state_dirty = False
+        except Exception as e:
+            print(f"Could not save APS session: {e}")
+
+
+# 在页面内执行的提取脚本：只通过CDP回传一个小的JSON记录，而不是整页HTML
+APS_EXTRACT_JS = """
+() => {
+    const squash = s => (s || '').replace(/\\s+/g, ' ').trim();
+    const text = el => el ? squash(el.textContent) : null;
+    const meta = sel => {
+        const m = document.querySelector(sel);
+        return m && m.getAttribute('content') ? m.getAttribute('content').trim() : null;
+    };
+    const firstText = sels => {
+        for (const sel of sels) {
+            const el = document.querySelector(sel);
+            if (el) return text(el);
+        }
+        return null;
+    };
+    // 去掉上标后的文本，返回 [上标, 文本]
+    const splitSup = li => {
+        const sup = li.querySelector('sup');
+        if (!sup) return null;
+        const clone = li.cloneNode(true);
+        clone.querySelector('sup').remove();
+        return [sup.textContent.trim(), text(clone)];
+    };
+
+    let publicationDate = null;
+    const pubStrong = document.querySelector('div.pub-info-wrapper strong');
+    if (pubStrong) {
+        const m = squash(pubStrong.textContent).match(/Published\\s+(.+)/);
+        if (m) publicationDate = m[1].trim();
+    }
+    publicationDate = publicationDate || meta("meta[name='citation_publication_date']");
+
+    const abstractP = document.querySelector('#abstract-section-content p');
+    const abstract = abstractP ? text(abstractP) : meta("meta[name='citation_abstract']");
+
+    const title = firstText(['h1.title', 'h1[data-behavior="title"]', 'h1.article-title', '.title-wrapper h1', 'title'])
+        || meta("meta[name='citation_title']") || 'Unknown Title';
+
+    let journalName = null;
+    for (const sel of ['.journal-title', '.journal-name', 'meta[name="citation_journal_title"]',
+                       'meta[property="og:site_name"]', '.header-journal-title', 'h1.journal-title']) {
+        journalName = sel.startsWith('meta') ? meta(sel) : firstText([sel]);
+        if (journalName) break;
+    }
+
+    const authors = [];
+    const wrapper = document.querySelector('div.authors-wrapper');
+    if (wrapper) {
+        const affiliations = {}, roles = {};
+        const details = wrapper.querySelector('details');
+        if (details) {
+            details.querySelectorAll('ul.no-bullet:not(.contrib-notes) li').forEach(li => {
+                const pair = splitSup(li);
+                if (pair) affiliations[pair[0]] = pair[1];
+            });
+            details.querySelectorAll('ul.contrib-notes li').forEach(li => {
+                const pair = splitSup(li);
+                if (pair) roles[pair[0]] = pair[1];
+            });
+        }
+        const line = wrapper.querySelector('p');
+        let current = null;
+        for (const node of (line ? line.childNodes : [])) {
+            if (node.nodeType === Node.ELEMENT_NODE && node.tagName === 'A'
+                    && (node.getAttribute('href') || '').includes('/search/field/author/')) {
+                if (current) authors.push(current);
+                current = {name: text(node), affiliations: [], roles: []};
+            } else if (node.nodeType === Node.ELEMENT_NODE && node.tagName === 'SUP' && current) {
+                for (const mark of node.textContent.split(',').map(m => m.trim())) {
+                    if (/^\\d+$/.test(mark) && affiliations[mark]) current.affiliations.push(affiliations[mark]);
+                    else if (roles[mark]) current.roles.push(roles[mark]);
+                }
+            }
+        }
+        if (current) authors.push(current);
+    }
+    if (!authors.length) {
+        const names = [...document.querySelectorAll("meta[name='citation_author']")].map(m => m.content.trim());
+        const orgs = [...document.querySelectorAll("meta[name='citation_author_institution']")].map(m => m.content.trim());
+        names.forEach((name, i) => authors.push({
+            name, affiliations: orgs.length === names.length ? [orgs[i]] : [], roles: []
+        }));
+    }
+
+    return {authors, publication_date: publicationDate, abstract, title,
+            journal_name: journalName || 'Physical Review (APS)'};
+}
+"""
+
+
+def extract_aps_in_browser(url: str, wait_ms: int = 5000, keep_html: bool = False) -> dict:
+    """
+    在浏览器页面内执行 APS_EXTRACT_JS 提取论文信息，只回传小的JSON记录
+
+    Args:
+        url: APS论文链接
+        wait_ms: 等待关键元素的超时时间
+        keep_html: 为True时同时把完整HTML写入缓存（供之后离线重新解析），默认不序列化整页
+
+    Returns:
+        dict: 与 parse_aps_html 相同结构的结果
+    """
+    browser, context = get_browser()
+    page = context.new_page()
+    try:
+        _load_aps_page(page, url, wait_ms)
+        with span("playwright.evaluate"):
+            record = page.evaluate(APS_EXTRACT_JS)
+        if keep_html:
+            _write_cache(get_cache_path(url), page.content(), url)
+    finally:
+        page.close()
+
+    return _build_aps_result(record['authors'], record['publication_date'], record['abstract'],
+                             record['title'], record['journal_name'], url)
+
+
+def try_dismiss_banners(page) -> bool:
+    """快速处理Cookie弹窗，点掉了返回True"""
     selectors = ["#onetrust-accept-btn-handler", "button[aria-label*='Accept']"]
     for sel in selectors:
         try:
             if page.locator(sel).count() > 0:
                 page.locator(sel).first.click(timeout=500)
-                return
+                return True
         except:
             continue
+    return False
 
 
 # ---------------------------
 # 解析函数（沿用你原来的逻辑）
 # ---------------------------
+def squashed_text(elem) -> str:
+    """元素的全部文本合并空白后的结果，与 APS_EXTRACT_JS 中 squash(el.textContent) 一致"""
+    return " ".join(elem.get_text().split())
+
+
+def aps_text(elem):
+    """处理函数：squashed_text，空文本时为None；浏览器内提取和离线解析得到相同的字符串"""
+    return squashed_text(elem) or None
+
+
 def extract_aps_publication_date(soup: BeautifulSoup):
     pub_wrapper = soup.find('div', class_='pub-info-wrapper')
     if pub_wrapper:
         pub_strong = pub_wrapper.find('strong')
-        if pub_strong and 'Published' in pub_strong.get_text():
-            date_text = pub_strong.get_text(strip=True)
-            date_match = re.search(r'Published\s+(.+)', date_text)
+        if pub_strong:
+            date_match = re.search(r'Published\s+(.+)', squashed_text(pub_strong))
             if date_match:
                 return date_match.group(1).strip()
     # 兜底：meta
@@ -161,7 +420,7 @@ def extract_aps_abstract(soup: BeautifulSoup):
     if abstract_section:
         abstract_p = abstract_section.find('p')
         if abstract_p:
-            return abstract_p.get_text(' ', strip=True)
+            return squashed_text(abstract_p)
     # 兜底：meta
     meta_abs = soup.select_one("meta[name='citation_abstract']")
     if meta_abs and meta_abs.get("content"):
@@ -169,46 +428,6 @@ def extract_aps_abstract(soup: BeautifulSoup):
     return None
 
 
-def extract_aps_title(soup: BeautifulSoup):
-    title_selectors = [
-        'h1.title',
-        'h1[data-behavior="title"]',
-        'h1.article-title',
-        '.title-wrapper h1',
-        'title'
-    ]
-    for selector in title_selectors:
-        title_elem = soup.select_one(selector)
-        if title_elem:
-            return title_elem.get_text(' ', strip=True)
-    # 兜底：meta
-    meta_title = soup.select_one("meta[name='citation_title']")
-    if meta_title and meta_title.get("content"):
-        return meta_title["content"].strip()
-    return "Unknown Title"
-
-
-def extract_aps_journal_name(soup: BeautifulSoup):
-    journal_selectors = [
-        '.journal-title',
-        '.journal-name',
-        'meta[name="citation_journal_title"]',
-        'meta[property="og:site_name"]',
-        '.header-journal-title',
-        'h1.journal-title'
-    ]
-    for selector in journal_selectors:
-        if selector.startswith('meta'):
-            journal_elem = soup.select_one(selector)
-            if journal_elem and journal_elem.get('content'):
-                return journal_elem['content'].strip()
-        else:
-            journal_elem = soup.select_one(selector)
-            if journal_elem:
-                return journal_elem.get_text(' ', strip=True)
-    return "Physical Review (APS)"
-
-
 def parse_authors_from_dom(soup: BeautifulSoup):
     """多层级作者信息提取策略"""
     authors = []
@@ -253,25 +472,21 @@ def parse_authors_detailed(authors_wrapper):
     affil_dict, role_dict = {}, {}
 
     if details_section:
-        # 机构映射
-        affil_list = details_section.find('ul', class_='no-bullet')
-        if affil_list:
-            for item in affil_list.find_all('li'):
-                sup = item.find('sup')
-                if sup:
-                    num = sup.text.strip()
-                    sup.decompose()
-                    affil_dict[num] = item.get_text(strip=True)
+        # 机构映射（与 APS_EXTRACT_JS 相同：全部机构列表，文本合并空白）
+        for item in details_section.select('ul.no-bullet:not(.contrib-notes) li'):
+            sup = item.find('sup')
+            if sup:
+                num = sup.text.strip()
+                sup.decompose()
+                affil_dict[num] = squashed_text(item)
 
         # 角色映射
-        contrib_notes = details_section.find('ul', class_='contrib-notes')
-        if contrib_notes:
-            for note in contrib_notes.find_all('li'):
-                sup = note.find('sup')
-                if sup:
-                    symbol = sup.text.strip()
-                    sup.decompose()
-                    role_dict[symbol] = note.get_text(strip=True)
+        for note in details_section.select('ul.contrib-notes li'):
+            sup = note.find('sup')
+            if sup:
+                symbol = sup.text.strip()
+                sup.decompose()
+                role_dict[symbol] = squashed_text(note)
 
     current_author = {'name': '', 'affiliations': [], 'roles': []}
     if authors_line:
@@ -284,7 +499,7 @@ def parse_authors_detailed(authors_wrapper):
                 if current_author['name']:
                     authors.append(current_author.copy())
                 current_author = {
-                    'name': element.text.strip(),
+                    'name': squashed_text(element),
                     'affiliations': [],
                     'roles': []
                 }
@@ -297,6 +512,7 @@ def parse_authors_detailed(authors_wrapper):
                         current_author['roles'].append(role_dict[mark])
             elif isinstance(element, str) and 'and' in element.lower() and current_author['name']:
                 authors.append(current_author.copy())
+                current_author = {'name': '', 'affiliations': [], 'roles': []}
 
         if current_author['name']:
             authors.append(current_author.copy())
@@ -361,47 +577,136 @@ def parse_authors_fallback(soup):
     return authors
 
 
-def scrape_aps_authors(url: str, use_cache: bool = True):
-    """优化的APS论文信息提取"""
-    try:
-        # 使用优化的HTML获取
-        html = get_html_with_playwright(url, use_cache=use_cache)
+# ---------------------------
+# 单次遍历提取：各字段的选择器按回退优先级注册
+# ---------------------------
+def _published_date_from_wrapper(pub_wrapper):
+    pub_strong = pub_wrapper.find('strong')
+    if pub_strong:
+        date_match = re.search(r'Published\s+(.+)', squashed_text(pub_strong))
+        if date_match:
+            return date_match.group(1).strip()
+    return None
+
+
+def _abstract_from_section(abstract_section):
+    abstract_p = abstract_section.find('p')
+    return squashed_text(abstract_p) if abstract_p else None
+
+
+def _authors_from_wrapper(authors_wrapper):
+    return parse_authors_detailed(authors_wrapper) or None
+
+
+APS_FIELDS = (
+    DocumentExtractor('aps')
+    .add_field('publication_date', [
+        ('div.pub-info-wrapper', _published_date_from_wrapper),
+    ], fallback=[
+        ("meta[name='citation_publication_date']", meta_content),
+    ])
+    .add_field('abstract', [
+        ('div#abstract-section-content', _abstract_from_section),
+    ], fallback=[
+        ("meta[name='citation_abstract']", meta_content),
+    ])
+    .add_field('title', [
+        ('h1.title', aps_text),
+        ('h1[data-behavior="title"]', aps_text),
+        ('h1.article-title', aps_text),
+        ('.title-wrapper h1', aps_text),
+    ], fallback=[
+        # <title> 带站点后缀，只作兜底，不参与按命中率重排
+        ('title', aps_text),
+        ("meta[name='citation_title']", meta_content),
+    ], default="Unknown Title")
+    .add_field('journal_name', [
+        ('.journal-title', aps_text),
+        ('.journal-name', aps_text),
+        ('meta[name="citation_journal_title"]', meta_content),
+        ('meta[property="og:site_name"]', meta_content),
+        ('.header-journal-title', aps_text),
+        ('h1.journal-title', aps_text),
+    ], default="Physical Review (APS)")
+    .add_field('authors', [
+        ('div.authors-wrapper', _authors_from_wrapper),
+    ])
+)
+
+
+def parse_aps_html(html, url: str) -> dict:
+    """从已获取的APS页面HTML（str或bytes）中提取论文信息"""
+    with span("bs4.parse", parser="lxml"):
         soup = BeautifulSoup(html, "lxml")
 
-        # 并行提取所有信息
-        pub_date = extract_aps_publication_date(soup)
-        abstract = extract_aps_abstract(soup)
-        title = extract_aps_title(soup)
-        journal_name = extract_aps_journal_name(soup)
+    # 单次遍历同时提取所有字段
+    fields = APS_FIELDS.extract(soup)
+    pub_date = fields['publication_date']
+    abstract = fields['abstract']
+    title = fields['title']
+    journal_name = fields['journal_name']
+    authors = fields['authors']
+    if authors is None:
+        # 没有 authors-wrapper 时才走文本/meta/通用兜底策略
         authors = parse_authors_from_dom(soup)
 
-        # 数据质量检查和补强
-        if not authors:
-            print("Warning: No authors found, trying alternative extraction...")
-        
-        if not title or title == "Unknown Title":
-            print("Warning: Title extraction failed")
-
-        result = {
-            'authors': authors,
-            'publication_date': pub_date,
-            'abstract': abstract,
-            'title': title,
-            'journal_name': journal_name,
-            'url': url,
-            'extraction_quality': {
-                'has_authors': len(authors) > 0,
-                'has_abstract': abstract is not None,
-                'has_title': title is not None and title != "Unknown Title",
-                'author_count': len(authors)
-            }
+    return _build_aps_result(authors, pub_date, abstract, title, journal_name, url)
+
+
+def _build_aps_result(authors, pub_date, abstract, title, journal_name, url: str) -> dict:
+    # 数据质量检查和补强
+    if not authors:
+        print("Warning: No authors found, trying alternative extraction...")
+    
+    if not title or title == "Unknown Title":
+        print("Warning: Title extraction failed")
+
+    return {
+        'authors': authors,
+        'publication_date': pub_date,
+        'abstract': abstract,
+        'title': title,
+        'journal_name': journal_name,
+        'url': url,
+        'extraction_quality': {
+            'has_authors': len(authors) > 0,
+            'has_abstract': abstract is not None,
+            'has_title': title is not None and title != "Unknown Title",
+            'author_count': len(authors)
         }
-        return json.dumps(result, ensure_ascii=False, indent=2)
+    }
+
 
+@coalesce(PARSE)
+def scrape_aps_authors(url: str, use_cache: bool = True, in_browser: bool = True, keep_html: bool = False) -> Paper:
+    """
+    优化的APS论文信息提取
+
+    Args:
+        url: APS论文链接
+        use_cache: 已缓存HTML时直接离线解析
+        in_browser: 在页面内用JS提取（默认），不回传和重新解析整页HTML
+        keep_html: 浏览器内提取时是否仍把完整HTML写入缓存（需同时开启 use_cache）
+    """
+    try:
+        cache_path = get_cache_path(url)
+        if in_browser and not (use_cache and os.path.exists(cache_path)):
+            result = extract_aps_in_browser(url, keep_html=use_cache and keep_html)
+        else:
+            # 使用优化的HTML获取
+            html = get_html_with_playwright(url, use_cache=use_cache)
+            result = parse_aps_html(html, url)
+        return Paper.from_dict(result)
+
+    except DeadlineExceeded:
+        # 超时不是降级结果：交给调用方（和 single_flight）按失败处理
+        raise
     except Exception as e:
+        # 截止时间到了之后浏览器抛出的超时（Playwright 的 TimeoutError）同样按超时处理
+        check("APS extraction")
         error_msg = f"Error during extraction: {str(e)}"
         print(error_msg)
-        return json.dumps({
+        return Paper.from_dict({
             'authors': [],
             'publication_date': None,
             'abstract': None,
@@ -415,11 +720,16 @@ def scrape_aps_authors(url: str, use_cache: bool = True):
                 'has_title': False,
                 'author_count': 0
             }
-        }, ensure_ascii=False, indent=2)
+        })
 
 def cleanup_browser():
-    """清理浏览器实例"""
-    global _browser_instance, _context_instance
+    """清理浏览器实例（关闭前把会话写回文件，下次运行直接恢复）"""
+    global _browser_instance, _context_instance, _session_ready, _session_restored, _consent_given
+    try:
+        if _context_instance and _session_ready and not _session_restored:
+            save_storage_state(_context_instance)
+    except Exception as e:
+        print(f"Could not save APS session: {e}")
     try:
         if _context_instance:
             _context_instance.close()
@@ -430,6 +740,7 @@ def cleanup_browser():
     finally:
         _browser_instance = None
         _context_instance = None
+        _session_ready = _session_restored = _consent_given = False
 
 
 if __name__ == "__main__":
@@ -446,13 +757,20 @@ if __name__ == "__main__":
         # 测试URL
         paper_url = "https://journals.aps.org/prl/abstract/10.1103/PhysRevLett.130.267401"
         use_cache = True
+    # --html: 回传整页HTML并用BeautifulSoup解析；--keep-html: 浏览器内提取时仍缓存整页HTML
+    in_browser = "--html" not in sys.argv
+    keep_html = "--keep-html" in sys.argv
+    # --fresh-session: 丢弃保存的会话，重新访问首页预热
+    if "--fresh-session" in sys.argv:
+        discard_storage_state()
 
     print(f"Extracting from: {paper_url}")
     print(f"Cache enabled: {use_cache}")
+    print(f"In-browser extraction: {in_browser}")
     print("-" * 50)
     
-    result = scrape_aps_authors(paper_url, use_cache=use_cache)
-    print(result)
+    result = scrape_aps_authors(paper_url, use_cache=use_cache, in_browser=in_browser, keep_html=keep_html)
+    print(json.dumps(result.to_dict(), ensure_ascii=False, indent=2))
     
     # 手动清理
     cleanup_browser()
\ No newline at end of file
@@ -0,0 +1,158 @@
+import re
+from datetime import datetime
+
+from aps_clean_extractor import extract_aps_clean_content
+from ror_index import extract_ror_id, get_default_ror_index, normalize_country
+
+
+_AUTHOR_LINK_RE = re.compile(r'\[([^\]]+)\]\(https?://journals\.aps\.org/search/field/author/[^)]*\)')
+_EMPTY_LINK_RE = re.compile(r'\[\]\([^)]*\)')
+_MD_LINK_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+_ROR_LINK_RE = re.compile(r'\]\((https?://ror\.org/[^)]+)\)')
+_TRAILING_SEPARATOR_RE = re.compile(r'(?:,?\s*\band\b)?[\s,]*$')
+_LIST_ITEM_RE = re.compile(r'^\s*[*\-+]\s+')
+_AFFILIATION_INDEX_RE = re.compile(r'^(\d+)(?=\S)')
+_NOTE_RE = re.compile(r'^([^\w\s\[]+)\s*(.+)$')
+_PUBLISHED_RE = re.compile(r'^(.*?)\s*\*\*.*\*\*Published\s+([^*]+)\*\*')
+
+
+def parse_aps_markdown(markdown_content: str, url: str = None):
+    """
+    将APS论文的markdown（clean_extracted.md 格式）解析为与 parse_nature_authors 相同的结构
+
+    Args:
+        markdown_content: crawl4ai 生成的markdown，原始或已清洗的均可
+        url: 论文链接
+
+    Returns:
+        dict: title/journal_name/url/authors/countries/publication_date/abstract 等字段
+    """
+    lines = extract_aps_clean_content(markdown_content).split('\n')
+
+    title = "Unknown Title"
+    journal_name = "Physical Review (APS)"
+    publication_date = None
+    abstract = None
+    author_line = None
+    affiliations = []  # [(index, text, ror_id)]
+    notes = {}  # symbol -> text
+
+    in_abstract = False
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        if in_abstract:
+            abstract = _MD_LINK_RE.sub(r'\1', stripped)
+            break
+
+        if stripped.startswith('# ') and title == "Unknown Title":
+            title = stripped[2:].strip()
+        elif stripped == '## Abstract':
+            in_abstract = True
+        elif author_line is None and _AUTHOR_LINK_RE.search(stripped):
+            author_line = stripped
+        elif _LIST_ITEM_RE.match(line):
+            item = _LIST_ITEM_RE.sub('', line).strip()
+            note = _NOTE_RE.match(item)
+            if note:
+                notes[note.group(1)] = note.group(2).strip()
+                continue
+            index = _AFFILIATION_INDEX_RE.match(item)
+            if index:
+                item = item[index.end():]
+            ror_link = _ROR_LINK_RE.search(item)
+            affiliations.append((
+                index.group(1) if index else None,
+                _MD_LINK_RE.sub(r'\1', item).strip(),
+                extract_ror_id(ror_link.group(1)) if ror_link else None
+            ))
+        else:
+            published = _PUBLISHED_RE.match(stripped)
+            if published:
+                journal_name = published.group(1).strip() or journal_name
+                publication_date = _parse_published_date(published.group(2))
+
+    aff_map = {index: text for index, text, _ in affiliations if index is not None}
+    unindexed = [text for index, text, _ in affiliations if index is None]
+
+    # 通讯作者与共同贡献标记
+    corresponding_marks = {mark for mark, text in notes.items() if 'contact author' in text.lower()
+                           or 'corresponding author' in text.lower()}
+    equal_contributions = [text for mark, text in notes.items() if mark not in corresponding_marks]
+
+    authors_data = []
+    for idx, (name, marks) in enumerate(_split_author_line(author_line or '')):
+        author_affiliations = [aff_map[m] for m in marks if m in aff_map]
+        if not author_affiliations:
+            author_affiliations = list(unindexed)
+        is_corresponding = any(m in corresponding_marks for m in marks)
+
+        role = "Other Author"
+        if idx == 0:
+            role = "First Author"
+        if is_corresponding:
+            role = "First/Corresponding Author" if idx == 0 else "Corresponding Author"
+
+        authors_data.append({
+            "name": name,
+            "role": role,
+            "affiliations": author_affiliations,
+            "is_corresponding": is_corresponding
+        })
+
+    # 机构已链接到ROR时用离线索引取规范国家名，否则取地址最后一段
+    ror_index = get_default_ror_index()
+    countries = []
+    for _, text, ror_id in affiliations:
+        record = ror_index.resolve_affiliation(text, ror_id) if ror_index is not None else None
+        country = record.country if record else normalize_country(text.rsplit(",", 1)[-1].strip())
+        if country and country not in countries:
+            countries.append(country)
+
+    return {
+        "title": title,
+        "journal_name": journal_name,
+        "url": url,
+        "authors": authors_data,
+        "countries": countries,
+        "publication_date": publication_date,
+        "abstract": abstract,
+        "contributions": None,
+        "equal_contributions": equal_contributions if equal_contributions else None
+    }
+
+
+def _split_author_line(author_line: str):
+    """把作者行拆分为 (姓名, 上标标记列表)"""
+    matches = list(_AUTHOR_LINK_RE.finditer(author_line))
+    result = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(author_line)
+        tail = _EMPTY_LINK_RE.sub('', author_line[match.end():end])
+        tail = _TRAILING_SEPARATOR_RE.sub('', tail)
+        marks = [m.strip() for m in tail.split(',') if m.strip()]
+        result.append((match.group(1).strip(), marks))
+    return result
+
+
+def _parse_published_date(date_text: str):
+    """'18 August, 2025' -> {"iso_date": "2025-08-18", "formatted_date": "18 August 2025"}"""
+    formatted = date_text.replace(',', '').strip()
+    try:
+        iso_date = datetime.strptime(formatted, '%d %B %Y').date().isoformat()
+    except ValueError:
+        iso_date = None
+    return {
+        "iso_date": iso_date,
+        "formatted_date": formatted
+    }
+
+
+if __name__ == "__main__":
+    import json
+
+    with open("clean_extracted.md", "r", encoding="utf-8") as f:
+        paper_data = parse_aps_markdown(f.read())
+    print(json.dumps(paper_data, indent=4, ensure_ascii=False))
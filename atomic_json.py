@@ -0,0 +1,61 @@
+"""
+多进程/多线程共享的JSON数据文件
+
+选择器命中统计、译名表等由多个进程各自累加增量、保存时合并进同一个文件。
+merge_json() 在文件锁（path.lock，POSIX flock）内读出当前内容、合并、写临时文件再原子替换：
+- 临时文件名带进程id和线程id，同一进程的多个线程同时保存也不会互相覆盖
+- 读-合并-写整个过程持有锁，不同进程的增量不会互相丢失
+- 写入失败时抛出 OSError，调用方据此把增量放回去，下次保存时重试
+
+用法：
+    merge_json(path, lambda data: data.update(pending), indent=1)
+"""
+import contextlib
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows：没有跨进程锁，只保证原子替换
+    fcntl = None
+
+
+@contextlib.contextmanager
+def file_lock(path: str):
+    """独占 path.lock 上的 flock 锁"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def merge_json(path: str, merge, **dump_kwargs):
+    """
+    在锁内把 merge(data) 的修改写回 path；文件不存在或无法解析时 data 为空dict
+
+    Raises:
+        OSError: 无法写入
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with file_lock(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        merge(data)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, **dump_kwargs)
+            os.replace(tmp_path, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,125 @@
+"""
+对比逐字段 select_one 回退扫描与单次遍历多字段提取的整树遍历次数和耗时
+
+用法：
+    python bench_dom_extractor.py                 # 使用 result.json 中保存的APS页面
+    python bench_dom_extractor.py page1.html ...  # 额外的已保存APS页面
+"""
+import json
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+import aps_extractor as ae
+
+_SCAN_METHODS = ("select_one", "select", "find", "find_all")
+
+
+class _ScanCounter:
+    """统计在文档根节点上发起的 select/find 调用次数，每次都是一次（可能提前结束的）整树扫描"""
+
+    def __init__(self, soup):
+        self.soup = soup
+        self.count = 0
+        self._originals = {}
+
+    def __enter__(self):
+        for name in _SCAN_METHODS:
+            original = getattr(self.soup, name)
+            self._originals[name] = original
+
+            def wrapped(*args, _original=original, **kwargs):
+                self.count += 1
+                return _original(*args, **kwargs)
+
+            setattr(self.soup, name, wrapped)
+        return self
+
+    def __exit__(self, *exc):
+        for name in _SCAN_METHODS:
+            delattr(self.soup, name)
+
+
+def _legacy_title(soup):
+    for selector in ('h1.title', 'h1[data-behavior="title"]', 'h1.article-title', '.title-wrapper h1', 'title'):
+        title_elem = soup.select_one(selector)
+        if title_elem:
+            return ae.squashed_text(title_elem)
+    meta_title = soup.select_one("meta[name='citation_title']")
+    if meta_title and meta_title.get("content"):
+        return meta_title["content"].strip()
+    return "Unknown Title"
+
+
+def _legacy_journal_name(soup):
+    for selector in ('.journal-title', '.journal-name', 'meta[name="citation_journal_title"]',
+                     'meta[property="og:site_name"]', '.header-journal-title', 'h1.journal-title'):
+        journal_elem = soup.select_one(selector)
+        if journal_elem is None:
+            continue
+        if selector.startswith('meta'):
+            if journal_elem.get('content'):
+                return journal_elem['content'].strip()
+        else:
+            return ae.squashed_text(journal_elem)
+    return "Physical Review (APS)"
+
+
+def _legacy_extract(soup):
+    return {
+        'publication_date': ae.extract_aps_publication_date(soup),
+        'abstract': ae.extract_aps_abstract(soup),
+        'title': _legacy_title(soup),
+        'journal_name': _legacy_journal_name(soup),
+        'authors': ae.parse_authors_from_dom(soup),
+    }
+
+
+def _load_pages(paths):
+    with open("result.json", "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, str):
+        data = json.loads(data)
+    pages = [("result.json", data["html"])]
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((path, f.read()))
+    return pages
+
+
+def run(paths, repeat: int = 20):
+    for name, html in _load_pages(paths):
+        soup = BeautifulSoup(html, "lxml")
+        with _ScanCounter(soup) as counter:
+            legacy = _legacy_extract(soup)
+        legacy_scans = counter.count
+
+        soup = BeautifulSoup(html, "lxml")
+        single = ae.APS_FIELDS.extract(soup)
+        stats = ae.APS_FIELDS.last_stats
+
+        legacy_time = _time_per_page(lambda s: _legacy_extract(s), html, repeat)
+        single_time = _time_per_page(lambda s: ae.APS_FIELDS.extract(s), html, repeat)
+
+        same = all(legacy[k] == single[k] for k in legacy)
+        print(f"{name}:")
+        print(f"  legacy  full-tree scans: {legacy_scans:3d}   {legacy_time * 1000:7.2f} ms/page")
+        print(f"  single  full-tree walks: {stats['tree_walks']:3d}   {single_time * 1000:7.2f} ms/page"
+              f"   ({stats['elements_visited']} elements)")
+        print(f"  identical results: {same}")
+
+
+def _time_per_page(extract, html, repeat):
+    # 每次都重新解析，避免处理函数对树的修改影响后续轮次；解析时间不计入
+    total = 0.0
+    for _ in range(repeat):
+        soup = BeautifulSoup(html, "lxml")
+        start = time.perf_counter()
+        extract(soup)
+        total += time.perf_counter() - start
+    return total / repeat
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:])
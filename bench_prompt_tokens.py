@@ -0,0 +1,89 @@
+"""
+对比旧的提示内容（Science/APS结果先被提取器 json.dumps 成字符串，
+process_paper 再对字符串 json.dumps(indent=4) 一次）与只序列化一次的紧凑提示的token数
+
+用法：
+    python bench_prompt_tokens.py                  # 仓库中保存的APS页面和清洗后的markdown
+    python bench_prompt_tokens.py page.html ...    # 额外的已保存页面（crawl4ai JSON 或 HTML），按页面中的链接判断期刊
+    python bench_prompt_tokens.py nature:page.html # 页面中没有规范链接时显式指定期刊
+"""
+import json
+import re
+import sys
+
+from aps_markdown_parser import parse_aps_markdown
+from llm_tokens import count_tokens
+from main import system_prompt
+from paper_identity import canonicalize
+from paper_model import Paper
+
+_FIXTURE_PAGES = ("result.json", "result_f961f7e5.json")
+_FIXTURE_MARKDOWN = ("clean_extracted.md", "extracted_content_f961f7e5.md")
+_CANONICAL_RE = re.compile(r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"|<meta[^>]+property="og:url"[^>]+content="([^"]+)"')
+
+
+def _legacy_prompt(journal: str, result: dict) -> str:
+    """改动前 process_paper 实际发送的内容"""
+    if journal == "nature":
+        return json.dumps(result, indent=4)
+    if journal == "science":
+        return json.dumps(json.dumps(result, indent=4), indent=4)
+    return json.dumps(json.dumps(result, ensure_ascii=False, indent=2), indent=4)
+
+
+def _load_page(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    url = None
+    if path.endswith(".json"):
+        data = json.loads(text)
+        if isinstance(data, str):
+            data = json.loads(data)
+        text, url = data["html"], data.get("url")
+    if not url:
+        match = _CANONICAL_RE.search(text)
+        url = (match.group(1) or match.group(2)) if match else ""
+    return url, text
+
+
+def _parse_page(url: str, html: str, journal: str = None):
+    journal = journal or (canonicalize(url).journal if url else None) or "aps"
+    if journal == "nature":
+        import nature_extractor as ne
+        return journal, ne.parse_nature_html(html, url)
+    if journal == "science":
+        import science_extractor as se
+        return journal, se.parse_science_html(html, url)
+    import aps_extractor as ae
+    return "aps", ae.parse_aps_html(html, url)
+
+
+def _fixtures(paths):
+    for path in list(_FIXTURE_PAGES) + list(paths):
+        journal, _, file_path = path.rpartition(":") if path.split(":", 1)[0] in ("nature", "science", "aps") else ("", "", path)
+        url, html = _load_page(file_path)
+        journal, result = _parse_page(url, html, journal or None)
+        yield path, journal, result, _legacy_prompt(journal, result)
+    for path in _FIXTURE_MARKDOWN:
+        with open(path, "r", encoding="utf-8") as f:
+            result = parse_aps_markdown(f.read())
+        yield path, "aps-markdown", result, json.dumps(result, indent=4)
+
+
+def run(paths):
+    system_tokens = count_tokens(system_prompt)
+    total_old = total_new = 0
+    print(f"system prompt: {system_tokens} tokens (unchanged)")
+    for path, journal, result, legacy in _fixtures(paths):
+        compact = Paper.from_dict(result).to_llm_json()
+        old, new = count_tokens(legacy), count_tokens(compact)
+        total_old += old
+        total_new += new
+        print(f"{path} ({journal}, {len(result.get('authors') or [])} authors):")
+        print(f"  legacy  {old:6d} tokens  {len(legacy):7d} chars")
+        print(f"  compact {new:6d} tokens  {len(compact):7d} chars   (-{100 * (old - new) / max(old, 1):.0f}%)")
+    print(f"total paper content: {total_old} -> {total_new} tokens (-{100 * (total_old - total_new) / max(total_old, 1):.0f}%)")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:])
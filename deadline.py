@@ -0,0 +1,104 @@
+"""
+每篇论文的端到端截止时间
+
+以前每一步各有各的超时：APS 的 page.goto 最长45秒，Science 30秒，Nature 的 requests 没有超时，
+DeepSeek 请求用 openai 客户端默认的10分钟，一篇卡住的论文可以拖住整个批次。
+现在在处理一篇论文时设置截止时间（contextvars，随调用链向下传递），
+抓取、浏览器和LLM调用用 timeout_for() 把自己的超时裁到剩余时间之内；
+已经超时则直接抛出 DeadlineExceeded（TimeoutError 的子类）。
+
+没有设置截止时间时 timeout_for() 原样返回各自的默认超时，行为不变。
+
+用法：
+    with deadline_scope(90):
+        paper = fetch_paper(url)             # 内部 requests.get(timeout=timeout_for(30))
+        summary = summarize_paper(paper)     # 内部 chat(timeout=timeout_for(None))
+
+    # 在线程池中执行时要带上当前上下文：
+    executor.submit(contextvars.copy_context().run, fn, *args)
+"""
+import contextlib
+import contextvars
+import os
+import time
+
+# 默认的每篇论文截止时间（秒）；未设置时不限制
+DEFAULT_PAPER_DEADLINE = float(os.getenv("PAPER_DEADLINE", "0")) or None
+
+_current = contextvars.ContextVar("paper_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    __slots__ = ("expires_at", "seconds")
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def current_deadline():
+    return _current.get()
+
+
+@contextlib.contextmanager
+def deadline_scope(seconds):
+    """
+    在 with 块内设置截止时间；seconds 为None时不改变当前设置。
+    外层已有更早的截止时间时保留外层的
+    """
+    if seconds is None:
+        yield current_deadline()
+        return
+    outer = current_deadline()
+    deadline = Deadline(seconds)
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def remaining():
+    """剩余秒数；没有截止时间时为None"""
+    deadline = current_deadline()
+    return None if deadline is None else deadline.remaining()
+
+
+def check(what: str = "paper"):
+    """已经超过截止时间时抛出 DeadlineExceeded"""
+    deadline = current_deadline()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded(f"{what}: deadline of {deadline.seconds:g}s exceeded")
+
+
+def timeout_for(default, what: str = "request"):
+    """
+    某一步的超时（秒）：default 与剩余时间中较小的一个；default 为None表示这一步自身不限时
+
+    Raises:
+        DeadlineExceeded: 已经没有剩余时间
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return default
+    left = deadline.remaining()
+    if left <= 0:
+        raise DeadlineExceeded(f"{what}: deadline of {deadline.seconds:g}s exceeded")
+    return left if default is None else min(default, left)
+
+
+def timeout_ms(default_ms: int, what: str = "request") -> int:
+    """timeout_for 的毫秒版本（Playwright）"""
+    return max(1, int(timeout_for(default_ms / 1000, what) * 1000))
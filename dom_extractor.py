@@ -0,0 +1,226 @@
+"""
+单次遍历的多字段DOM提取引擎
+
+每个字段按优先级注册一组 (CSS选择器, 处理函数)。提取时只遍历一次文档，
+按元素的id/class/标签名把节点分发给可能匹配的选择器，记录每个选择器的第一个（或全部）命中，
+遍历结束后再按字段的回退顺序依次调用处理函数，取第一个非None的结果。
+用来代替每个字段各自对整棵树做多次 select_one 回退扫描。
+
+提取器有名字时，含多个选择器的字段按 "名字.字段名" 登记为 selector_registry 中的一条链：
+回退顺序按记录的命中率重排（fallback 部分始终在最后），每次提取的命中结果也记入统计。
+"""
+import re
+
+import soupsieve
+from bs4 import Tag
+
+from selector_registry import get_registry
+
+_ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+_COMBINATOR_RE = re.compile(r'\s*[>+~]\s*|\s+')
+_TAG_NAME_RE = re.compile(r'^([a-zA-Z][\w-]*)')
+_ID_RE = re.compile(r'#([\w-]+)')
+_CLASS_RE = re.compile(r'\.([\w-]+)')
+
+
+def _dispatch_key(selector: str):
+    """
+    取选择器最右侧复合选择器中最有区分度的部分作为分发键：
+    ('id', ...) > ('class', ...) > ('tag', ...)；都没有时返回None（每个元素都要测试）
+    """
+    compound = _COMBINATOR_RE.split(_ATTRIBUTE_RE.sub('[]', selector.strip()))[-1]
+    match = _ID_RE.search(compound)
+    if match:
+        return 'id', match.group(1)
+    match = _CLASS_RE.search(compound)
+    if match:
+        return 'class', match.group(1)
+    match = _TAG_NAME_RE.match(compound)
+    if match:
+        return 'tag', match.group(1).lower()
+    return None
+
+
+def meta_content(elem):
+    """处理函数：读取meta标签的content"""
+    content = elem.get('content', '').strip()
+    return content or None
+
+
+def element_text(elem):
+    """处理函数：元素文本（空格连接）"""
+    return elem.get_text(' ', strip=True) or None
+
+
+class _Field:
+    __slots__ = ('name', 'chain', 'default', 'multiple', 'fallback', 'registry_chain', 'positions')
+
+    def __init__(self, name, chain, default, multiple, fallback):
+        self.name = name
+        self.chain = chain  # [(selector, compiled, handler)]，可互换部分在前、fallback 部分在后
+        self.default = default
+        self.multiple = multiple
+        self.fallback = fallback  # 末尾的兜底选择器个数
+        self.registry_chain = None  # 首次提取时从 selector_registry 取得
+        self.positions = {selector: i for i, (selector, _, _) in enumerate(chain)}
+
+    def order(self, registry_name):
+        """本次提取的尝试顺序（chain 中的序号）"""
+        if registry_name is None or len(self.chain) < 2:
+            return range(len(self.chain))
+        if self.registry_chain is None:
+            selectors = [selector for selector, _, _ in self.chain]
+            split = len(selectors) - self.fallback
+            self.registry_chain = get_registry().chain(f"{registry_name}.{self.name}",
+                                                       selectors[:split], selectors[split:])
+        return [self.positions[selector] for selector in self.registry_chain.order()]
+
+    def record(self, selector_no, hit):
+        if self.registry_chain is not None:
+            self.registry_chain.record(self.chain[selector_no][0], hit)
+
+
+class DocumentExtractor:
+    """
+    多字段单次遍历提取器
+
+    用法：
+        extractor = DocumentExtractor('aps')
+        extractor.add_field('title', [('h1.title', element_text), ('h1.article-title', element_text)],
+                            fallback=[('title', element_text)], default="Unknown Title")
+        values = extractor.extract(soup)
+    """
+
+    def __init__(self, name=None):
+        self.name = name  # selector_registry 中链名的前缀；None 时按注册顺序回退、不记统计
+        self._fields = []
+        # 分发表：id/class/标签名 -> [(字段序号, 选择器序号, compiled)]
+        self._by_id = {}
+        self._by_class = {}
+        self._by_tag = {}
+        self._any_tag = []  # 无法分发的选择器，需要对每个元素都测试
+        self._projections = {}  # project() 的缓存
+        self.last_stats = {}
+
+    def add_field(self, name, chain, default=None, multiple=False, fallback=()):
+        """
+        注册一个字段
+
+        Args:
+            name: 字段名
+            chain: [(selector, handler), ...]，互相可替代的选择器，按初始优先级排列；handler 接收命中的元素
+                   （multiple=True 时为全部命中元素的列表），返回None表示回退到下一个选择器
+            default: 所有选择器都失败时的默认值
+            multiple: 是否收集全部命中元素（相当于 select），否则只取第一个（相当于 select_one）
+            fallback: 同 chain 格式的兜底选择器（如 <title>），始终在 chain 之后按原顺序尝试
+        """
+        field_no = len(self._fields)
+        compiled_chain = []
+        for selector_no, (selector, handler) in enumerate(list(chain) + list(fallback)):
+            compiled = soupsieve.compile(selector)
+            compiled_chain.append((selector, compiled, handler))
+            entry = (field_no, selector_no, compiled)
+            key = _dispatch_key(selector)
+            if key is None:
+                self._any_tag.append(entry)
+            else:
+                table = {'id': self._by_id, 'class': self._by_class, 'tag': self._by_tag}[key[0]]
+                table.setdefault(key[1], []).append(entry)
+        self._fields.append(_Field(name, compiled_chain, default, multiple, len(fallback)))
+        self._projections.clear()
+        return self
+
+    def project(self, names):
+        """
+        只含 names 中字段的提取器（按字段集合缓存）；names 为None时返回自身
+
+        字段少了，遍历时要测试的选择器也少，全是单值字段时还能更早结束遍历
+        """
+        if names is None:
+            return self
+        key = frozenset(names)
+        projected = self._projections.get(key)
+        if projected is None:
+            projected = DocumentExtractor(self.name)
+            for field in self._fields:
+                if field.name in key:
+                    chain = [(selector, handler) for selector, _, handler in field.chain]
+                    split = len(chain) - field.fallback
+                    projected.add_field(field.name, chain[:split], field.default, field.multiple, chain[split:])
+            self._projections[key] = projected
+        return projected
+
+    def extract(self, soup) -> dict:
+        """遍历一次文档，返回 {字段名: 值}"""
+        fields = self._fields
+        hits = [[None] * len(field.chain) for field in fields]
+        orders = [field.order(self.name) for field in fields]
+        firsts = [order[0] if order else None for order in orders]
+        # 单值字段的当前首选选择器命中后即"已定"；全部已定时可以提前结束遍历
+        unsettled = sum(1 for field in fields if not field.multiple)
+        has_multiple = any(field.multiple for field in fields)
+        by_id = self._by_id
+        by_class = self._by_class
+        by_tag = self._by_tag
+        any_tag = self._any_tag
+
+        visited = 0
+        complete = True
+        for elem in soup.descendants:
+            if not isinstance(elem, Tag):
+                continue
+            visited += 1
+            candidates = list(any_tag)
+            candidates += by_tag.get(elem.name, ())
+            attrs = elem.attrs
+            if by_id and 'id' in attrs:
+                candidates += by_id.get(attrs['id'], ())
+            if by_class and 'class' in attrs:
+                for class_name in attrs['class']:
+                    candidates += by_class.get(class_name, ())
+            if not candidates:
+                continue
+            for field_no, selector_no, compiled in candidates:
+                field = fields[field_no]
+                field_hits = hits[field_no]
+                if not field.multiple and field_hits[selector_no] is not None:
+                    continue
+                if not compiled.match(elem):
+                    continue
+                if field.multiple:
+                    if field_hits[selector_no] is None:
+                        field_hits[selector_no] = []
+                    field_hits[selector_no].append(elem)
+                else:
+                    field_hits[selector_no] = elem
+                    if selector_no == firsts[field_no]:
+                        unsettled -= 1
+                        if not unsettled and not has_multiple:
+                            break
+            if not unsettled and not has_multiple:
+                complete = False
+                break
+
+        extra_scans = 0
+        values = {}
+        for field_no, field in enumerate(fields):
+            value = None
+            for selector_no in orders[field_no]:
+                selector, compiled, handler = field.chain[selector_no]
+                hit = hits[field_no][selector_no]
+                if hit is None and not complete:
+                    # 提前结束遍历后，回退选择器才需要补一次扫描（只在处理函数拒绝首选结果时发生）
+                    hit = compiled.select_one(soup)
+                    extra_scans += 1
+                if hit is not None:
+                    value = handler(hit)
+                field.record(selector_no, value is not None)
+                if value is not None:
+                    break
+            values[field.name] = value if value is not None else field.default
+
+        self.last_stats = {
+            'tree_walks': 1 + extra_scans,
+            'elements_visited': visited,
+        }
+        return values
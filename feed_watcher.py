@@ -0,0 +1,181 @@
+"""
+订阅源驱动的增量采集
+
+轮询期刊的 RSS/Atom 订阅源（也可以是本地文件或测试用的替身服务），
+用 ETag / Last-Modified 做条件请求，按DOI与论文库中已处理的论文做差集，
+只把新文章送进提取流程，并把订阅源游标持久化在论文库中。
+每天的采集成本因此只和新论文数量成正比，而不是订阅源的大小。
+
+用法：
+    python feed_watcher.py --once
+    python feed_watcher.py --feeds feeds.txt --interval 900
+"""
+import email.utils
+import os
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import urlsplit
+
+import requests
+
+from paper_identity import canonicalize, clean_doi, paper_key
+from paper_store import DEFAULT_DB_PATH, PaperStore
+
+DEFAULT_FEEDS = [
+    "https://www.nature.com/nature.rss",
+    "https://www.nature.com/nphys.rss",
+    "https://www.science.org/action/showFeed?type=etoc&feed=rss&jc=science",
+    "https://feeds.aps.org/rss/recent/prl.xml",
+    "https://feeds.aps.org/rss/recent/prxquantum.xml",
+]
+
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/rss+xml, application/atom+xml, application/rdf+xml, application/xml;q=0.9, */*;q=0.8",
+}
+
+# 条目中可能携带DOI的元素（RSS 1.0/2.0 的 prism / dc 扩展）
+_DOI_TAGS = ("{http://prismstandard.org/namespaces/basic/2.0/}doi", "{http://purl.org/dc/elements/1.1/}identifier")
+_ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def _local_path(feed_url: str):
+    if feed_url.startswith("file://"):
+        return urlsplit(feed_url).path
+    if "://" not in feed_url:
+        return feed_url
+    return None
+
+
+def fetch_feed(feed_url: str, cursor: dict, timeout: int = 30):
+    """
+    条件请求订阅源
+
+    Returns:
+        (body, etag, last_modified)：未变化时 body 为None
+    """
+    path = _local_path(feed_url)
+    if path is not None:
+        # 本地文件用修改时间充当 Last-Modified
+        last_modified = email.utils.formatdate(os.path.getmtime(path), usegmt=True)
+        if cursor.get("last_modified") == last_modified:
+            return None, cursor.get("etag"), last_modified
+        with open(path, "rb") as f:
+            return f.read(), None, last_modified
+
+    headers = dict(_HEADERS)
+    if cursor.get("etag"):
+        headers["If-None-Match"] = cursor["etag"]
+    if cursor.get("last_modified"):
+        headers["If-Modified-Since"] = cursor["last_modified"]
+    resp = requests.get(feed_url, headers=headers, timeout=timeout)
+    if resp.status_code == 304:
+        return None, cursor.get("etag"), cursor.get("last_modified")
+    resp.raise_for_status()
+    return resp.content, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+
+def parse_feed_entries(body: bytes):
+    """
+    解析 RSS 2.0 / RSS 1.0 (RDF) / Atom，返回 [(link, doi)]；条目中没有DOI时 doi 为None
+    """
+    root = ET.fromstring(body)
+    entries = []
+    for elem in root.iter():
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if tag not in ("item", "entry"):
+            continue
+        link = None
+        doi = None
+        for child in elem:
+            child_tag = child.tag.rsplit("}", 1)[-1]
+            if child_tag == "link":
+                # Atom 的链接在 href 属性里
+                if child.tag.startswith(_ATOM):
+                    if child.get("rel", "alternate") == "alternate":
+                        link = child.get("href")
+                else:
+                    link = (child.text or "").strip() or link
+            elif child.tag in _DOI_TAGS and child.text and "10." in child.text:
+                doi = clean_doi(child.text)
+        if link is None and elem.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about"):
+            link = elem.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about")
+        if link:
+            entries.append((link, doi))
+    return entries
+
+
+def poll_feed(feed_url: str, store: PaperStore):
+    """
+    轮询一个订阅源，返回 (尚未处理过的论文链接, 新游标)
+
+    链接按订阅源中的顺序并已去重；订阅源没有变化时不解析、直接返回空列表。
+    新游标需要在这些论文处理完之后再用 store.save_feed_cursor 保存，
+    这样中途崩溃时下次轮询仍会重新拿到完整的订阅源。
+    """
+    cursor = store.get_feed_cursor(feed_url)
+    body, etag, last_modified = fetch_feed(feed_url, cursor)
+    if body is None:
+        return [], (etag, last_modified)
+
+    new_urls = []
+    seen = set()
+    for link, doi in parse_feed_entries(body):
+        paper = canonicalize(f"https://doi.org/{doi}" if doi else link)
+        key = paper_key(paper)
+        if key in seen or store.lookup_url(paper.url):
+            continue
+        seen.add(key)
+        new_urls.append(paper.url)
+
+    return new_urls, (etag, last_modified)
+
+
+def watch(feeds, store: PaperStore, process, interval: int = 900, once: bool = False):
+    """
+    循环轮询订阅源，把新论文交给 process(urls, store=store) 处理
+
+    处理失败的论文不会写入论文库，订阅源下次更新时会被重新识别为新论文。
+    """
+    while True:
+        for feed_url in feeds:
+            try:
+                new_urls, (etag, last_modified) = poll_feed(feed_url, store)
+            except Exception as e:
+                print(f"Error polling {feed_url}: {e}")
+                continue
+            print(f"{feed_url}: {len(new_urls)} new articles")
+            if new_urls:
+                try:
+                    process(new_urls, store=store)
+                except Exception as e:
+                    # 不保存游标：下次轮询重新拿到完整的订阅源，未保存的论文仍被识别为新论文
+                    print(f"Error processing {feed_url}: {e}")
+                    continue
+            store.save_feed_cursor(feed_url, etag, last_modified, len(new_urls))
+        if once:
+            return
+        time.sleep(interval)
+
+
+def load_feed_list(path: str):
+    """读取订阅源列表文件：每行一个URL或本地路径，# 开头为注释"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Poll journal feeds and extract only new articles")
+    parser.add_argument("--feeds", help="file with one feed URL/path per line (default: built-in journal feeds)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite paper store (default: %(default)s)")
+    parser.add_argument("--interval", type=int, default=900, help="seconds between polls (default: %(default)s)")
+    parser.add_argument("--once", action="store_true", help="poll every feed once and exit")
+    args = parser.parse_args()
+
+    from main import main_batch
+
+    feeds = load_feed_list(args.feeds) if args.feeds else DEFAULT_FEEDS
+    with PaperStore(args.db) as store:
+        watch(feeds, store, main_batch, interval=args.interval, once=args.once)
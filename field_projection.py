@@ -0,0 +1,168 @@
+"""
+字段投影：只提取调用方需要的字段
+
+默认每篇论文都要解析全部字段、为每个单位查ROR、再调用LLM生成新闻稿。
+指定 fields 后，需求沿流水线向下传递：
+- 解析阶段只注册需要的DOM字段（DocumentExtractor.project），不需要作者时跳过作者/单位/国家的处理，
+  Science 不需要 notes 时跳过资金/脚注部分
+- 只需要 title / journal_name / publication_date 时，只下载页面的 <head>，从 citation_* meta 标签中读取
+  （meta 标签不全时再下载整页）
+- 不需要 summary 时不调用LLM；论文库中已有的论文直接从库中投影，不再抓取
+
+用法：
+    fields = parse_fields("title,corresponding_institutions")
+    paper = ne.parse_nature_authors(url, fields=fields)
+    record = project(paper, fields)
+"""
+from datetime import datetime
+
+from paper_model import Paper
+
+PAPER_FIELDS = (
+    "title", "journal_name", "publication_date", "abstract", "authors", "affiliations", "countries",
+    "contributions", "equal_contributions", "notes", "corresponding_authors", "corresponding_institutions",
+)
+# summary：LLM生成的新闻稿和信息提取（即不指定 fields 时的输出）
+LLM_FIELDS = ("summary",)
+ALL_FIELDS = PAPER_FIELDS + LLM_FIELDS
+
+# 页面 <head> 中的 citation_* meta 标签就能提供的字段
+HEAD_FIELDS = frozenset(("title", "journal_name", "publication_date"))
+# 需要解析作者列表的字段
+AUTHOR_FIELDS = frozenset(("authors", "affiliations", "countries", "corresponding_authors",
+                           "corresponding_institutions"))
+
+
+def parse_fields(spec):
+    """
+    "title,abstract" / 可迭代对象 -> frozenset；None、空值或 "all" 表示全部字段（返回None）
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    if spec is None:
+        return None
+    names = spec.split(",") if isinstance(spec, str) else spec
+    fields = frozenset(name.strip() for name in names if name and name.strip())
+    if not fields or "all" in fields:
+        return None
+    unknown = fields - set(ALL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))} (choose from {', '.join(ALL_FIELDS)})")
+    return fields
+
+
+def wants(fields, *names) -> bool:
+    """fields 为None（全部字段）或包含 names 中任一字段"""
+    return fields is None or any(name in fields for name in names)
+
+
+def needs_llm(fields) -> bool:
+    return wants(fields, "summary")
+
+
+def head_only(fields) -> bool:
+    """需要的字段是否都能从页面 <head> 得到（此时不必下载整页）"""
+    return fields is not None and fields <= HEAD_FIELDS
+
+
+def read_head(resp, chunk_size: int = 16384) -> bytes:
+    """从流式响应中读到 </head> 为止，剩余部分不再下载"""
+    data = b""
+    try:
+        for chunk in resp.iter_content(chunk_size):
+            data += chunk
+            end = data.lower().find(b"</head>", max(0, len(data) - len(chunk) - 7))
+            if end >= 0:
+                return data[:end + len(b"</head>")]
+    finally:
+        resp.close()
+    return data
+
+
+_MONTHS = ("January", "February", "March", "April", "May", "June", "July", "August", "September",
+           "October", "November", "December")
+
+
+def _nature_date(value: str):
+    """
+    meta 中的 2025/06/05 -> 与 nature_extractor.extract_publication_date 相同的
+    {"iso_date": "2025-06-05", "formatted_date": "05 June 2025"}；不是完整日期时返回None
+    """
+    for fmt in ("%Y/%m/%d", "%Y-%m-%d"):
+        try:
+            day = datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+        # 不用 %B：月份名随 locale 变化，页面上总是英文
+        return {"iso_date": day.isoformat(), "formatted_date": f"{day.day:02d} {_MONTHS[day.month - 1]} {day.year}"}
+    return None
+
+
+def parse_head(html, url: str, journal: str, fields=None):
+    """
+    从 citation_* meta 标签读取 HEAD_FIELDS；发表日期按各期刊完整解析时的格式返回
+
+    fields 中有任一字段在 meta 标签里找不到时返回None（调用方改为下载整页）
+    """
+    from bs4 import BeautifulSoup
+
+    from dom_extractor import meta_content
+
+    soup = BeautifulSoup(html, "html.parser")
+
+    def meta(*names):
+        for name in names:
+            elem = soup.find("meta", attrs={"name": name})
+            value = meta_content(elem) if elem else None
+            if value:
+                return value
+        return None
+
+    date = meta("citation_publication_date", "citation_online_date", "dc.date")
+    if journal == "nature":
+        date = _nature_date(date) if date else None
+    info = {
+        "url": url,
+        "title": meta("citation_title", "dc.title"),
+        "journal_name": meta("citation_journal_title"),
+        "publication_date": date,
+    }
+    if any(info.get(name) is None for name in fields or HEAD_FIELDS):
+        return None
+    return info
+
+
+def _corresponding_authors(paper: Paper):
+    from paper_store import _is_corresponding
+
+    return [author for author in paper.authors
+            if _is_corresponding(paper._author_dict(author), paper.notes)]
+
+
+def project(paper: Paper, fields) -> dict:
+    """按 fields 投影论文（不含 summary），fields 为None时等同 paper.to_dict()"""
+    if fields is None:
+        return paper.to_dict()
+    data = {"url": paper.url}
+    for name in PAPER_FIELDS:
+        if name not in fields:
+            continue
+        if name == "authors":
+            value = [paper._author_dict(author) for author in paper.authors]
+        elif name == "affiliations":
+            value = [affiliation.address for affiliation in paper.affiliations]
+        elif name == "countries":
+            value = paper.countries
+            if value is None:
+                value = sorted({affiliation.resolve().country for affiliation in paper.affiliations} - {"", None})
+        elif name == "corresponding_authors":
+            value = [{"name": author.name, "affiliations": paper.author_affiliations(author)}
+                     for author in _corresponding_authors(paper)]
+        elif name == "corresponding_institutions":
+            indexes = {index for author in _corresponding_authors(paper) for index in author.affiliations}
+            value = sorted({paper.affiliations[index].resolve().institution for index in indexes} - {"", None})
+        else:
+            value = getattr(paper, name)
+        data[name] = value
+    return data
@@ -0,0 +1,132 @@
+"""
+对冲请求（hedged requests）
+
+大多数抓取和LLM请求很快，少数会慢上几十倍，批量任务的尾延迟由这些慢请求决定。
+对冲：请求发出后如果超过最近延迟的 p95 仍未返回，再发一个相同的请求，取先完成的结果；
+多出来的请求只有约5%，却能把 p99 拉回接近 p95。
+
+- 每类请求一个 HedgePolicy，记录最近的延迟并给出对冲等待时间（样本不足时用 initial_delay）
+- 对冲默认关闭（LLM 的对冲请求要多付一次token费用）；HEDGE=fetch,llm 环境变量或 --hedge 参数开启
+- 落后的那个请求不会被中断（requests/openai 的同步调用无法取消），完成后结果被丢弃
+- 遵守 deadline 的截止时间：剩余时间不够等到对冲时就不再发第二个请求
+- APS 的 Playwright 页面只能在浏览器线程中使用，不做对冲
+
+用法：
+    resp = hedged(FETCH_HEDGE, session.get, url, timeout=timeout_for(30))
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import deadline
+from profiling import span
+
+
+class HedgePolicy:
+    def __init__(self, name: str, initial_delay: float, quantile: float = 0.95, min_delay: float = 0.05,
+                 min_samples: int = 20, window: int = 500, enabled: bool = False):
+        self.name = name
+        self.initial_delay = initial_delay
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0}
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def delay(self) -> float:
+        """对冲前的等待时间：最近延迟的 quantile 分位数"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._latencies)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))])
+
+
+FETCH_HEDGE = HedgePolicy("fetch", initial_delay=3.0)
+LLM_HEDGE = HedgePolicy("llm", initial_delay=30.0)
+POLICIES = {policy.name: policy for policy in (FETCH_HEDGE, LLM_HEDGE)}
+
+# 主请求和对冲请求都在这里执行，调用线程只负责等待
+_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="hedge")
+
+
+def configure(spec):
+    """按 "fetch,llm" 开启对应的对冲（其余关闭）；spec 为None时读取 HEDGE 环境变量"""
+    spec = os.getenv("HEDGE", "") if spec is None else spec
+    names = {name.strip() for name in spec.split(",") if name.strip()}
+    unknown = names - set(POLICIES) - {"all"}
+    if unknown:
+        raise ValueError(f"Unknown hedge targets: {', '.join(sorted(unknown))} (choose from fetch, llm)")
+    for name, policy in POLICIES.items():
+        policy.enabled = name in names or "all" in names
+
+
+def _timed(policy, fn, args, kwargs):
+    started = time.monotonic()
+    with span(f"{policy.name}.attempt"):
+        result = fn(*args, **kwargs)
+    policy.record(time.monotonic() - started)
+    return result
+
+
+def _submit(policy, fn, args, kwargs):
+    # 每次提交复制一份上下文：同一个 Context 不能同时在两个线程中运行
+    return _executor.submit(contextvars.copy_context().run, _timed, policy, fn, args, kwargs)
+
+
+def hedged(policy: HedgePolicy, fn, *args, **kwargs):
+    """调用 fn(*args, **kwargs)；policy 开启时超过对冲等待时间再发一个相同的请求，返回先成功的结果"""
+    policy._count("requests")
+    if not policy.enabled:
+        return _timed(policy, fn, args, kwargs)
+
+    primary = _submit(policy, fn, args, kwargs)
+    delay = policy.delay()
+    left = deadline.remaining()
+    done, _ = wait([primary], timeout=delay if left is None else min(delay, left))
+    if primary in done or (left is not None and left <= delay):
+        # 已经完成，或剩余时间不够等到对冲：不再发第二个请求
+        left = deadline.remaining()
+        done, _ = wait([primary], timeout=None if left is None else max(0, left))
+        if not done:
+            raise deadline.DeadlineExceeded(f"{policy.name}: deadline exceeded")
+        return primary.result()
+
+    policy._count("hedged")
+    backup = _submit(policy, fn, args, kwargs)
+    pending = {primary, backup}
+    first_error = None
+    while pending:
+        left = deadline.remaining()
+        done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+        if not done:
+            raise deadline.DeadlineExceeded(f"{policy.name}: deadline exceeded")
+        for future in done:
+            error = future.exception()
+            if error is None:
+                if future is backup:
+                    policy._count("hedge_wins")
+                return future.result()
+            first_error = first_error or error
+    raise first_error
+
+
+def stats() -> dict:
+    return {name: dict(policy.stats, enabled=policy.enabled, delay_s=round(policy.delay(), 3))
+            for name, policy in POLICIES.items()}
+
+
+configure(None)
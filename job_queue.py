@@ -0,0 +1,507 @@
+"""
+持久化任务队列
+
+把待处理的论文链接放进共享队列，多个 worker 进程（可以在不同机器上）各自租用任务：
+- 租约 + 可见性超时：worker 崩溃后任务在超时后自动重新可见
+- 失败重试（指数退避），超过最大次数进入死信
+- 按期刊分道（nature / science / aps），可以只消费某些道，或限制每道的并发租约数
+  （例如APS需要浏览器，单独限流）
+- 按DOI去重，同一篇论文只入队一次
+
+默认使用SQLite（单机多进程，或放在共享盘上）；RedisJobQueue 使用 Redis 协议，
+可以对接本地的 Redis 兼容替身服务做测试，也可以跨机器部署。
+
+用法：
+    queue = open_queue("jobs.db")            # 或 "redis://localhost:6379/0"
+    queue.enqueue(urls)
+    job = queue.lease("worker-1", lanes=["nature"])
+    queue.complete(job.id) / queue.fail(job.id, "error")
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from paper_identity import canonicalize, paper_key
+
+DEFAULT_QUEUE_PATH = "jobs.db"
+LANES = ("nature", "science", "aps")
+
+Job = namedtuple("Job", "id url journal attempts max_attempts")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    paper_key TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    lane TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (lane, state, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (state, lease_until);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def retry_delay(attempts: int, base: float = 30.0, cap: float = 3600.0) -> float:
+    """第 attempts 次失败后的重试等待时间（指数退避）"""
+    return min(cap, base * 2 ** max(0, attempts - 1))
+
+
+def _lane_order(lanes, start: int):
+    """从 start 开始轮转各道，避免某一道的积压饿死其他道"""
+    lanes = list(lanes)
+    if not lanes:
+        return lanes
+    start %= len(lanes)
+    return lanes[start:] + lanes[:start]
+
+
+class SQLiteJobQueue:
+    """SQLite任务队列，租用操作在 BEGIN IMMEDIATE 事务中完成，多进程安全"""
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, visibility_timeout: float = 600,
+                 max_attempts: int = 5, lane_limits: dict = None):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.lane_limits = dict(lane_limits or {})
+        self._rotation = 0
+        # worker 的续租线程共用这个连接
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def enqueue(self, urls, max_attempts: int = None):
+        """
+        按论文去重后入队，已在队列中（包括已完成和死信）的论文不会重复入队
+
+        Returns:
+            (added, skipped)：新入队的规范链接列表、无法识别期刊的链接列表
+        """
+        now = time.time()
+        added, skipped = [], []
+        with self._transaction():
+            for url in urls:
+                paper = canonicalize(url)
+                if paper.journal not in LANES:
+                    skipped.append(url)
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO jobs (paper_key, url, lane, max_attempts, available_at, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (paper_key(paper), paper.url, paper.journal, max_attempts or self.max_attempts, now, now, now)
+                )
+                if cursor.rowcount:
+                    added.append(paper.url)
+        return added, skipped
+
+    def lease(self, worker: str, lanes=None, visibility_timeout: float = None):
+        """
+        租用一个就绪任务：排队中且已到重试时间，或租约已过期的任务
+
+        Returns:
+            Job 或 None（当前没有可租用的任务）
+        """
+        now = time.time()
+        lease_until = now + (visibility_timeout or self.visibility_timeout)
+        lanes = _lane_order(lanes or LANES, self._rotation)
+        self._rotation += 1
+        with self._transaction():
+            for lane in lanes:
+                limit = self.lane_limits.get(lane)
+                if limit is not None:
+                    (active,) = self._conn.execute(
+                        "SELECT COUNT(*) FROM jobs WHERE lane = ? AND state = 'leased' AND lease_until > ?",
+                        (lane, now)
+                    ).fetchone()
+                    if active >= limit:
+                        continue
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE lane = ? AND ("
+                    " (state = 'queued' AND available_at <= ?) OR (state = 'leased' AND lease_until <= ?)"
+                    ") ORDER BY available_at, id LIMIT 1",
+                    (lane, now, now)
+                ).fetchone()
+                if row is None:
+                    continue
+                attempts = row["attempts"] + 1
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'leased', attempts = ?, lease_until = ?, worker = ?, updated_at = ?"
+                    " WHERE id = ?",
+                    (attempts, lease_until, worker, now, row["id"])
+                )
+                return Job(row["id"], row["url"], lane, attempts, row["max_attempts"])
+        return None
+
+    def extend(self, job_id: int, worker: str, visibility_timeout: float = None) -> bool:
+        """续租（心跳），租约已被其他worker接管时返回False"""
+        now = time.time()
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND state = 'leased' AND worker = ?",
+                (now + (visibility_timeout or self.visibility_timeout), now, job_id, worker)
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: int, worker: str = None) -> bool:
+        """标记完成；给出 worker 时只在租约仍属于该worker时生效"""
+        now = time.time()
+        sql = "UPDATE jobs SET state = 'done', lease_until = NULL, last_error = NULL, updated_at = ? WHERE id = ?"
+        params = [now, job_id]
+        if worker:
+            sql += " AND state = 'leased' AND worker = ?"
+            params.append(worker)
+        with self._transaction():
+            return self._conn.execute(sql, params).rowcount > 0
+
+    def fail(self, job_id: int, error: str, worker: str = None):
+        """
+        记录失败：未超过最大次数时退避后重新排队，否则进入死信
+
+        Returns:
+            新状态 queued / dead；租约已不属于 worker 时返回None
+        """
+        now = time.time()
+        with self._transaction():
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or (worker and (row["state"] != "leased" or row["worker"] != worker)):
+                return None
+            if row["attempts"] >= row["max_attempts"]:
+                state, available_at = "dead", now
+            else:
+                state, available_at = "queued", now + retry_delay(row["attempts"])
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, available_at = ?, lease_until = NULL, last_error = ?, updated_at = ?"
+                " WHERE id = ?",
+                (state, available_at, str(error)[:2000], now, job_id)
+            )
+        return state
+
+    def requeue_dead(self, lane: str = None) -> int:
+        """把死信任务重新排队（重置尝试次数），返回数量"""
+        now = time.time()
+        sql = "UPDATE jobs SET state = 'queued', attempts = 0, available_at = ?, updated_at = ? WHERE state = 'dead'"
+        params = [now, now]
+        if lane:
+            sql += " AND lane = ?"
+            params.append(lane)
+        with self._transaction():
+            return self._conn.execute(sql, params).rowcount
+
+    def dead_letters(self, limit: int = 100):
+        rows = self._conn.execute(
+            "SELECT id, url, lane, attempts, last_error FROM jobs WHERE state = 'dead' ORDER BY updated_at DESC LIMIT ?",
+            (limit,)
+        )
+        return [dict(row) for row in rows]
+
+    def stats(self) -> dict:
+        """{lane: {state: count}}；租约已过期的任务计入 expired"""
+        now = time.time()
+        result = {lane: {} for lane in LANES}
+        rows = self._conn.execute(
+            "SELECT lane, CASE WHEN state = 'leased' AND lease_until <= ? THEN 'expired' ELSE state END AS s,"
+            " COUNT(*) AS n FROM jobs GROUP BY lane, s",
+            (now,)
+        )
+        for row in rows:
+            result.setdefault(row["lane"], {})[row["s"]] = row["n"]
+        return result
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn, self._lock)
+
+
+class _ImmediateTransaction:
+    """BEGIN IMMEDIATE：事务一开始就拿到写锁，两个worker不会租到同一个任务"""
+
+    def __init__(self, conn, lock):
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._lock.release()
+            raise
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._lock.release()
+
+
+# 原子租用：先把过期租约放回所属道，再按顺序从各道弹出一个就绪任务
+_LEASE_SCRIPT = """
+local prefix = ARGV[1]
+local now = tonumber(ARGV[2])
+local lease_until = tonumber(ARGV[3])
+local worker = ARGV[4]
+local expired = redis.call('ZRANGEBYSCORE', prefix .. ':leased', '-inf', now)
+for _, id in ipairs(expired) do
+    redis.call('ZREM', prefix .. ':leased', id)
+    local lane = redis.call('HGET', prefix .. ':job:' .. id, 'lane')
+    redis.call('SREM', prefix .. ':active:' .. lane, id)
+    redis.call('HSET', prefix .. ':job:' .. id, 'state', 'queued')
+    redis.call('ZADD', prefix .. ':ready:' .. lane, now, id)
+end
+for i = 5, #ARGV, 2 do
+    local lane = ARGV[i]
+    local limit = tonumber(ARGV[i + 1])
+    local active = 0
+    if limit >= 0 then
+        active = redis.call('SCARD', prefix .. ':active:' .. lane)
+    end
+    if limit < 0 or active < limit then
+        local ready = redis.call('ZRANGEBYSCORE', prefix .. ':ready:' .. lane, '-inf', now, 'LIMIT', 0, 1)
+        if #ready > 0 then
+            local id = ready[1]
+            local key = prefix .. ':job:' .. id
+            redis.call('ZREM', prefix .. ':ready:' .. lane, id)
+            redis.call('ZADD', prefix .. ':leased', lease_until, id)
+            redis.call('SADD', prefix .. ':active:' .. lane, id)
+            local attempts = redis.call('HINCRBY', key, 'attempts', 1)
+            redis.call('HSET', key, 'state', 'leased', 'worker', worker, 'lease_until', lease_until)
+            return {id, redis.call('HGET', key, 'url'), lane, attempts, redis.call('HGET', key, 'max_attempts')}
+        end
+    end
+end
+return false
+"""
+
+
+class RedisJobQueue:
+    """
+    Redis任务队列（需要 redis-py），适合跨机器部署或对接本地的 Redis 兼容替身服务
+
+    数据结构：{prefix}:job:<id> 哈希；{prefix}:ready:<lane> 以可用时间为分数的有序集合；
+    {prefix}:leased 以租约到期时间为分数的有序集合；{prefix}:active:<lane> 当前租约集合；
+    {prefix}:dead 死信列表；{prefix}:done 各道已完成数；{prefix}:keys 论文键 -> 任务id
+
+    complete / fail / extend 用 WATCH/MULTI 检查租约归属并更新，两步之间任务被别的worker重新租用时不会误改
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "paperq",
+                 visibility_timeout: float = 600, max_attempts: int = 5, lane_limits: dict = None):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.lane_limits = dict(lane_limits or {})
+        self._rotation = 0
+        self._lease_script = self._redis.register_script(_LEASE_SCRIPT)
+        self._watch_error = redis.WatchError
+
+    def close(self):
+        self._redis.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _key(self, *parts) -> str:
+        return ":".join((self.prefix,) + tuple(str(p) for p in parts))
+
+    def enqueue(self, urls, max_attempts: int = None):
+        now = time.time()
+        added, skipped = [], []
+        for url in urls:
+            paper = canonicalize(url)
+            if paper.journal not in LANES:
+                skipped.append(url)
+                continue
+            job_id = self._redis.incr(self._key("next_id"))
+            if not self._redis.hsetnx(self._key("keys"), paper_key(paper), job_id):
+                continue
+            pipe = self._redis.pipeline()
+            pipe.hset(self._key("job", job_id), mapping={
+                "url": paper.url, "lane": paper.journal, "state": "queued", "attempts": 0,
+                "max_attempts": max_attempts or self.max_attempts, "created_at": now,
+            })
+            pipe.zadd(self._key("ready", paper.journal), {job_id: now})
+            pipe.execute()
+            added.append(paper.url)
+        return added, skipped
+
+    def lease(self, worker: str, lanes=None, visibility_timeout: float = None):
+        now = time.time()
+        lanes = _lane_order(lanes or LANES, self._rotation)
+        self._rotation += 1
+        args = [self.prefix, now, now + (visibility_timeout or self.visibility_timeout), worker]
+        for lane in lanes:
+            limit = self.lane_limits.get(lane)
+            args += [lane, -1 if limit is None else limit]
+        result = self._lease_script(args=args)
+        if not result:
+            return None
+        job_id, url, lane, attempts, max_attempts = result
+        return Job(int(job_id), url, lane, int(attempts), int(max_attempts))
+
+    def _update_owned(self, job_id: int, worker: str, update):
+        """
+        WATCH 任务哈希后检查租约归属，再在 MULTI 中执行 update(pipe, job)；
+        检查和更新之间任务被重新租用（租用脚本会改写任务哈希）时重试
+
+        Returns:
+            update 的返回值；任务不存在或租约已不属于 worker 时返回None
+        """
+        key = self._key("job", job_id)
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    job = pipe.hgetall(key)
+                    if not job or not self._owned(job, worker):
+                        pipe.unwatch()
+                        return None
+                    pipe.multi()
+                    result = update(pipe, job)
+                    pipe.execute()
+                    return result
+                except self._watch_error:
+                    continue
+
+    def extend(self, job_id: int, worker: str, visibility_timeout: float = None) -> bool:
+        def update(pipe, job):
+            lease_until = time.time() + (visibility_timeout or self.visibility_timeout)
+            pipe.zadd(self._key("leased"), {job_id: lease_until}, xx=True)
+            pipe.hset(self._key("job", job_id), "lease_until", lease_until)
+            return True
+
+        return self._update_owned(job_id, worker, update) or False
+
+    def _release(self, pipe, job_id: int, lane: str):
+        pipe.zrem(self._key("leased"), job_id)
+        pipe.srem(self._key("active", lane), job_id)
+
+    def _owned(self, job: dict, worker: str) -> bool:
+        return not worker or (job.get("state") == "leased" and job.get("worker") == worker)
+
+    def complete(self, job_id: int, worker: str = None) -> bool:
+        def update(pipe, job):
+            self._release(pipe, job_id, job["lane"])
+            if job.get("state") != "done":
+                pipe.hincrby(self._key("done"), job["lane"], 1)
+            pipe.hset(self._key("job", job_id), mapping={"state": "done", "last_error": ""})
+            return True
+
+        return self._update_owned(job_id, worker, update) or False
+
+    def fail(self, job_id: int, error: str, worker: str = None):
+        def update(pipe, job):
+            attempts = int(job["attempts"])
+            self._release(pipe, job_id, job["lane"])
+            if attempts >= int(job["max_attempts"]):
+                state = "dead"
+                pipe.rpush(self._key("dead"), job_id)
+            else:
+                state = "queued"
+                pipe.zadd(self._key("ready", job["lane"]), {job_id: time.time() + retry_delay(attempts)})
+            pipe.hset(self._key("job", job_id), mapping={"state": state, "last_error": str(error)[:2000]})
+            return state
+
+        return self._update_owned(job_id, worker, update)
+
+    def requeue_dead(self, lane: str = None) -> int:
+        now = time.time()
+        count = 0
+        for job_id in self._redis.lrange(self._key("dead"), 0, -1):
+            key = self._key("job", job_id)
+            job_lane = self._redis.hget(key, "lane")
+            if lane and job_lane != lane:
+                continue
+            pipe = self._redis.pipeline()
+            pipe.lrem(self._key("dead"), 1, job_id)
+            pipe.hset(key, mapping={"state": "queued", "attempts": 0})
+            pipe.zadd(self._key("ready", job_lane), {job_id: now})
+            pipe.execute()
+            count += 1
+        return count
+
+    def dead_letters(self, limit: int = 100):
+        result = []
+        for job_id in self._redis.lrange(self._key("dead"), -limit, -1):
+            job = self._redis.hgetall(self._key("job", job_id))
+            result.append({"id": int(job_id), "url": job.get("url"), "lane": job.get("lane"),
+                           "attempts": int(job.get("attempts", 0)), "last_error": job.get("last_error")})
+        return result
+
+    def stats(self) -> dict:
+        """与 SQLiteJobQueue.stats 相同：{lane: {state: count}}，只列出非零的状态"""
+        now = time.time()
+        expired = self._redis.zrangebyscore(self._key("leased"), "-inf", now)
+        dead = self._redis.lrange(self._key("dead"), 0, -1)
+        pipe = self._redis.pipeline()
+        for job_id in expired + dead:
+            pipe.hget(self._key("job", job_id), "lane")
+        lanes_of = pipe.execute()
+        expired_lanes, dead_lanes = lanes_of[:len(expired)], lanes_of[len(expired):]
+        done = self._redis.hgetall(self._key("done"))
+
+        result = {}
+        for lane in LANES:
+            counts = {
+                "queued": self._redis.zcard(self._key("ready", lane)),
+                "leased": self._redis.scard(self._key("active", lane)) - expired_lanes.count(lane),
+                "expired": expired_lanes.count(lane),
+                "done": int(done.get(lane, 0)),
+                "dead": dead_lanes.count(lane),
+            }
+            result[lane] = {state: count for state, count in counts.items() if count}
+        return result
+
+
+def open_queue(spec: str = None, **kwargs):
+    """
+    按连接串打开队列：redis:// / rediss:// 使用 RedisJobQueue，其余视为SQLite文件路径
+
+    未指定时读取环境变量 JOB_QUEUE_URL，默认 jobs.db
+    """
+    spec = spec or os.getenv("JOB_QUEUE_URL") or DEFAULT_QUEUE_PATH
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobQueue(spec, **kwargs)
+    return SQLiteJobQueue(spec, **kwargs)
+
+
+def parse_lane_limits(values) -> dict:
+    """解析 'aps=1' 形式的分道并发限制"""
+    limits = {}
+    for value in values or ():
+        lane, _, limit = value.partition("=")
+        if lane not in LANES or not limit.isdigit():
+            raise ValueError(f"Invalid lane limit: {value!r} (expected e.g. aps=1)")
+        limits[lane] = int(limit)
+    return limits
@@ -0,0 +1,543 @@
+"""
+期刊网站和LLM接口的本地替身（stand-in），用于离线的端到端压测
+
+设置环境变量 JOURNAL_STANDIN_URL 后，Nature/Science 的 requests 抓取、APS 的 Playwright/crawl4ai
+访问都改为请求 {JOURNAL_STANDIN_URL}/{原主机名}/{原路径}；把 DEEPSEEK_BASE_URL 指向
+{JOURNAL_STANDIN_URL}/api.deepseek.com 后，LLM请求也由替身应答。
+
+替身按以下顺序应答：
+1. 磁带（cassette，JSONL文件）中录制过的同一请求 -> 原样回放
+2. --record 模式 -> 转发给真实网站，录入磁带后返回
+3. 否则合成：同主机已录制页面中按路径挑一个，没有时用内置模板生成；
+   LLM请求按 extract_paper_info 要求的格式生成回复（支持打包请求的 "=== 论文 N ==="）
+
+可以注入故障：延迟分布、403/429（带 Retry-After）、APS的机器人验证页。
+
+用法：
+    python journal_standin.py serve --cassette cassettes/papers.jsonl --latency lognormal:300,0.5 --rate-429 0.05
+    python journal_standin.py serve --record --cassette cassettes/papers.jsonl
+    python journal_standin.py import URL page.html --cassette cassettes/papers.jsonl   # 浏览器中另存的APS页面
+    python journal_standin.py list --cassette cassettes/papers.jsonl
+"""
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+STANDIN_ENV = "JOURNAL_STANDIN_URL"
+DEFAULT_CASSETTE_PATH = os.path.join("cassettes", "papers.jsonl")
+DEFAULT_LLM_HOST = "api.deepseek.com"
+TARGETS = ("nature", "science", "aps", "llm", "other")
+
+
+def route_url(url: str) -> str:
+    """设置了 JOURNAL_STANDIN_URL 时把期刊链接改写到本地替身，否则原样返回"""
+    standin = os.getenv(STANDIN_ENV)
+    if not standin:
+        return url
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{standin.rstrip('/')}/{parts.netloc}{parts.path or '/'}{query}"
+
+
+def target_of(host: str, path: str) -> str:
+    host = host.lower()
+    if path.rstrip("/").endswith("/chat/completions"):
+        return "llm"
+    if host.endswith("nature.com"):
+        return "nature"
+    if host.endswith("science.org"):
+        return "science"
+    if host.endswith("aps.org"):
+        return "aps"
+    return "other"
+
+
+# ---------------------------
+# 磁带
+# ---------------------------
+def request_key(method: str, host: str, path: str, body: bytes = b"") -> str:
+    """GET 按主机+路径；POST（LLM）还要按请求体区分"""
+    key = f"{method} {host.lower()}{path}"
+    if method != "GET":
+        key += " " + hashlib.sha256(body or b"").hexdigest()[:16]
+    return key
+
+
+class Cassette:
+    """录制的请求/响应，JSONL格式，每行一次交换；可在替身运行时追加"""
+
+    def __init__(self, path: str = DEFAULT_CASSETTE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._by_host = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+
+    def _index(self, entry: dict):
+        self._entries[entry["key"]] = entry
+        if entry["method"] == "GET" and entry["status"] == 200:
+            self._by_host.setdefault(entry["host"], []).append(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key: str):
+        return self._entries.get(key)
+
+    def similar(self, host: str, path: str):
+        """同主机录制过的页面中按路径稳定地挑一个，用来合成没有录制过的论文页面"""
+        entries = [e for e in self._by_host.get(host.lower(), ()) if e["path"] not in ("", "/")]
+        if not entries:
+            return None
+        digest = int(hashlib.md5(path.encode("utf-8")).hexdigest(), 16)
+        return entries[digest % len(entries)]
+
+    def record(self, method: str, host: str, path: str, request_body: bytes,
+               status: int, content_type: str, body: bytes) -> dict:
+        entry = {
+            "key": request_key(method, host, path, request_body),
+            "method": method,
+            "host": host.lower(),
+            "path": path,
+            "status": status,
+            "content_type": content_type,
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        try:
+            entry["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(body).decode("ascii")
+        with self._lock:
+            self._index(entry)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def entries(self):
+        return list(self._entries.values())
+
+
+def entry_body(entry: dict) -> bytes:
+    if "body_b64" in entry:
+        return base64.b64decode(entry["body_b64"])
+    return entry["body"].encode("utf-8")
+
+
+# ---------------------------
+# 故障注入
+# ---------------------------
+def parse_latency(spec: str):
+    """
+    延迟分布（毫秒），返回一个生成秒数的函数：
+    "0" / "fixed:200" / "uniform:100,500" / "lognormal:300,0.6"（中位数, sigma）
+    """
+    if not spec or spec == "0":
+        return lambda: 0.0
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v] if params else [float(kind)]
+    if kind == "fixed" or not params:
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        median, sigma = values[0], values[1] if len(values) > 1 else 0.5
+        return lambda: random.lognormvariate(0, sigma) * median / 1000
+    raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+
+class StandinConfig:
+    def __init__(self, latency: str = "0", llm_latency: str = "0", rate_403: float = 0.0, rate_429: float = 0.0,
+                 llm_rate_429: float = 0.0, challenge_rate: float = 0.0, retry_after: int = 1,
+                 record: bool = False, authors: int = 8, llm_model: str = "deepseek-chat"):
+        self.latency = parse_latency(latency)
+        self.llm_latency = parse_latency(llm_latency)
+        self.rate_403 = rate_403
+        self.rate_429 = rate_429
+        self.llm_rate_429 = llm_rate_429
+        self.challenge_rate = challenge_rate
+        self.retry_after = retry_after
+        self.record = record
+        self.authors = authors
+        self.llm_model = llm_model
+
+
+CHALLENGE_PAGE = """<!DOCTYPE html><html><head><title>Just a moment...</title>
+<meta name="robots" content="noindex,nofollow"></head>
+<body><div id="challenge-running">Checking if the site connection is secure</div>
+<noscript>Enable JavaScript and cookies to continue</noscript>
+<form id="challenge-form" action="/cdn-cgi/challenge-platform/h/b/orchestrate/jsch/v1" method="POST"></form>
+</body></html>"""
+
+
+# ---------------------------
+# 合成的论文页面
+# ---------------------------
+_AFFILIATIONS = [
+    "Department of Physics, Stanford University, Stanford, CA, USA",
+    "Institute of Physics, EPFL, Lausanne, Switzerland",
+    "Department of Physics, Tsinghua University, Beijing, China",
+    "Max Planck Institute for Quantum Optics, Garching, Germany",
+    "RIKEN Center for Emergent Matter Science, Wako, Japan",
+]
+
+
+def _fake_authors(seed: str, count: int):
+    rng = random.Random(seed)
+    authors = []
+    for i in range(count):
+        affs = sorted(rng.sample(range(len(_AFFILIATIONS)), rng.randint(1, 2)))
+        authors.append((f"Author{i + 1} {seed[:6].title()}", affs))
+    return authors
+
+
+def _nature_page(seed: str, count: int) -> str:
+    authors = _fake_authors(seed, count)
+    names = "".join(f'<li><span class="js-search-name">{name}</span></li>' for name, _ in authors)
+    affs = "".join(
+        f'<li id="Aff{i + 1}"><p class="c-article-author-affiliation__address">{address}</p>'
+        f'<p class="c-article-author-affiliation__authors-list">'
+        f'{" &amp; ".join(name for name, a in authors if i in a)}</p></li>'
+        for i, address in enumerate(_AFFILIATIONS))
+    return f"""<html><head><meta name="citation_journal_title" content="Nature Physics">
+<meta name="citation_title" content="Synthetic paper {seed}">
+<meta name="citation_publication_date" content="2025/07/28"></head><body>
+<h1 class="c-article-title">Synthetic paper {seed}</h1>
+<ul><li class="c-article-identifiers__item"><time datetime="2025-07-28">28 July 2025</time></li></ul>
+<ol class="c-article-authors-search">{names}</ol>
+<ol class="c-article-author-affiliation__list">{affs}</ol>
+<p id="corresponding-author-list"><a>{authors[-1][0]}</a></p>
+<h3 class="c-article__sub-heading" id="contributions">Contributions</h3><p>All authors contributed.</p>
+<div id="Abs1-content"><p>We report a synthetic result used for load testing.</p></div>
+</body></html>"""
+
+
+def _science_page(seed: str, count: int) -> str:
+    authors = []
+    for i, (_, affs) in enumerate(_fake_authors(seed, count)):
+        mark = "<sup>*</sup>" if i == 0 else ""
+        names = "".join(f'<div property="name">{_AFFILIATIONS[a]}</div>' for a in affs)
+        authors.append(f'<div property="author"><div class="heading"><span property="givenName">Author{i + 1}</span>'
+                       f'<span property="familyName">{seed[:6].title()}</span>{mark}</div>'
+                       f'<div class="content"><div class="affiliations">{names}</div></div></div>')
+    authors = "".join(authors)
+    return f"""<html><head><title>Synthetic | Science</title>
+<meta name="citation_journal_title" content="Science Advances">
+<meta name="citation_title" content="Synthetic paper {seed}">
+<meta name="citation_publication_date" content="2025/01/01"></head><body>
+<h1 property="headline">Synthetic paper {seed}</h1>
+<div class="core-date-published"><span property="datePublished">1 Jan 2025</span></div>
+<section id="abstract"><div role="paragraph">We report a synthetic result used for load testing.</div></section>
+<section id="tab-contributors"><div class="core-authors">{authors}</div>
+<section class="core-authors-notes"><div role="doc-footnote"><div class="label">*</div>
+<div id="n1">Corresponding author.</div></div></section></section>
+</body></html>"""
+
+
+def _aps_page(seed: str, count: int) -> str:
+    authors = _fake_authors(seed, count)
+    line = ", ".join(f'<a href="/search/field/author/{name.replace(" ", "%20")}">{name}</a>'
+                     f'<sup>{",".join(str(a + 1) for a in affs)}</sup>' for name, affs in authors)
+    affs = "".join(f"<li><sup>{i + 1}</sup>{address}</li>" for i, address in enumerate(_AFFILIATIONS))
+    return f"""<html><head><title>Synthetic | Phys. Rev. Lett.</title>
+<meta name="citation_journal_title" content="Physical Review Letters">
+{"".join(f'<meta name="citation_author" content="{name}">' for name, _ in authors)}</head><body>
+<h1 class="title">Synthetic paper {seed}</h1>
+<div class="pub-info-wrapper"><strong>Published 28 July, 2025</strong></div>
+<div class="authors-wrapper"><p>{line}</p><details><ul class="no-bullet">{affs}</ul></details></div>
+<div id="abstract-section-content"><p>We report a synthetic result used for load testing.</p></div>
+</body></html>"""
+
+
+_PAGE_TEMPLATES = {"nature": _nature_page, "science": _science_page, "aps": _aps_page}
+
+
+# ---------------------------
+# 合成的LLM回复
+# ---------------------------
+_PACK_SECTION_RE = re.compile(r'^\s*=+\s*论文\s*(\d+)\s*=+\s*$', re.MULTILINE)
+_TRANSLATE_ITEM_RE = re.compile(r"^(\d+)\. \[(?:机构|国家)\] (.+)$")
+
+
+_FAKE_ZH_CHARS = "甲乙丙丁戊己庚辛壬癸子丑寅卯辰巳"
+
+
+def _fake_translation(name: str) -> str:
+    digest = hashlib.md5(name.encode("utf-8")).hexdigest()
+    return "合成" + "".join(_FAKE_ZH_CHARS[int(c, 16)] for c in digest[:4]) + "机构"
+
+
+def _fake_summary(content: str) -> str:
+    try:
+        paper = json.loads(content)
+    except ValueError:
+        paper = {}
+    if not isinstance(paper, dict):
+        paper = {}
+    if "zh" in paper:
+        # main.news_prompt：只写新闻稿，"translate" 中的名称逐行给出能通过 valid_translation 的合成中文名
+        text = f"新闻风格介绍：近日，研究者们在{paper.get('journal_name') or '期刊'}发表论文。"
+        items = [_TRANSLATE_ITEM_RE.match(item) for item in paper.get("translate") or ()]
+        lines = [f"{match.group(1)}. {_fake_translation(match.group(2))}" for match in items if match]
+        return text + ("\n译名：\n" + "\n".join(lines) if lines else "")
+    affiliations = list((paper.get("affiliations") or {}).values())
+    first = affiliations[0] if affiliations else "未知单位"
+    others = "；".join(affiliations[1:]) or "无"
+    return (f"新闻风格介绍：近日，研究者们在{paper.get('journal_name') or '期刊'}发表论文。"
+            f"论文信息提取：第一作者/共同作者单位/通讯作者单位：{first}，其他作者单位：{others}，"
+            f"所有作者单位所属国家：{', '.join(paper.get('countries') or []) or '未知'}，"
+            f"论文url链接：{paper.get('url') or 'N/A'}，论文名：{paper.get('title') or 'N/A'}")
+
+
+def fake_completion(request: dict, model: str) -> dict:
+    """按 OpenAI chat.completions 的响应结构生成回复；打包请求逐篇生成"""
+    messages = request.get("messages") or []
+    user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    sections = list(_PACK_SECTION_RE.finditer(user))
+    if sections:
+        parts = []
+        for i, match in enumerate(sections):
+            end = sections[i + 1].start() if i + 1 < len(sections) else len(user)
+            parts.append(f"=== 论文 {match.group(1)} ===\n{_fake_summary(user[match.end():end].strip())}")
+        text = "\n".join(parts)
+    else:
+        text = _fake_summary(user)
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return {
+        "id": f"chatcmpl-standin-{hashlib.md5(user.encode('utf-8')).hexdigest()[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model") or model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_chars // 2, "completion_tokens": len(text) // 2,
+                  "total_tokens": (prompt_chars + len(text)) // 2},
+    }
+
+
+# ---------------------------
+# 服务器
+# ---------------------------
+class JournalStandin:
+    """替身的应答逻辑，与HTTP传输无关"""
+
+    def __init__(self, config: StandinConfig = None, cassette: Cassette = None):
+        self.config = config or StandinConfig()
+        self.cassette = cassette if cassette is not None else Cassette(None)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {target: {"requests": 0} for target in TARGETS}
+
+    def _count(self, target: str, name: str):
+        with self._lock:
+            counts = self._stats[target]
+            counts[name] = counts.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {target: dict(counts) for target, counts in self._stats.items() if counts["requests"]}
+
+    def _inject(self, target: str):
+        """按配置的概率返回一个故障响应 (status, headers, body)，否则None"""
+        config = self.config
+        if target == "llm":
+            if random.random() < config.llm_rate_429:
+                self._count(target, "injected_429")
+                body = json.dumps({"error": {"message": "Rate limit reached", "type": "rate_limit_error"}})
+                return 429, {"Content-Type": "application/json", "Retry-After": str(config.retry_after)}, body.encode()
+            return None
+        if target == "aps" and random.random() < config.challenge_rate:
+            self._count(target, "challenges")
+            return 403, {"Content-Type": "text/html; charset=utf-8", "cf-mitigated": "challenge"}, CHALLENGE_PAGE.encode()
+        roll = random.random()
+        if roll < config.rate_403:
+            self._count(target, "injected_403")
+            return 403, {"Content-Type": "text/html"}, b"<html><body><h1>403 Forbidden</h1></body></html>"
+        if roll < config.rate_403 + config.rate_429:
+            self._count(target, "injected_429")
+            return 429, {"Content-Type": "text/html", "Retry-After": str(config.retry_after)}, b"Too Many Requests"
+        return None
+
+    def _forward(self, method: str, host: str, path: str, headers: dict, body: bytes):
+        import requests
+
+        forwarded = {k: v for k, v in headers.items()
+                     if k.lower() in ("user-agent", "accept", "accept-language", "authorization", "content-type")}
+        resp = requests.request(method, f"https://{host}{path}", headers=forwarded, data=body or None, timeout=120)
+        return resp.status_code, resp.headers.get("Content-Type", ""), resp.content
+
+    def respond(self, method: str, host: str, path: str, headers: dict, body: bytes = b""):
+        """返回 (status, headers, body)"""
+        target = target_of(host, path)
+        self._count(target, "requests")
+        time.sleep(self.config.llm_latency() if target == "llm" else self.config.latency())
+
+        fault = self._inject(target)
+        if fault:
+            return fault
+
+        entry = self.cassette.lookup(request_key(method, host, path, body))
+        if entry:
+            self._count(target, "replayed")
+            return entry["status"], {"Content-Type": entry["content_type"]}, entry_body(entry)
+
+        if self.config.record and target != "other":
+            status, content_type, content = self._forward(method, host, path, headers, body)
+            self.cassette.record(method, host, path, body, status, content_type, content)
+            self._count(target, "recorded")
+            return status, {"Content-Type": content_type}, content
+
+        if target == "llm":
+            self._count(target, "synthesized")
+            completion = fake_completion(json.loads(body or b"{}"), self.config.llm_model)
+            return 200, {"Content-Type": "application/json"}, json.dumps(completion, ensure_ascii=False).encode()
+
+        if method == "GET" and target in _PAGE_TEMPLATES:
+            self._count(target, "synthesized")
+            if path.rstrip("/") == "":
+                return 200, {"Content-Type": "text/html; charset=utf-8"}, b"<html><body>Home</body></html>"
+            similar = self.cassette.similar(host, path)
+            if similar:
+                return 200, {"Content-Type": similar["content_type"]}, entry_body(similar)
+            seed = hashlib.md5(path.encode("utf-8")).hexdigest()[:10]
+            page = _PAGE_TEMPLATES[target](seed, self.config.authors)
+            return 200, {"Content-Type": "text/html; charset=utf-8"}, page.encode("utf-8")
+
+        self._count(target, "missed")
+        return 404, {"Content-Type": "text/plain"}, f"Not recorded: {method} {host}{path}".encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    standin: JournalStandin = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, headers: dict, body: bytes):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self.path.startswith("/__standin/"):
+            if self.path == "/__standin/reset":
+                self.standin.reset_stats()
+            data = json.dumps(self.standin.stats()).encode()
+            self._send(200, {"Content-Type": "application/json"}, data)
+            return
+        host, _, rest = self.path.lstrip("/").partition("/")
+        try:
+            self._send(*self.standin.respond(self.command, host, "/" + rest, dict(self.headers), body))
+        except Exception as e:
+            self._send(502, {"Content-Type": "text/plain"}, f"stand-in error: {type(e).__name__}: {e}".encode())
+
+    do_GET = do_POST = do_HEAD = _handle
+
+
+def make_server(standin: JournalStandin, host: str = "127.0.0.1", port: int = 8780) -> ThreadingHTTPServer:
+    """port=0 时由系统分配端口，实际地址见 server.server_address"""
+    handler = type("Handler", (_Handler,), {"standin": standin})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(standin: JournalStandin, host: str = "127.0.0.1", port: int = 0):
+    """在后台线程中启动替身，返回 (server, base_url)"""
+    server = make_server(standin, host, port)
+    threading.Thread(target=server.serve_forever, name="journal-standin", daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}"
+
+
+def add_standin_arguments(parser):
+    """serve 和 loadtest.py 共用的替身参数"""
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE_PATH, help="JSONL cassette (default: %(default)s)")
+    parser.add_argument("--latency", default="0", help="journal page latency in ms: fixed:200, uniform:100,500, "
+                                                       "lognormal:300,0.6 (median, sigma)")
+    parser.add_argument("--llm-latency", default="0", help="LLM response latency, same syntax as --latency")
+    parser.add_argument("--rate-403", type=float, default=0.0, help="probability of a 403 for journal pages")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of a 429 for journal pages")
+    parser.add_argument("--llm-rate-429", type=float, default=0.0, help="probability of a 429 from the LLM endpoint")
+    parser.add_argument("--challenge-rate", type=float, default=0.0, help="probability of a bot-challenge page for APS")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--authors", type=int, default=8, help="authors per synthesized paper page")
+
+
+def standin_from_args(args, record: bool = False) -> JournalStandin:
+    config = StandinConfig(latency=args.latency, llm_latency=args.llm_latency, rate_403=args.rate_403,
+                           rate_429=args.rate_429, llm_rate_429=args.llm_rate_429,
+                           challenge_rate=args.challenge_rate, retry_after=args.retry_after,
+                           record=record, authors=args.authors)
+    return JournalStandin(config, Cassette(args.cassette))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in for journal sites and the LLM endpoint")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="run the stand-in server")
+    add_standin_arguments(serve_parser)
+    serve_parser.add_argument("--listen", default="127.0.0.1:8780", help="host:port (default: %(default)s)")
+    serve_parser.add_argument("--record", action="store_true",
+                              help="forward unrecorded requests to the real sites and record them")
+
+    import_parser = subparsers.add_parser("import", help="record a saved page (e.g. an APS page saved from a browser)")
+    import_parser.add_argument("url")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--cassette", default=DEFAULT_CASSETTE_PATH)
+
+    list_parser = subparsers.add_parser("list", help="list recorded exchanges")
+    list_parser.add_argument("--cassette", default=DEFAULT_CASSETTE_PATH)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        standin = standin_from_args(args, record=args.record)
+        listen_host, _, listen_port = args.listen.rpartition(":")
+        server = make_server(standin, listen_host or "127.0.0.1", int(listen_port))
+        print(f"Journal stand-in on http://{args.listen} ({len(standin.cassette)} recorded exchanges)")
+        print(f"  export {STANDIN_ENV}=http://{args.listen}")
+        print(f"  export DEEPSEEK_BASE_URL=http://{args.listen}/{DEFAULT_LLM_HOST}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            print(json.dumps(standin.stats(), indent=2))
+    elif args.command == "import":
+        parts = urlsplit(args.url)
+        with open(args.file, "rb") as f:
+            content = f.read()
+        Cassette(args.cassette).record("GET", parts.netloc, parts.path or "/", b"", 200,
+                                       "text/html; charset=utf-8", content)
+        print(f"Recorded {args.url} into {args.cassette}")
+    else:
+        for entry in Cassette(args.cassette).entries():
+            print(f"{entry['status']}  {entry['method']:4s} {entry['host']}{entry['path']}  ({entry['recorded_at']})")
@@ -0,0 +1,194 @@
+"""
+大型合作论文模式
+
+Nature Physics / PRL 的论文可能有成百上千个作者，整篇塞进一个提示会超出上下文。
+解析后的 Paper 仍保存全部作者（单位只存下标，地址字符串共享），这里把作者逐个聚合成
+LLM 的输入：只保留第一作者、通讯作者和最后作者的完整信息，其余作者只累加到
+"单位 -> 作者人数"的计数中，提示长度因此不随作者数增长。
+LLM 步骤改为 map-reduce：
+  map    单位表按token预算分块，每块让模型归并到大学/科研院所一级并翻译成中文；
+  reduce 合并各块结果，连同论文信息和关键作者一起生成最终的新闻稿和信息提取。
+
+用法：
+    if is_large_paper(paper):
+        response = summarize_large_paper(paper, chat, system_prompt)   # chat(system, user) -> str
+"""
+import json
+import os
+import re
+from collections import Counter
+
+from llm_tokens import count_tokens
+
+# 作者数达到该值，或单次提示超过预算时走大型合作模式
+LARGE_AUTHOR_THRESHOLD = int(os.getenv("LARGE_AUTHOR_THRESHOLD", "100"))
+# 每个请求的输入token预算（不含系统提示）；main.py 的 --token-budget 会改写它，
+# 所以下面的函数用 token_budget=None 表示在调用时读取，而不是把定义时的值绑定为默认参数
+DEFAULT_TOKEN_BUDGET = int(os.getenv("LLM_TOKEN_BUDGET", "6000"))
+# 最终提示中最多列出的机构数，其余按"等N家机构"计
+MAX_REDUCE_INSTITUTIONS = 80
+
+MAP_PROMPT = """
+你是科研论文信息整理助手。下面每行是一个作者单位，格式为"编号. [作者人数] 单位地址"。
+请把每个单位归并到大学或科研院所一级（不需要学院、系或实验室），并翻译成中文。
+每个归并后的机构输出一行，格式为：机构中文名｜所属国家中文名｜作者人数（同一机构的人数相加）。
+只输出这些行，不要输出其他内容。
+"""
+
+_MAP_LINE_RE = re.compile(r'^\s*(?:[-*\d.、]+\s*)?(.+?)\s*[｜|]\s*(.+?)\s*[｜|]\s*(\d+)\s*$')
+
+
+class AuthorAggregate:
+    """
+    作者聚合：聚合结果的大小只和不同单位数、关键作者数成正比，与作者总数无关
+    （作者本身仍在 Paper 中）
+
+    单位按 Paper 单位表中的下标计数，不复制地址字符串
+    """
+    __slots__ = ("author_count", "key_authors", "affiliation_counts", "_last_author", "max_key_authors")
+
+    def __init__(self, max_key_authors: int = 20):
+        self.author_count = 0
+        self.key_authors = []
+        self.affiliation_counts = Counter()
+        self._last_author = None
+        self.max_key_authors = max_key_authors
+
+    def add(self, author):
+        """累加一个 paper_model.Author"""
+        self.author_count += 1
+        self.affiliation_counts.update(author.affiliations)
+        is_key = self.author_count == 1 or author.is_corresponding or "*" in author.marks
+        if is_key and len(self.key_authors) < self.max_key_authors:
+            self.key_authors.append(author)
+            self._last_author = None
+        else:
+            self._last_author = author
+
+    @property
+    def last_author(self):
+        return self._last_author
+
+    @classmethod
+    def from_authors(cls, authors, **kwargs):
+        aggregate = cls(**kwargs)
+        for author in authors:
+            aggregate.add(author)
+        return aggregate
+
+
+def is_large_paper(paper, system_tokens: int = 0, token_budget: int = None) -> bool:
+    if len(paper.authors) >= LARGE_AUTHOR_THRESHOLD:
+        return True
+    return system_tokens + count_tokens(paper.to_llm_json()) > (token_budget or DEFAULT_TOKEN_BUDGET)
+
+
+def chunk_lines(lines, token_budget: int, overhead: int = 0):
+    """把行按token预算分块，单行超过预算时单独成块"""
+    chunk, used = [], overhead
+    for line in lines:
+        tokens = count_tokens(line) + 1
+        if chunk and used + tokens > token_budget:
+            yield chunk
+            chunk, used = [], overhead
+        chunk.append(line)
+        used += tokens
+    if chunk:
+        yield chunk
+
+
+def parse_map_output(text: str) -> Counter:
+    """解析 map 步骤的输出：{(机构, 国家): 作者人数}"""
+    merged = Counter()
+    for line in text.splitlines():
+        match = _MAP_LINE_RE.match(line)
+        if match:
+            merged[(match.group(1), match.group(2))] += int(match.group(3))
+    return merged
+
+
+def map_affiliations(paper, aggregate: AuthorAggregate, chat, token_budget: int = None) -> Counter:
+    """
+    map 步骤：单位表分块交给模型归并、翻译
+
+    模型输出无法解析的块按原始单位保留（机构名用 extract_institution_only 的结果）
+    """
+    lines = [
+        f"{index + 1}. [{count}] {paper.affiliations[index].address}"
+        for index, count in sorted(aggregate.affiliation_counts.items(), key=lambda item: -item[1])
+    ]
+    merged = Counter()
+    overhead = count_tokens(MAP_PROMPT)
+    for chunk in chunk_lines(lines, token_budget or DEFAULT_TOKEN_BUDGET, overhead):
+        result = parse_map_output(chat(MAP_PROMPT, "\n".join(chunk)))
+        if not result:
+            for line in chunk:
+                index = int(line.split(".", 1)[0]) - 1
+                affiliation = paper.affiliations[index].resolve()
+                merged[(affiliation.institution, affiliation.country or "")] += aggregate.affiliation_counts[index]
+            continue
+        merged.update(result)
+    return merged
+
+
+def build_reduce_content(paper, aggregate: AuthorAggregate, institutions: Counter,
+                         token_budget: int = None) -> str:
+    """reduce 步骤的用户内容：论文信息 + 关键作者 + 归并后的机构与人数，超出预算时截断机构列表"""
+    token_budget = token_budget or DEFAULT_TOKEN_BUDGET
+    key_authors = list(aggregate.key_authors)
+    if aggregate.last_author is not None:
+        key_authors.append(aggregate.last_author)
+
+    def author_item(author):
+        item = {"name": author.name, "affiliations": paper.author_affiliations(author)}
+        if author.role:
+            item["role"] = author.role
+        if author.is_corresponding:
+            item["is_corresponding"] = True
+        if author.marks:
+            item["marks"] = list(author.marks)
+        return item
+
+    ranked = institutions.most_common()
+    limit = min(len(ranked), MAX_REDUCE_INSTITUTIONS)
+    while True:
+        data = {
+            "title": paper.title,
+            "journal_name": paper.journal_name,
+            "url": paper.url,
+            "publication_date": paper.publication_date,
+            "author_count": aggregate.author_count,
+            "key_authors": [author_item(author) for author in key_authors],
+            "author_notes": paper.notes,
+            "institutions": [{"name": name, "country": country, "authors": count}
+                             for (name, country), count in ranked[:limit]],
+            "other_institution_count": len(ranked) - limit,
+            "countries": sorted({country for (_, country) in institutions if country}),
+            "abstract": paper.abstract,
+            "contributions": paper.contributions,
+        }
+        content = json.dumps({k: v for k, v in data.items() if v}, ensure_ascii=False, separators=(",", ":"))
+        if limit <= 10 or count_tokens(content) <= token_budget:
+            return content
+        limit //= 2
+
+
+def summarize_large_paper(paper, chat, system_prompt: str, token_budget: int = None):
+    """
+    map-reduce 总结
+
+    Args:
+        chat: chat(system, user) -> 模型回复文本
+        system_prompt: reduce 步骤使用的系统提示（即单篇论文的提示）
+
+    Returns:
+        reduce 步骤的模型回复文本
+    """
+    aggregate = AuthorAggregate.from_authors(paper.authors)
+    institutions = map_affiliations(paper, aggregate, chat, token_budget)
+    content = build_reduce_content(paper, aggregate, institutions, token_budget)
+    print(f"Large collaboration: {aggregate.author_count} authors, "
+          f"{len(aggregate.affiliation_counts)} affiliations -> {len(institutions)} institutions")
+    note = ("\n大型合作论文：输入中的 key_authors 为第一作者、通讯作者和最后作者，"
+            "institutions 为已归并并翻译的全部作者单位及作者人数，author_count 为作者总数。")
+    return chat(system_prompt + note, content)
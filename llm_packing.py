@@ -0,0 +1,159 @@
+"""
+多篇论文打包成一个LLM请求
+
+每篇论文单独请求时，带长示例的 system_prompt 占了输入token的大头。
+打包模式把K篇论文放进一个请求，每篇用 "=== 论文 N ===" 分隔，
+要求模型按同样的分隔符逐篇输出，再拆回每篇的结果：
+- 某几篇的输出无法解析时，只把这几篇拆成更小的包重试，最后退化为单篇请求
+- 包的大小自适应：整包成功时逐步增大，出现失败时减半；同时受输入/输出token预算约束
+
+用法：
+    results = process_packed({key: content}, chat, system_prompt, parse=extract_paper_info)
+"""
+import re
+
+from llm_tokens import count_tokens
+
+DEFAULT_PACK_SIZE = 4
+MAX_PACK_SIZE = 12
+# 单个请求的输入预算（含系统提示）和输出预算；每篇论文的输出约600~900个token
+PACK_INPUT_BUDGET = 24000
+PACK_OUTPUT_BUDGET = 8000
+OUTPUT_TOKENS_PER_PAPER = 900
+
+PACK_INSTRUCTIONS = """
+
+批量模式：输入中包含多篇论文，每篇以单独一行的 "=== 论文 N ===" 开头（N为编号）。
+请对每篇论文分别完成上述两个任务，按输入顺序输出；每篇的输出以同样的 "=== 论文 N ===" 单独一行开头，
+其后严格按照上面规定的格式输出"新闻风格介绍：...论文信息提取：..."，不同论文之间不要互相引用。
+"""
+
+# 只写新闻稿的打包请求（main.news_prompt，信息提取字段由译名表在本地生成）
+NEWS_PACK_INSTRUCTIONS = """
+
+批量模式：输入中包含多篇论文，每篇以单独一行的 "=== 论文 N ===" 开头（N为编号）。
+请对每篇论文分别按上面的要求输出，按输入顺序；每篇的输出以同样的 "=== 论文 N ===" 单独一行开头，
+其后严格按照上面规定的格式输出"新闻风格介绍：..."（该篇有 "translate" 时其后是"译名："和编号译名），
+编号只对应该篇自己的 "translate"，不同论文之间不要互相引用。
+"""
+
+_SECTION_RE = re.compile(r'^\s*=+\s*论文\s*(\d+)\s*=+\s*$', re.MULTILINE)
+
+
+def section_header(number: int) -> str:
+    return f"=== 论文 {number} ==="
+
+
+def build_pack(contents) -> str:
+    """contents 为各篇论文的用户内容，按顺序编号（从1开始）"""
+    return "\n".join(f"{section_header(i + 1)}\n{content}" for i, content in enumerate(contents))
+
+
+def split_response(text: str, count: int) -> dict:
+    """把打包请求的回复拆成 {编号: 该篇的输出}，缺失的编号不出现在结果中"""
+    sections = {}
+    matches = list(_SECTION_RE.finditer(text))
+    for i, match in enumerate(matches):
+        number = int(match.group(1))
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        if 1 <= number <= count and number not in sections:
+            sections[number] = text[match.end():end].strip()
+    return sections
+
+
+def is_complete(record: dict) -> bool:
+    """解析结果是否可用：新闻稿和信息提取的字段都找到了"""
+    return bool(record) and all(value != "N/A" for value in record.values())
+
+
+class PackSizer:
+    """自适应包大小：整包成功 +1，出现失败减半"""
+
+    def __init__(self, size: int = DEFAULT_PACK_SIZE, max_size: int = MAX_PACK_SIZE,
+                 input_budget: int = PACK_INPUT_BUDGET, output_budget: int = PACK_OUTPUT_BUDGET,
+                 output_tokens_per_paper: int = OUTPUT_TOKENS_PER_PAPER):
+        self.max_size = max(1, min(max_size, output_budget // output_tokens_per_paper))
+        self.size = max(1, min(size, self.max_size))
+        self.input_budget = input_budget
+
+    def success(self):
+        self.size = min(self.max_size, self.size + 1)
+
+    def failure(self):
+        self.size = max(1, self.size // 2)
+
+    def take(self, pending: list, tokens: dict, system_tokens: int) -> list:
+        """从 pending 头部取一包：不超过当前包大小，总输入不超过预算（至少一篇）"""
+        pack, used = [], system_tokens
+        for key in pending:
+            if len(pack) >= self.size:
+                break
+            if pack and used + tokens[key] > self.input_budget:
+                break
+            pack.append(key)
+            used += tokens[key]
+        return pack
+
+
+def _run_pack(keys, contents, chat, system_prompt, parse, instructions=PACK_INSTRUCTIONS):
+    """
+    发送一个包，返回 {key: 解析结果}：多篇的包只含解析完整的论文（其余拆小重试）；
+    单篇请求与非打包模式一致，部分字段为 N/A 的结果也原样返回
+    """
+    if len(keys) == 1:
+        return {keys[0]: parse(chat(system_prompt, contents[keys[0]]))}
+    response = chat(system_prompt + instructions, build_pack(contents[key] for key in keys))
+    sections = split_response(response, len(keys))
+    results = {}
+    for number, key in enumerate(keys, 1):
+        if number in sections:
+            record = parse(sections[number])
+            if is_complete(record):
+                results[key] = record
+    return results
+
+
+def process_packed(contents: dict, chat, system_prompt: str, parse, sizer: PackSizer = None,
+                   instructions: str = PACK_INSTRUCTIONS) -> dict:
+    """
+    打包处理多篇论文
+
+    Args:
+        contents: {key: 该篇论文的用户内容}，按处理顺序排列
+        chat: chat(system, user) -> 模型回复文本
+        parse: 把单篇输出解析成dict的函数（extract_paper_info）
+        sizer: 包大小策略，默认 PackSizer()
+        instructions: 接在 system_prompt 后的批量模式说明，与 system_prompt 规定的输出格式对应
+
+    Returns:
+        {key: 解析结果}；退化到单篇请求时与非打包模式相同（可能含 N/A 字段），请求出错时为None
+    """
+    sizer = sizer or PackSizer()
+    system_tokens = count_tokens(system_prompt + instructions)
+    tokens = {key: count_tokens(content) + 8 for key, content in contents.items()}
+    results = {}
+    pending = list(contents)
+    while pending:
+        pack = sizer.take(pending, tokens, system_tokens)
+        pending = pending[len(pack):]
+        try:
+            done = _run_pack(pack, contents, chat, system_prompt, parse, instructions)
+        except Exception as e:
+            print(f"Packed request for {len(pack)} papers failed: {e}")
+            done = {}
+        results.update(done)
+        failed = [key for key in pack if key not in done]
+        if len(pack) == 1 and not failed and not is_complete(done[pack[0]]):
+            sizer.failure()
+            continue
+        if not failed:
+            sizer.success()
+            continue
+        sizer.failure()
+        if len(pack) == 1:
+            results[pack[0]] = None
+            continue
+        print(f"{len(failed)} of {len(pack)} packed papers could not be parsed, retrying them in smaller packs")
+        # 失败的论文放回队首，按缩小后的包大小重试，直到退化为单篇请求
+        pending = failed + pending
+    return results
@@ -0,0 +1,42 @@
+"""
+提示token计数
+
+安装了 tiktoken 时用 cl100k_base 编码精确计数；否则按经验规则估算：
+每个中日韩字符约1个token，其余按单词/数字/标点切分后每段约1个token，长单词按4个字符1个token。
+估算值只用于比较和预算控制，与DeepSeek实际计费会有少量偏差。
+"""
+import re
+
+_SEGMENT_RE = re.compile(r'[　-鿿＀-￯]|[A-Za-z]+|\d+|\S')
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    count = 0
+    for segment in _SEGMENT_RE.findall(text):
+        count += (len(segment) + 3) // 4 if segment.isascii() and segment.isalpha() else 1
+    return count
+
+
+def count_message_tokens(messages) -> int:
+    """chat.completions 消息列表的token数（每条消息另加约4个token的格式开销）"""
+    return sum(count_tokens(message["content"]) + 4 for message in messages)
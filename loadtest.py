@@ -0,0 +1,172 @@
+"""
+离线端到端压测
+
+在本进程的后台线程中启动 journal_standin 替身，把期刊抓取和LLM请求都指向它，
+再用合成的论文链接并发驱动 main.py 的 fetch_paper + summarize_paper（或 --pack 时的 main_batch），
+统计吞吐、抓取/LLM/整体延迟分位数、失败原因和替身侧的故障/重试计数。
+
+用法：
+    python loadtest.py --papers 300 --concurrency 16
+    python loadtest.py --papers 300 --journals nature --latency lognormal:400,0.7 --rate-429 0.05
+    python loadtest.py --papers 200 --journals science --llm-latency uniform:800,3000 --llm-rate-429 0.1
+    python loadtest.py --papers 200 --pack 4 --json loadtest.json
+    python loadtest.py --papers 300 --latency lognormal:200,1.0 --deadline 20 --compare-hedging
+"""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import hedging
+from deadline import deadline_scope
+from journal_standin import DEFAULT_LLM_HOST, STANDIN_ENV, add_standin_arguments, standin_from_args, start_in_thread
+
+JOURNALS = ("nature", "science", "aps")
+
+
+def synthetic_urls(count: int, journals) -> list:
+    """按期刊轮流生成互不相同的论文链接（DOI也不同，不会被批内去重合并）"""
+    templates = {
+        "nature": "https://www.nature.com/articles/s41567-025-{:05d}-x",
+        "science": "https://www.science.org/doi/10.1126/sciadv.lt{:06d}",
+        "aps": "https://journals.aps.org/prl/abstract/10.1103/lt{:06d}",
+    }
+    return [templates[journals[i % len(journals)]].format(i) for i in range(count)]
+
+
+def percentiles(values, points=(50, 90, 99)) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {f"p{p}": round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 3) for p in points}
+    result["max"] = round(ordered[-1], 3)
+    result["mean"] = round(sum(ordered) / len(ordered), 3)
+    return result
+
+
+def _run_one(pipeline, url: str, deadline: float = None) -> dict:
+    record = {"url": url}
+    started = time.perf_counter()
+    try:
+        with deadline_scope(deadline):
+            paper = pipeline.fetch_paper(url)
+            fetched = time.perf_counter()
+            record["fetch_s"] = fetched - started
+            record["degraded"] = not paper.authors and not paper.extra.get("content")
+            llm = pipeline.summarize_paper(paper)
+        record["llm_s"] = time.perf_counter() - fetched
+        record["ok"] = llm is not None
+        if llm is None:
+            record["error"] = "LLM result missing"
+    except Exception as e:
+        record["ok"] = False
+        record["error"] = type(e).__name__
+    record["total_s"] = time.perf_counter() - started
+    return record
+
+
+def run_load(pipeline, urls, concurrency: int = 16, pack: int = 1, deadline: float = None) -> dict:
+    started = time.perf_counter()
+    if pack > 1:
+        results = pipeline.main_batch(urls, pack_size=pack, deadline=deadline)
+        records = [{"url": url, "ok": result is not None} for url, result in zip(urls, results)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            records = list(executor.map(lambda url: _run_one(pipeline, url, deadline), urls))
+    elapsed = time.perf_counter() - started
+
+    ok = sum(1 for record in records if record["ok"])
+    return {
+        "papers": len(urls),
+        "ok": ok,
+        "failed": len(urls) - ok,
+        "degraded": sum(1 for record in records if record.get("degraded")),
+        "errors": dict(Counter(record["error"] for record in records if record.get("error"))),
+        "wall_s": round(elapsed, 2),
+        "papers_per_minute": round(len(urls) / elapsed * 60, 1) if elapsed else None,
+        "latency_s": {
+            stage: percentiles([record[key] for record in records if key in record])
+            for stage, key in (("fetch", "fetch_s"), ("llm", "llm_s"), ("total", "total_s"))
+        },
+    }
+
+
+def _improvement(before, after):
+    if not before or after is None:
+        return None
+    return {"before_s": before, "after_s": after, "change": f"{(after - before) / before:+.1%}"}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drive the pipeline against the local journal stand-in")
+    add_standin_arguments(parser)
+    parser.add_argument("--papers", type=int, default=100)
+    parser.add_argument("--journals", default="nature,science", help="comma-separated: nature,science,aps")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pack", type=int, default=1, help="use main_batch with K papers per LLM request")
+    parser.add_argument("--deadline", type=float, help="end-to-end time limit per paper in seconds")
+    parser.add_argument("--hedge", default="", metavar="fetch,llm", help="enable hedged requests")
+    parser.add_argument("--compare-hedging", action="store_true",
+                        help="run once without and once with hedging (--hedge, default fetch,llm) and compare p99")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's own output")
+    args = parser.parse_args()
+
+    journals = [journal.strip() for journal in args.journals.split(",") if journal.strip()]
+    unknown = set(journals) - set(JOURNALS)
+    if unknown:
+        parser.error(f"unknown journals: {', '.join(sorted(unknown))}")
+
+    standin = standin_from_args(args)
+    server, base_url = start_in_thread(standin)
+    # main 在导入时创建LLM客户端，必须先设置好环境变量；
+    # 选择器统计和译名表写到临时目录，合成数据不能混进 data/ 下的真实文件
+    data_dir = tempfile.mkdtemp(prefix="loadtest-")
+    os.environ["SELECTOR_STATS_PATH"] = os.path.join(data_dir, "selector_stats.json")
+    os.environ["TRANSLATION_MEMORY_PATH"] = os.path.join(data_dir, "translation_memory.json")
+    os.environ[STANDIN_ENV] = base_url
+    os.environ["DEEPSEEK_BASE_URL"] = f"{base_url}/{DEFAULT_LLM_HOST}"
+    os.environ.setdefault("DEEPSEEK_API_KEY", "standin")
+    import main as pipeline
+
+    urls = synthetic_urls(args.papers, journals)
+    print(f"Running {len(urls)} papers against {base_url} (concurrency {args.concurrency}, pack {args.pack})")
+
+    def run(hedge_spec):
+        hedging.configure(hedge_spec)
+        standin.reset_stats()
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            report = run_load(pipeline, urls, args.concurrency, args.pack, args.deadline)
+        report["standin"] = standin.stats()
+        report["hedging"] = hedging.stats()
+        return report
+
+    try:
+        if args.compare_hedging:
+            # 基线先跑：各类请求的延迟分布同时被记录下来，对冲轮直接用它的 p95
+            baseline = run("")
+            hedged = run(args.hedge or "fetch,llm")
+            report = {"baseline": baseline, "hedged": hedged, "p99_improvement": {
+                stage: _improvement(baseline["latency_s"][stage].get("p99"), hedged["latency_s"][stage].get("p99"))
+                for stage in ("fetch", "llm", "total")
+            }}
+        else:
+            report = run(args.hedge)
+    finally:
+        server.shutdown()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
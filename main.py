@@ -8,9 +8,19 @@ import pandas as pd
 import os
 import re
 from aps_craw import crawl_aps
+from paper_identity import canonicalize, dedupe_urls
+from paper_model import Paper
+import large_collab
+import llm_packing
+from single_flight import LLM, coalesce, url_key
+from paper_store import DEFAULT_DB_PATH, PaperStore
+from field_projection import needs_llm, parse_fields, project
+import hedging
+import profiling
+from deadline import DEFAULT_PAPER_DEADLINE, deadline_scope, timeout_for
 
 api_key = os.getenv("DEEPSEEK_API_KEY", "sk-9d3e8463fbf34fb4ab915bef2baa9ba3")
-client = OpenAI(api_key=api_key, base_url="https://api.deepseek.com")
+client = OpenAI(api_key=api_key, base_url=os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com"))
 
 system_prompt = """
 你是一个科研论文信息整理助手，你现在需要完成下面两个任务；
@@ -29,6 +39,7 @@ system_prompt = """
 5. 如果为英文，请将单位/国家翻译成中文
 6. 当未表示标识通讯作者时，则第一作者为通讯作者
 注意：作者单位单位只列到大学或者科研院所，不需要学院、系或实验室。
+输入JSON可能是紧凑格式："affiliations" 为编号到单位的对照表，每个作者的 "aff" 为其单位编号列表。
 
 输出的格式为：新闻风格介绍：xxx；论文信息提取：第一作者/共同作者单位/通讯作者单位：xxx，其他作者单位：xxx，所有作者单位所属国家：xxx，论文url链接：xxx，论文名：xxx
 
@@ -94,6 +105,26 @@ system_prompt = """
 论文信息提取：第一作者/共同作者单位/通讯作者单位：洛桑联邦理工学院*，其他作者单位：洛桑联邦理工学院，所有作者单位所属国家：瑞士，论文url链接：https://www.nature.com/articles/s41567-025-02944-3，论文名：Predicting topological entanglement entropy in a Rydberg analogue simulator
 """
 
+# 译名记忆命中时使用：信息提取的字段在本地生成，LLM只写新闻稿
+news_prompt = """
+你是一个科研论文信息整理助手，根据以下论文 JSON 信息，生成一段中文新闻风格的介绍；
+要求：
+1. 开头写明：发表日期、主要研究单位、期刊名称、论文标题（保持英文原题，括号内加中文翻译）。  
+2. 中间插入论文摘要（直接引用，但需将“我们”统一改为“研究者们”）。  
+3. 结尾描述：第一作者和通讯作者及其所属大学（单位只列到大学或者科研院所，不需要学院、系和实验室; 如果作者单位为多个，则均列出），国家信息，以及作者贡献（来自 JSON 的 "contributions" 字段）。  
+输入JSON为紧凑格式："affiliations" 为编号到单位的对照表，每个作者的 "aff" 为其单位编号列表；
+"zh" 为单位和国家的中文译名，提到单位和国家时直接使用这些译名。
+"translate"（可能没有）为还没有译名的单位和国家，格式为 "编号. [机构或国家] 英文名"：
+[机构] 只翻译到它所属的大学或科研院所一级的通用正式中文名称（如 Stanford University → 斯坦福大学），
+不要输出学院、系、实验室或地名；国家使用简短的通用中文名称（如 USA → 美国）；新闻稿中也使用这些译名。
+
+输出的格式为：新闻风格介绍：xxx
+有 "translate" 时，在新闻稿之后单独一行输出"译名："，其后每行一条，格式为：编号. 中文译名；无法确定时输出：编号. 无
+"""
+
+# 为False时（--no-translation-memory 或 TRANSLATION_MEMORY=0）单位和国家仍由 system_prompt 的任务2翻译
+USE_TRANSLATION_MEMORY = os.getenv("TRANSLATION_MEMORY", "1") != "0"
+
 def extract_paper_info(response_text):
     """Extract structured data from LLM response using regex patterns."""
     patterns = {
@@ -112,81 +143,454 @@ def extract_paper_info(response_text):
     
     return extracted
 
-def process_paper(paper_data):
-    """Process a single paper and return structured data."""
-    try:
-        # paper_data = cne.parse_nature_authors(url)
-        print(f"Paper data: {json.dumps(paper_data, indent=2)}")
-        
-        content = json.dumps(paper_data, indent=4)
-        
-        response = client.chat.completions.create(
+def _chat(system, content, max_tokens=None):
+    options = {"max_tokens": max_tokens} if max_tokens else {}
+    # 有截止时间时把请求超时裁到剩余时间之内（否则用客户端默认超时）
+    timeout = timeout_for(None, "LLM request")
+    if timeout is not None:
+        options["timeout"] = timeout
+    with profiling.span("llm.chat", chars=len(content)):
+        response = hedging.hedged(
+            hedging.LLM_HEDGE,
+            client.chat.completions.create,
             model="deepseek-chat",
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": system},
                 {"role": "user", "content": content},
             ],
-            stream=False
+            stream=False,
+            **options
         )
-        
-        response_text = response.choices[0].message.content
-        print(f"LLM Response: {response_text}")
-        
-        return extract_paper_info(response_text)
-        
+
+    response_text = response.choices[0].message.content
+    print(f"LLM Response: {response_text}")
+    return response_text
+
+def _ask_llm(content):
+    return extract_paper_info(_chat(system_prompt, content))
+
+def extract_news(response_text):
+    """news_prompt 的回复：{"新闻风格介绍": ..., "译名": 附带的 "编号. 译名" 行（没有时为空字符串）}"""
+    news, _, glossary = response_text.partition("译名：")
+    match = re.search(r"新闻风格介绍：(.*?)(?:论文信息提取：|$)", news, re.DOTALL)
+    news = (match.group(1) if match else news).strip()
+    return {"新闻风格介绍": news or "N/A", "译名": glossary}
+
+def _news_request(memory, paper):
+    """译名表可用时返回 (新闻稿请求的输入, 待翻译的名称)，否则None"""
+    request = memory.news_input(paper)
+    if request is None:
+        return None
+    extra, untranslated = request
+    data = paper.to_llm_dict()
+    data.update(extra)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")), untranslated
+
+def _with_prefill(memory, paper, untranslated, news):
+    """记下新闻稿回复中的译名，再在本地生成信息提取字段；仍有单位或国家没有译名时返回None"""
+    memory.apply_answers(untranslated, news["译名"])
+    prefilled = memory.prefill(paper)
+    if prefilled is None:
+        return None
+    return {"新闻风格介绍": news["新闻风格介绍"], **prefilled}
+
+def _summarize_with_memory(paper):
+    """
+    单位和国家能用译名表处理时：只请求新闻稿（还没有译名的名称随同一个请求翻译），信息提取字段在本地生成；
+    否则（或回复中的译名没有通过校验）返回None，走完整的 system_prompt
+    """
+    from translation_memory import get_translation_memory
+
+    memory = get_translation_memory()
+    request = _news_request(memory, paper)
+    if request is None:
+        return None
+    content, untranslated = request
+    print(f"Paper data: {content}")
+    return _with_prefill(memory, paper, untranslated, extract_news(_chat(news_prompt, content)))
+
+def _learn_translations(paper, extracted_data):
+    """从通过校验的完整LLM输出中学习单位和国家的译名"""
+    if USE_TRANSLATION_MEMORY and extracted_data and llm_packing.is_complete(extracted_data):
+        from translation_memory import get_translation_memory
+        get_translation_memory().learn(paper, extracted_data)
+
+def _llm_key(paper_data, *args, **kwargs):
+    url = paper_data.url if isinstance(paper_data, Paper) else paper_data.get("url")
+    return url_key(url, *args, **kwargs) if url else id(paper_data)
+
+@coalesce(LLM, key=_llm_key)
+def process_paper(paper_data, token_budget=None):
+    """Process a single paper and return structured data."""
+    paper = paper_data if isinstance(paper_data, Paper) else Paper.from_dict(paper_data)
+    token_budget = token_budget or large_collab.DEFAULT_TOKEN_BUDGET
+    try:
+        if large_collab.is_large_paper(paper, token_budget=token_budget):
+            # 作者太多：单位表分块归并后再生成总结，每个请求都在预算之内
+            return extract_paper_info(large_collab.summarize_large_paper(paper, _chat, system_prompt, token_budget))
+
+        if USE_TRANSLATION_MEMORY:
+            extracted_data = _summarize_with_memory(paper)
+            if extracted_data is not None:
+                return extracted_data
+
+        # 提取结果只在这里序列化一次：紧凑JSON，单位表只出现一次
+        content = paper.to_llm_json()
+        print(f"Paper data: {content}")
+
+        extracted_data = _ask_llm(content)
+        _learn_translations(paper, extracted_data)
+        return extracted_data
+
     except Exception as e:
-        print(f"Error processing {url}: {e}")
+        print(f"Error processing {paper.url}: {e}")
         return None
 
 def process_aps_paper(paper_data):
     """Process a single paper and return structured data."""
     try:
-        # paper_data is already a dictionary from crawl_aps()
-        content = paper_data["content"]
+        # crawl_aps() 的结果中保留了清洗后的markdown原文
+        content = paper_data.extra["content"]
         print(f"Paper data: {content}")
-        
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": content},
-            ],
-            stream=False
-        )
-        
-        response_text = response.choices[0].message.content
-        print(f"LLM Response: {response_text}")
-        
-        return extract_paper_info(response_text)
-        
+
+        return _ask_llm(content)
+
     except Exception as e:
-        print(f"Error processing {url}: {e}")
+        print(f"Error processing {paper_data.url}: {e}")
         return None
 
-def main(url):
-    if "nature" in url:
-        paper_data = ne.parse_nature_authors(url)
-        extracted_data = process_paper(paper_data)
-    elif "science" in url:
-        paper_data = se.parse_science_authors(url)
-        extracted_data = process_paper(paper_data)
-    elif "aps" in url:
-        paper_data = crawl_aps(url)
-        print(f"Paper data: {paper_data}")
-        extracted_data = process_aps_paper(paper_data)
-    else:
-        print("Invalid URL")
-        exit()
+def fetch_paper(url, fields=None):
+    """
+    抓取并解析一篇论文，返回 Paper；APS未能结构化解析时 paper.extra["content"] 为清洗后的markdown
+
+    fields 只影响 Nature/Science 的解析范围；APS 整页由浏览器渲染，总是完整提取
+    """
+    paper = canonicalize(url)
+    if paper.journal == "nature":
+        return ne.parse_nature_authors(paper.url, fields=fields)
+    if paper.journal == "science":
+        return se.parse_science_authors(paper.url, fields=fields)
+    if paper.journal == "aps":
+        paper_data = crawl_aps(paper.url)
+        if paper_data.authors:
+            # 已解析为结构化信息，走与Nature相同的精简提示
+            paper_data.extra.pop("content", None)
+        return paper_data
+    raise ValueError(f"Unsupported journal URL: {url}")
+
+def summarize_paper(paper_data):
+    """对一篇已解析的论文调用LLM"""
+    if paper_data.extra.get("content"):
+        return process_aps_paper(paper_data)
+    return process_paper(paper_data)
+
+def _save(store, paper_data, extracted_data, input_urls):
+    if store is not None and extracted_data is not None:
+        paper_data.extra.pop("content", None)
+        with profiling.span("store.save"):
+            store.save_paper(paper_data, extracted_data, input_urls=input_urls)
+
+def _projected(paper_data, extracted_data, fields):
+    """指定 fields 时的输出：投影后的论文字段，需要 summary 时并入LLM结果"""
+    record = project(paper_data, fields)
+    if needs_llm(fields):
+        record.update(extracted_data or {})
+    return record
+
+def main(url, store=None, fields=None, deadline=DEFAULT_PAPER_DEADLINE):
+    """
+    fields 为None时返回LLM结果；否则返回 fields 的投影（不需要 summary 时不调用LLM）。
+    deadline 为这篇论文从抓取到LLM的总时限（秒），超时抛出 DeadlineExceeded
+    """
+    with profiling.trace(url):
+        with deadline_scope(deadline):
+            paper_data = fetch_paper(url, fields=None if needs_llm(fields) else fields)
+            if not needs_llm(fields):
+                return project(paper_data, fields)
+            extracted_data = summarize_paper(paper_data)
+        _save(store, paper_data, extracted_data, [url])
+    return extracted_data if fields is None else _projected(paper_data, extracted_data, fields)
+
+def summarize_packed(fetched, pack_size):
+    """
+    把可以打包的论文（结构化、非大型合作）按包发送，其余逐篇处理；
+    译名表可用的论文打包请求新闻稿（信息提取字段在本地生成），其余打包使用完整的 system_prompt
+
+    Returns:
+        {key: LLM结果}
+    """
+    contents = {}
+    news = {}
+    untranslated = {}
+    results = {}
+    memory = None
+    if USE_TRANSLATION_MEMORY:
+        from translation_memory import get_translation_memory
+        memory = get_translation_memory()
+    for key, paper_data in fetched.items():
+        if paper_data.extra.get("content") or large_collab.is_large_paper(paper_data):
+            results[key] = summarize_paper(paper_data)
+            continue
+        request = _news_request(memory, paper_data) if memory is not None else None
+        if request is None:
+            contents[key] = paper_data.to_llm_json()
+        else:
+            news[key], untranslated[key] = request
+    # 多篇论文的输出会超过默认的输出长度上限
+    chat = lambda system, content: _chat(system, content, max_tokens=llm_packing.PACK_OUTPUT_BUDGET)
+    if news:
+        sizer = llm_packing.PackSizer(size=pack_size)
+        replies = llm_packing.process_packed(news, chat, news_prompt, extract_news, sizer,
+                                             instructions=llm_packing.NEWS_PACK_INSTRUCTIONS)
+        for key in news:
+            reply = replies.get(key)
+            record = None
+            if reply and llm_packing.is_complete(reply):
+                record = _with_prefill(memory, fetched[key], untranslated[key], reply)
+            if record is None:
+                # 没有新闻稿，或回复中的译名没有通过校验：和其余论文一起走完整提示
+                contents[key] = fetched[key].to_llm_json()
+            else:
+                results[key] = record
+    if contents:
+        sizer = llm_packing.PackSizer(size=pack_size)
+        results.update(llm_packing.process_packed(contents, chat, system_prompt, extract_paper_info, sizer))
+        for key in contents:
+            _learn_translations(fetched[key], results.get(key))
+    return results
+
+def main_batch(urls, store=None, pack_size=1, fields=None, deadline=DEFAULT_PAPER_DEADLINE):
+    """
+    批量处理：按DOI去重后每篇论文只处理一次，结果按输入顺序分发回每个原始URL；
+    提供 store 时，已保存过LLM结果的论文直接从库中读取，不再重新抓取。
+    pack_size > 1 时先抓取全部论文，再把多篇论文打包进同一个LLM请求。
+    fields 见 main()；不需要 summary 时库中已有的论文（不论有无LLM结果）直接投影。
+    deadline 为每篇论文的时限；超时或出错的论文结果为None，不影响其他论文（打包模式下只约束抓取）
+    """
+    papers, groups = dedupe_urls(urls)
+    if len(papers) < len(urls):
+        print(f"Deduplicated {len(urls)} URLs into {len(papers)} papers")
+
+    results = {}
+    fetched = {}
+    for key, paper in papers.items():
+        if store is not None:
+            doi = store.lookup_url(paper.url)
+            stored = store.get_paper(doi) if doi else None
+            if stored and (stored["llm"] or not needs_llm(fields)):
+                print(f"Already stored, skipping: {paper.url}")
+                results[key] = stored["llm"] if fields is None else _projected(Paper.from_dict(stored), stored["llm"], fields)
+                continue
+        if pack_size <= 1 or not needs_llm(fields):
+            try:
+                results[key] = main(paper.url, store=store, fields=fields, deadline=deadline)
+            except TimeoutError as e:
+                print(f"Gave up on {paper.url}: {e}")
+                results[key] = None
+            except Exception as e:
+                # 一篇论文失败（抓取错误、不支持的链接……）不影响批内其他论文
+                print(f"Error processing {paper.url}: {e}")
+                results[key] = None
+            continue
+        try:
+            with deadline_scope(deadline), profiling.trace(paper.url):
+                fetched[key] = fetch_paper(paper.url)
+        except Exception as e:
+            print(f"Error fetching {paper.url}: {e}")
+            results[key] = None
+
+    if fetched:
+        summaries = summarize_packed(fetched, pack_size)
+        for key, paper_data in fetched.items():
+            results[key] = summaries.get(key)
+            _save(store, paper_data, results[key], groups[key])
+            if fields is not None:
+                results[key] = _projected(paper_data, results[key], fields)
+
+    key_of = {input_url: key for key, input_urls in groups.items() for input_url in input_urls}
+    return [results[key_of[url]] for url in urls]
+
+# 流水线各阶段的默认并发数
+STAGE_WORKERS = {"fetch": 8, "parse": os.cpu_count() or 1, "llm": 4, "export": 1}
+
+def build_pipeline(db_path=None, fields=None, workers=None, deadline=DEFAULT_PAPER_DEADLINE, progress=None):
+    """
+    把抓取/解析/LLM/保存拆成 pipeline.Pipeline 的四个阶段：
+    fetch（线程，APS固定在一个浏览器线程上）→ parse（进程池）→ llm（线程）→ export（单线程写论文库）
 
-    return extracted_data
+    每个条目的输入为论文链接，输出与 main() 相同（fields 为None时为LLM结果，否则为投影）
+    """
+    import contextvars
+    import functools
+    import sys
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from parse_pool import _init_worker, detect_journal, fetch_page, parse_fetched
+    from pipeline import Pipeline, Stage
+
+    workers = dict(STAGE_WORKERS, **(workers or {}))
+    unknown = set(workers) - set(STAGE_WORKERS)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))} (choose from {', '.join(STAGE_WORKERS)})")
+    # Playwright 同步API只能在创建浏览器的线程中使用
+    browser = ThreadPoolExecutor(max_workers=1, thread_name_prefix="browser")
+    local = threading.local()
+
+    def fetch(url):
+        if detect_journal(url) == "aps":
+            return url, browser.submit(contextvars.copy_context().run, fetch_page, url).result()
+        return url, fetch_page(url)
+
+    def close_browser():
+        if "aps_extractor" in sys.modules:
+            browser.submit(sys.modules["aps_extractor"].cleanup_browser).result()
+
+    def summarize(record):
+        paper_data = Paper.from_dict(record)
+        return paper_data, summarize_paper(paper_data) if needs_llm(fields) else None
+
+    def export(summarized):
+        paper_data, extracted_data = summarized
+        if not needs_llm(fields):
+            return project(paper_data, fields)
+        if db_path is not None:
+            # SQLite连接不能跨线程使用，在export线程中打开
+            store = getattr(local, "store", None)
+            if store is None:
+                store = local.store = PaperStore(db_path)
+            _save(store, paper_data, extracted_data, [paper_data.url])
+        return extracted_data if fields is None else _projected(paper_data, extracted_data, fields)
+
+    stages = [
+        Stage("fetch", fetch, workers["fetch"], close=close_browser),
+        Stage("parse", functools.partial(parse_fetched, fields=None if needs_llm(fields) else fields),
+              workers["parse"], mode="process", initializer=_init_worker),
+        Stage("llm", summarize, workers["llm"]),
+        Stage("export", export, workers["export"]),
+    ]
+    return Pipeline(stages, deadline=deadline, progress=progress)
+
+def main_pipeline(urls, db_path=None, fields=None, workers=None, deadline=DEFAULT_PAPER_DEADLINE, progress=None):
+    """
+    与 main_batch 相同的输入输出，但抓取、解析、LLM和保存在流水线的不同阶段中并发进行；
+    workers 为各阶段的并发数，例如 {"fetch": 16, "llm": 8}（见 STAGE_WORKERS）
+    """
+    papers, groups = dedupe_urls(urls)
+    if len(papers) < len(urls):
+        print(f"Deduplicated {len(urls)} URLs into {len(papers)} papers")
+
+    results = {}
+    todo = []
+    store = PaperStore(db_path) if db_path is not None else None
+    for key, paper in papers.items():
+        if store is not None:
+            doi = store.lookup_url(paper.url)
+            stored = store.get_paper(doi) if doi else None
+            if stored and (stored["llm"] or not needs_llm(fields)):
+                print(f"Already stored, skipping: {paper.url}")
+                results[key] = stored["llm"] if fields is None else _projected(Paper.from_dict(stored), stored["llm"], fields)
+                continue
+        todo.append(key)
+    if store is not None:
+        store.close()
+
+    pipeline = build_pipeline(db_path, fields, workers, deadline, progress)
+    for result in pipeline.run([papers[key].url for key in todo]):
+        if result.error is not None:
+            print(f"Error in {result.stage} stage for {result.input}: {result.error}")
+        results[todo[result.index]] = result.value if result.error is None else None
+    print(pipeline.format_stats())
+
+    key_of = {input_url: key for key, input_urls in groups.items() for input_url in input_urls}
+    return [results[key_of[url]] for url in urls]
 
 # main function
 if __name__ == "__main__":
-    url = "https://journals.aps.org/prresearch/abstract/10.1103/9pbp-jzr9"
-    extracted_data = main(url)
-    print(extracted_data)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract paper information and generate Chinese news summaries")
+    parser.add_argument("urls", nargs="*", default=["https://journals.aps.org/prresearch/abstract/10.1103/9pbp-jzr9"])
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite paper store (default: %(default)s)")
+    parser.add_argument("--no-db", action="store_true", help="do not read from or write to the paper store")
+    parser.add_argument("-o", "--output", default="extracted_data.xlsx", help="Excel output path")
+    parser.add_argument("--pack", type=int, default=1, metavar="K",
+                        help="send up to K papers per LLM request (adapts to the token budget)")
+    parser.add_argument("--token-budget", type=int, default=large_collab.DEFAULT_TOKEN_BUDGET,
+                        help="max input tokens per LLM request; larger papers are summarized map-reduce style")
+    parser.add_argument("--local", action="store_true", help="do not forward to a running extraction service")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_PAPER_DEADLINE, metavar="SECONDS",
+                        help="end-to-end time limit per paper (fetch, browser and LLM); default: $PAPER_DEADLINE or none")
+    parser.add_argument("--hedge", default=None, metavar="fetch,llm",
+                        help="send a second request when one is slower than the recent p95 (default: $HEDGE)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="run fetch, parse, LLM and export as concurrent stages connected by bounded queues")
+    parser.add_argument("--stage-workers", metavar="fetch=8,parse=4,llm=4,export=1",
+                        help="per-stage concurrency for --pipeline")
+    parser.add_argument("--progress", type=float, metavar="SECONDS",
+                        help="with --pipeline, print per-stage queue depth and throughput every SECONDS")
+    parser.add_argument("--profile", nargs="?", const=profiling.DEFAULT_PROFILE_DIR, metavar="DIR",
+                        help="sample the run and write per-paper Chrome traces to DIR (default: %(const)s)")
+    parser.add_argument("--no-translation-memory", action="store_true",
+                        help="let the LLM translate institutions and countries instead of the local translation memory")
+    parser.add_argument("--fields", help="comma-separated fields to extract, e.g. title,corresponding_institutions; "
+                                         "the LLM is only called for 'summary' (default: everything)")
+    args = parser.parse_args()
+    large_collab.DEFAULT_TOKEN_BUDGET = args.token_budget
+    if args.no_translation_memory:
+        USE_TRANSLATION_MEMORY = False
+    try:
+        fields = parse_fields(args.fields)
+        hedging.configure(args.hedge)
+        from pipeline import parse_stage_workers
+        stage_workers = parse_stage_workers(args.stage_workers)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.pipeline and args.pack > 1:
+        parser.error("--pipeline sends one paper per LLM request; it cannot be combined with --pack")
+
+    from service_client import ServiceClient
+
+    # 不能命名为 client：那是模块级的LLM客户端，--local 时 main_batch 还要用它
+    service = ServiceClient()
+    if args.profile:
+        # 剖析只能看到本进程，--profile 时不转发给常驻服务
+        profiling.start()
+    # 这些选项只作用于本进程（常驻服务用它启动时的论文库、LLM和对冲设置），设置了就不转发
+    local_only = [flag for flag, is_set in (
+        ("--db", args.db != parser.get_default("db")),
+        ("--no-db", args.no_db),
+        ("--pipeline", args.pipeline),
+        ("--token-budget", args.token_budget != parser.get_default("token_budget")),
+        ("--hedge", args.hedge is not None),
+        ("--no-translation-memory", args.no_translation_memory),
+        ("--profile", args.profile),
+    ) if is_set]
+    forward = not args.local and service.is_running()
+    if forward and local_only:
+        print(f"Not forwarding to extraction service at {service.address}: "
+              f"{', '.join(local_only)} only apply in-process")
+        forward = False
+    if forward:
+        # 常驻服务已经加载好浏览器、连接池和解析进程，直接转发
+        print(f"Forwarding to extraction service at {service.address}")
+        records = service.batch(args.urls, pack=args.pack, fields=sorted(fields) if fields else None,
+                                deadline=args.deadline)
+        all_extracted = [record.get("llm") if fields is None else record.get("paper") for record in records]
+    elif args.pipeline:
+        all_extracted = main_pipeline(args.urls, db_path=None if args.no_db else args.db, fields=fields,
+                                      workers=stage_workers, deadline=args.deadline, progress=args.progress)
+    else:
+        store = None if args.no_db else PaperStore(args.db)
+        all_extracted = main_batch(args.urls, store=store, pack_size=args.pack, fields=fields,
+                                   deadline=args.deadline)
+    for extracted_data in all_extracted:
+        print(extracted_data)
 
     # save to excel
 
-    df = pd.DataFrame([extracted_data])
-    df.to_excel("extracted_data.xlsx", index=False)
\ No newline at end of file
+    with profiling.span("excel.write", rows=len(all_extracted)):
+        df = pd.DataFrame(all_extracted)
+        df.to_excel(args.output, index=False)
+
+    if args.profile:
+        profiling.print_summary(profiling.stop_and_write(args.profile), args.profile)
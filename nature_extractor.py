@@ -1,8 +1,18 @@
+import sys
 import requests
 from bs4 import BeautifulSoup
 import json
 import pandas as pd
 import re
+from ror_index import get_default_ror_index
+from dom_extractor import DocumentExtractor, meta_content
+from paper_model import Paper
+from single_flight import FETCH, PARSE, coalesce
+from journal_standin import route_url
+from field_projection import AUTHOR_FIELDS, head_only, parse_head, read_head, wants
+from deadline import timeout_for
+from hedging import FETCH_HEDGE, hedged
+from profiling import span, traced
 
 def extract_publication_date(soup):
     """Extract publication date from Nature paper HTML"""
@@ -56,8 +66,16 @@ def extract_equal_contributions(soup):
     
     return equal_contributions if equal_contributions else None
 
+@traced("extract_institution_only")
 def extract_institution_only(affiliation):
     """Extract only school/research institute from affiliation, removing departments and countries"""
+    # Prefer the canonical institution/country from the offline ROR index when available
+    ror_index = get_default_ror_index()
+    if ror_index is not None:
+        record = ror_index.resolve_affiliation(affiliation)
+        if record:
+            return record.name, record.country
+
     # First extract country
     country_patterns = [
         (r',\s*([A-Z]{2,3})$', lambda m: m.group(1)),  # ', USA', ', UK', etc.
@@ -112,139 +130,200 @@ def extract_institution_only(affiliation):
     
     return institution.strip(), country
 
-def extract_title(soup):
-    """Extract paper title"""
-    title_elem = soup.select_one('h1.c-article-title')
-    if title_elem:
-        return title_elem.get_text(strip=True)
-    return "Unknown Title"
-
-def extract_journal_name(soup):
-    """Extract journal name from Nature paper HTML"""
-    # Try multiple selectors for Nature journal name
-    journal_selectors = [
-        'meta[name="citation_journal_title"]',
-        'meta[property="og:site_name"]',
-        '.c-journal-title',
-        '.journal-title',
-        'h1.c-header__title',
-        'a.c-header__nav-link--home'
-    ]
-    
-    for selector in journal_selectors:
-        if selector.startswith('meta'):
-            journal_elem = soup.select_one(selector)
-            if journal_elem:
-                content = journal_elem.get('content', '').strip()
-                if content and content not in ['Nature', 'nature.com']:
-                    return content
-        else:
-            journal_elem = soup.select_one(selector)
-            if journal_elem:
-                text = journal_elem.get_text(' ', strip=True)
-                if text and text not in ['Nature', 'nature.com']:
-                    return text
-    
-    # Fallback: extract from URL pattern
-    # Nature journals follow pattern: nature.com/articles/JOURNAL-...
-    # or specific journal sites like nature.com/natphys/, etc.
-    return "Nature"
+# 复用连接池：常驻服务和批量任务中不必每篇论文重新建立TLS连接
+_session = requests.Session()
 
-def parse_nature_authors(url: str):
-    """Parse Nature paper and extract structured author information"""
+@coalesce(FETCH)
+def fetch_nature_page(url: str, head_only: bool = False) -> bytes:
+    """Download the raw Nature article page (only up to </head> when head_only)"""
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
                       "AppleWebKit/537.36 (KHTML, like Gecko) "
                       "Chrome/114.0.0.0 Safari/537.36"
     }
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+    with span("http.get", head_only=head_only):
+        resp = hedged(FETCH_HEDGE, _session.get, route_url(url), headers=headers, stream=head_only,
+                      timeout=timeout_for(30, "nature fetch"))
+        resp.raise_for_status()
+        return read_head(resp) if head_only else resp.content
+
+@coalesce(PARSE)
+def parse_nature_authors(url: str, fields=None) -> Paper:
+    """Parse Nature paper and extract structured author information (only `fields` when given)"""
+    if head_only(fields):
+        # Title, journal and date are usually all in the citation_* meta tags; skip the rest of the page
+        info = parse_head(fetch_nature_page(url, head_only=True), url, "nature", fields)
+        if info:
+            return Paper.from_dict(info)
+    paper_info, _, authors = iter_nature_authors(fetch_nature_page(url), url, fields)
+    # 作者逐个写入紧凑模型，不先构建完整的作者dict列表
+    paper = Paper.from_dict(paper_info)
+    for author in authors:
+        paper.add_author(author["name"], author["affiliations"], role=author["role"],
+                         is_corresponding=author["is_corresponding"])
+    return paper
+
+def _journal_from_meta(elem):
+    content = meta_content(elem)
+    return content if content and content not in ['Nature', 'nature.com'] else None
+
+def _journal_from_text(elem):
+    text = elem.get_text(' ', strip=True)
+    return text if text and text not in ['Nature', 'nature.com'] else None
+
+def _publication_date_from_time(elem):
+    return {
+        "iso_date": elem.get("datetime"),
+        "formatted_date": elem.get_text(strip=True)
+    }
+
+def _abstract_from_paragraph(elem):
+    # Remove citation links but keep the text flow
+    for sup in elem.find_all('sup'):
+        sup.decompose()
+    return elem.get_text(' ', strip=True)
+
+def _contributions_after_heading(heading):
+    para = heading.find_next_sibling('p')
+    return para.get_text(strip=True) if para else None
+
+def _stripped_text(elem):
+    return elem.get_text(strip=True)
+
+def _all_matches(elems):
+    return elems
+
+# Every field the page parser needs, traversed in a single pass over the document.
+# Selector chains are listed in initial fallback order and reordered by hit rate (selector_registry).
+NATURE_FIELDS = (
+    DocumentExtractor('nature')
+    .add_field('title', [('h1.c-article-title', _stripped_text)], default="Unknown Title")
+    .add_field('journal_name', [
+        ('meta[name="citation_journal_title"]', _journal_from_meta),
+        ('meta[property="og:site_name"]', _journal_from_meta),
+        ('.c-journal-title', _journal_from_text),
+        ('.journal-title', _journal_from_text),
+        ('h1.c-header__title', _journal_from_text),
+        ('a.c-header__nav-link--home', _journal_from_text),
+    ], default="Nature")
+    .add_field('publication_date', [('li.c-article-identifiers__item time[datetime]', _publication_date_from_time)])
+    .add_field('abstract', [('#Abs1-content p', _abstract_from_paragraph)])
+    .add_field('contributions', [
+        ('h3#contributions', _contributions_after_heading),
+        ('h3.c-article__sub-heading#contributions + p', _stripped_text),
+    ])
+    .add_field('equal_contributions', [
+        ('li.c-article-author-information__item', lambda items: [item.get_text(strip=True) for item in items]),
+    ], multiple=True)
+    .add_field('affiliations', [('ol.c-article-author-affiliation__list > li', _all_matches)], default=(), multiple=True)
+    .add_field('corresponding_authors', [('#corresponding-author-list a', _all_matches)], default=(), multiple=True)
+    .add_field('authors', [('ol.c-article-authors-search > li', _all_matches)], default=(), multiple=True)
+)
+
+_AUTHOR_DOM_FIELDS = ('affiliations', 'corresponding_authors', 'authors')
+
+def _nature_dom_fields(fields):
+    """DOM fields needed for the requested paper fields (None = all)"""
+    if fields is None:
+        return None
+    names = {name for name in fields if name in ('title', 'journal_name', 'publication_date', 'abstract',
+                                                 'contributions', 'equal_contributions')}
+    if wants(fields, *AUTHOR_FIELDS):
+        names.update(_AUTHOR_DOM_FIELDS)
+    return names
+
+def iter_nature_authors(html, url: str, fields=None):
+    """
+    Parse a downloaded Nature page, yielding author records one at a time
+
+    The whole soup and the name -> affiliations map are still built up front, so peak memory
+    grows with the author count; the generator only avoids a second list of author dicts.
+
+    Args:
+        fields: paper fields to extract (see field_projection); None extracts everything
+
+    Returns:
+        (paper_info, author_count, authors): paper_info holds every field except authors,
+        authors is a generator of author dicts (affiliation strings are shared, not copied)
+    """
+    with span("bs4.parse", parser="html.parser"):
+        soup = BeautifulSoup(html, "html.parser")
+    values = NATURE_FIELDS.project(_nature_dom_fields(fields)).extract(soup)
+    # Country lookups hit the ROR index for every affiliation; only do them when asked for
+    want_countries = wants(fields, "countries")
 
-    # Extract basic paper info
-    title = extract_title(soup)
-    journal_name = extract_journal_name(soup)
-    
     # Build affiliation map and author-affiliation mapping
-    aff_list = soup.select("ol.c-article-author-affiliation__list > li")
-    aff_map = {}
     author_aff_map = {}  # Map author names to their affiliations
     countries = set()
     
-    for li in aff_list:
-        aff_id = li.get("id")
+    for li in values.get("affiliations", ()):
         address = li.select_one(".c-article-author-affiliation__address")
         authors_list = li.select_one(".c-article-author-affiliation__authors-list")
         
         if address and authors_list:
             # Get the complete address text
-            complete_address = address.get_text(strip=True)
+            complete_address = sys.intern(address.get_text(strip=True))
             
             # Extract country for the countries set
-            _, country = extract_institution_only(complete_address)
-            if country:
-                countries.add(country)
-            
-            # Store the complete address in the affiliation map
-            aff_map[aff_id] = complete_address
+            if want_countries:
+                _, country = extract_institution_only(complete_address)
+                if country:
+                    countries.add(country)
             
             # Extract authors from this affiliation
             authors_text = authors_list.get_text(strip=True)
             # Split by comma and &, then clean up
-            authors_in_aff = []
             for author_part in re.split(r',\s*|\s*&\s*', authors_text):
                 author_name = author_part.strip()
                 if author_name:
-                    authors_in_aff.append(author_name)
                     # Map this author to this affiliation
-                    if author_name not in author_aff_map:
-                        author_aff_map[author_name] = []
-                    author_aff_map[author_name].append(complete_address)
+                    author_aff_map.setdefault(author_name, []).append(complete_address)
 
     # Extract corresponding authors
-    corresponding_authors = set()
-    corr_auths = soup.select("#corresponding-author-list a")
-    for a in corr_auths:
-        corresponding_authors.add(a.get_text(strip=True))
-    
-    # Extract all authors with their affiliations
-    authors_data = []
-    authors_list = soup.select("ol.c-article-authors-search > li")
-    
-    for idx, li in enumerate(authors_list):
-        name = li.select_one(".js-search-name").get_text(strip=True)
-        
-        # Get affiliations for this author from our mapping
-        author_affiliations = author_aff_map.get(name, [])
-        
-        # Determine author role
-        role = "Other Author"
-        if idx == 0:  # First author
-            role = "First Author"
-        if name in corresponding_authors:
-            if idx == 0:
-                role = "First/Corresponding Author"
-            else:
-                role = "Corresponding Author"
-        
-        authors_data.append({
-            "name": name,
-            "role": role,
-            "affiliations": author_affiliations,
-            "is_corresponding": name in corresponding_authors
-        })
+    corresponding_authors = {a.get_text(strip=True) for a in values.get("corresponding_authors", ())}
 
-    return {
-        "title": title,
-        "journal_name": journal_name,
+    paper_info = {
+        "title": values.get("title"),
+        "journal_name": values.get("journal_name"),
         "url": url,
-        "authors": authors_data,
-        "countries": list(countries),
-        "publication_date": extract_publication_date(soup),
-        "abstract": extract_abstract(soup),
-        "contributions": extract_contributions(soup),
-        "equal_contributions": extract_equal_contributions(soup)
+        "countries": list(countries) if want_countries else None,
+        "publication_date": values.get("publication_date"),
+        "abstract": values.get("abstract"),
+        "contributions": values.get("contributions"),
+        "equal_contributions": values.get("equal_contributions")
     }
+    author_items = values.get("authors", ())
+
+    def authors():
+        for idx, li in enumerate(author_items):
+            name = li.select_one(".js-search-name").get_text(strip=True)
+
+            # Determine author role
+            role = "Other Author"
+            if idx == 0:  # First author
+                role = "First Author"
+            if name in corresponding_authors:
+                if idx == 0:
+                    role = "First/Corresponding Author"
+                else:
+                    role = "Corresponding Author"
+
+            yield {
+                "name": name,
+                "role": role,
+                "affiliations": author_aff_map.get(name, []),
+                "is_corresponding": name in corresponding_authors
+            }
+
+    return paper_info, len(author_items), authors()
+
+def parse_nature_html(html, url: str, fields=None):
+    """Extract structured author information from an already downloaded Nature page (str or bytes)"""
+    paper_info, _, authors = iter_nature_authors(html, url, fields)
+    result = {key: paper_info[key] for key in ("title", "journal_name", "url")}
+    result["authors"] = list(authors)
+    result.update((key, value) for key, value in paper_info.items() if key not in result)
+    return result
 
 def create_nature_table(paper_data):
     """Create table matching the exact schema of nature information output.xlsx"""
@@ -0,0 +1,133 @@
+"""
+论文URL/DOI规范化与批内去重
+
+同一篇论文可能以多种形式进入：nature.com/articles/...、doi.org/10.1038/...、
+APS 的 /abstract/、/pdf/、/doi/，science.org 的 /doi/full/ 等。
+canonicalize() 把它们统一映射到以DOI为键的身份，dedupe_urls() 在调度前去重，
+每篇论文每批只抓取、解析、总结一次，再把结果分发回所有重复输入。
+"""
+import re
+from collections import OrderedDict, namedtuple
+from urllib.parse import unquote, urlsplit
+
+PaperId = namedtuple("PaperId", "doi journal url")
+
+# DOI前缀 -> 期刊类型
+DOI_PREFIX_JOURNALS = {
+    "10.1038": "nature",
+    "10.1126": "science",
+    "10.1103": "aps",
+}
+
+_DOI_RE = re.compile(r'(10\.\d{4,9}/[^\s?#]+)', re.IGNORECASE)
+_NATURE_ARTICLE_RE = re.compile(r'/articles/([^/?#]+?)(?:\.pdf)?/?$')
+_APS_PATH_RE = re.compile(
+    r'^/([a-z]+)/(?:abstract|pdf|doi|supplemental|references|cited-by|accepted)/(10\.\d{4,9}/.+?)/?$',
+    re.IGNORECASE
+)
+_TRAILING_PUNCTUATION = '.,;)'
+
+
+def clean_doi(doi: str) -> str:
+    """去掉 doi: 前缀和末尾标点，保留原始大小写（用于拼接抓取链接）"""
+    doi = unquote(doi.strip())
+    doi = re.sub(r'^(?:doi:|https?://(?:dx\.)?doi\.org/)', '', doi, flags=re.IGNORECASE)
+    return doi.rstrip(_TRAILING_PUNCTUATION)
+
+
+def normalize_doi(doi: str) -> str:
+    """去重键：clean_doi 后统一为小写（DOI不区分大小写）"""
+    return clean_doi(doi).lower()
+
+
+def canonicalize(url: str) -> PaperId:
+    """
+    把论文链接映射为 (doi, journal, url)
+
+    journal 为 nature / science / aps；url 为用于抓取的规范链接（DOI保留原始大小写），
+    doi 为小写的去重键。
+    无法识别DOI时 doi 为None，url 为去掉查询串和锚点的原始链接。
+    """
+    url = url.strip()
+    parts = urlsplit(url if '://' in url else 'https://' + url)
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = unquote(parts.path)
+
+    doi = None
+    aps_journal = None
+
+    if host.endswith('nature.com'):
+        match = _NATURE_ARTICLE_RE.search(path)
+        if match:
+            doi = '10.1038/' + match.group(1)
+    elif host == 'journals.aps.org':
+        match = _APS_PATH_RE.match(path)
+        if match:
+            aps_journal, doi = match.group(1).lower(), match.group(2)
+
+    if doi is None:
+        # doi.org、science.org/doi/...、link.aps.org/doi/... 等路径中直接带有DOI
+        match = _DOI_RE.search(path)
+        if match:
+            doi = match.group(1)
+            # science.org/doi/full/10.1126/xxx/suppl 之类的附加路径
+            if host.endswith('science.org'):
+                doi = '/'.join(doi.split('/')[:2])
+
+    if doi is None:
+        return PaperId(None, _journal_from_host(host), f"{parts.scheme}://{parts.netloc}{parts.path}")
+
+    # 只有去重键用小写；抓取链接保留原始大小写，与已有的页面缓存和库中链接一致
+    original = clean_doi(doi)
+    doi = original.lower()
+    journal = DOI_PREFIX_JOURNALS.get(doi.split('/', 1)[0]) or _journal_from_host(host)
+    return PaperId(doi, journal, _canonical_url(original, journal, aps_journal))
+
+
+def _journal_from_host(host: str):
+    if host.endswith('nature.com'):
+        return 'nature'
+    if host.endswith('science.org'):
+        return 'science'
+    if host.endswith('aps.org'):
+        return 'aps'
+    return None
+
+
+def _canonical_url(doi: str, journal: str, aps_journal: str = None) -> str:
+    if journal == 'nature':
+        return f"https://www.nature.com/articles/{doi.split('/', 1)[1]}"
+    if journal == 'science':
+        return f"https://www.science.org/doi/{doi}"
+    if journal == 'aps':
+        if aps_journal:
+            return f"https://journals.aps.org/{aps_journal}/abstract/{doi}"
+        return f"https://link.aps.org/doi/{doi}"
+    return f"https://doi.org/{doi}"
+
+
+def paper_key(paper: PaperId) -> str:
+    """去重键：优先DOI，没有DOI时用规范化后的链接"""
+    return paper.doi or paper.url
+
+
+def dedupe_urls(urls):
+    """
+    批内去重
+
+    Returns:
+        (papers, groups)：papers 为首次出现顺序的 {key: PaperId}，
+        groups 为 {key: [原始url, ...]}，用于把结果分发回所有重复输入
+    """
+    papers = OrderedDict()
+    groups = {}
+    for url in urls:
+        paper = canonicalize(url)
+        key = paper_key(paper)
+        if key not in papers:
+            papers[key] = paper
+            groups[key] = []
+        groups[key].append(url)
+    return papers, groups
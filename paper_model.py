@@ -0,0 +1,189 @@
+"""
+紧凑的论文/作者/单位数据模型
+
+三个提取器都把完整的单位地址字符串放进每个作者的 affiliations 列表：
+50个作者共享3个单位时，同样的长字符串会在dict、JSON和LLM提示中重复几十次。
+这里的 Paper 保存一张按出现顺序去重的单位表，Author 只记录单位在表中的下标，
+字符串经过 sys.intern 驻留；to_llm_json() 只输出一次单位表。
+
+用法：
+    paper = Paper.from_dict(parse_nature_authors(url))   # 也接受 Science/APS 的结果或其JSON字符串
+    prompt = paper.to_llm_json()
+    legacy = paper.to_dict()                             # 还原为提取器原来的结构
+"""
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(slots=True)
+class Affiliation:
+    """单位表中的一项；institution / country 在需要时由 resolve() 填充"""
+    address: str
+    institution: Optional[str] = None
+    country: Optional[str] = None
+
+    def resolve(self):
+        """用ROR索引或启发式规则拆出机构名和国家"""
+        if self.institution is None:
+            from nature_extractor import extract_institution_only
+
+            institution, country = extract_institution_only(self.address)
+            self.institution = _intern(institution)
+            self.country = _intern(country)
+        return self
+
+
+@dataclass(slots=True)
+class Author:
+    name: str
+    affiliations: tuple = ()            # 单位表下标
+    role: Optional[str] = None          # Nature/APS解析结果: First Author / Corresponding Author ...
+    is_corresponding: Optional[bool] = None
+    marks: tuple = ()                   # Science: 作者名后的标记（†、*），含义见 Paper.notes
+    roles: object = None                # Science: 贡献角色字符串；APS: 角色说明列表
+
+
+# 已映射到模型字段的键，其余键原样保留在 Paper.extra 中
+_PAPER_KEYS = ("title", "journal_name", "url", "authors", "countries", "publication_date",
+               "abstract", "contributions", "equal_contributions", "notes")
+
+
+@dataclass(slots=True)
+class Paper:
+    url: Optional[str] = None
+    title: Optional[str] = None
+    journal_name: Optional[str] = None
+    authors: list = field(default_factory=list)
+    affiliations: list = field(default_factory=list)   # [Affiliation]，按首次出现顺序
+    countries: Optional[list] = None
+    publication_date: object = None                    # Nature/APS: {iso_date, formatted_date}；Science: 字符串
+    abstract: Optional[str] = None
+    contributions: Optional[str] = None
+    equal_contributions: Optional[list] = None
+    notes: Optional[dict] = None
+    extra: dict = field(default_factory=dict)
+    _affiliation_index: dict = field(default_factory=dict, repr=False, compare=False)
+
+    def add_affiliation(self, address: str) -> int:
+        """把单位地址加入单位表（已存在时复用），返回下标"""
+        index = self._affiliation_index.get(address)
+        if index is None:
+            index = len(self.affiliations)
+            address = _intern(address)
+            self.affiliations.append(Affiliation(address))
+            self._affiliation_index[address] = index
+        return index
+
+    def add_author(self, name: str, affiliations=(), **kwargs) -> Author:
+        """添加作者；affiliations 为单位地址字符串列表"""
+        author = Author(
+            name=name,
+            affiliations=tuple(self.add_affiliation(address) for address in affiliations),
+            **kwargs
+        )
+        self.authors.append(author)
+        return author
+
+    def author_affiliations(self, author: Author):
+        return [self.affiliations[index].address for index in author.affiliations]
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 Nature / Science / APS 提取结果（dict或JSON字符串）构建"""
+        if isinstance(data, str):
+            data = json.loads(data)
+        paper = cls(
+            url=data.get("url"),
+            title=data.get("title"),
+            journal_name=_intern(data.get("journal_name")),
+            countries=[_intern(c) for c in data["countries"]] if data.get("countries") is not None else None,
+            publication_date=data.get("publication_date"),
+            abstract=data.get("abstract"),
+            contributions=data.get("contributions"),
+            equal_contributions=data.get("equal_contributions"),
+            notes=data.get("notes"),
+            extra={k: v for k, v in data.items() if k not in _PAPER_KEYS},
+        )
+        for author in data.get("authors") or []:
+            roles = author.get("roles")
+            if isinstance(roles, list):
+                roles = tuple(_intern(r) for r in roles)
+            paper.add_author(
+                author.get("name"),
+                author.get("affiliations") or (),
+                role=_intern(author.get("role")),
+                is_corresponding=author.get("is_corresponding"),
+                marks=tuple(_intern(m) for m in author.get("marks") or ()),
+                roles=_intern(roles),
+            )
+        return paper
+
+    def to_dict(self) -> dict:
+        """还原为提取器原来的结构（每个作者带完整单位字符串）"""
+        data = {}
+        for key in _PAPER_KEYS:
+            if key == "authors":
+                data["authors"] = [self._author_dict(author) for author in self.authors]
+                continue
+            value = getattr(self, key)
+            if value is not None or key in ("title", "url"):
+                data[key] = value
+        data.update(self.extra)
+        return data
+
+    def _author_dict(self, author: Author) -> dict:
+        item = {"name": author.name}
+        if author.role is not None:
+            item["role"] = author.role
+        if author.marks:
+            item["marks"] = list(author.marks)
+        item["affiliations"] = self.author_affiliations(author)
+        if author.is_corresponding is not None:
+            item["is_corresponding"] = author.is_corresponding
+        if author.roles is not None:
+            item["roles"] = list(author.roles) if isinstance(author.roles, tuple) else author.roles
+        return item
+
+    def to_llm_dict(self) -> dict:
+        """
+        给LLM的紧凑结构：单位表只出现一次，作者用 "aff" 引用单位编号（从1开始）；
+        空字段和只供程序使用的字段（extraction_quality 等）不输出
+        """
+        authors = []
+        for author in self.authors:
+            item = {"name": author.name}
+            if author.role:
+                item["role"] = author.role
+            if author.marks:
+                item["marks"] = list(author.marks)
+            if author.affiliations:
+                item["aff"] = [index + 1 for index in author.affiliations]
+            if author.is_corresponding:
+                item["is_corresponding"] = True
+            if author.roles:
+                item["roles"] = list(author.roles) if isinstance(author.roles, tuple) else author.roles
+            authors.append(item)
+
+        data = {
+            "title": self.title,
+            "journal_name": self.journal_name,
+            "url": self.url,
+            "publication_date": self.publication_date,
+            "affiliations": {str(i + 1): aff.address for i, aff in enumerate(self.affiliations)},
+            "authors": authors,
+            "author_notes": self.notes,
+            "countries": self.countries,
+            "abstract": self.abstract,
+            "contributions": self.contributions,
+            "equal_contributions": self.equal_contributions,
+        }
+        return {k: v for k, v in data.items() if v}
+
+    def to_llm_json(self) -> str:
+        return json.dumps(self.to_llm_dict(), ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,339 @@
+"""
+本地SQLite论文库
+
+保存提取结果（作者、单位、国家、摘要、贡献）和LLM输出字段，
+在 DOI、期刊、发表日期、规范化机构名和国家上建索引，提供Python查询接口。
+"已经处理过的URL"和"某机构本月的通讯作者论文"之类的问题都变成索引查询，不必重新抓取。
+
+用法：
+    store = PaperStore("papers.db")
+    store.save_paper(paper_data, llm_fields)
+    store.filter_new_urls(urls)
+    store.find_papers(institution="Stanford University", corresponding_only=True, date_from="2025-08-01")
+"""
+import json
+import sqlite3
+import time
+from datetime import datetime
+
+from paper_identity import canonicalize, paper_key
+from paper_model import Paper
+from ror_index import normalize_name
+
+DEFAULT_DB_PATH = "papers.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    doi TEXT PRIMARY KEY,
+    url TEXT,
+    journal TEXT,
+    journal_name TEXT,
+    title TEXT,
+    publication_date TEXT,
+    abstract TEXT,
+    contributions TEXT,
+    countries TEXT,
+    paper_json TEXT,
+    llm_json TEXT,
+    updated_at REAL,
+    extractor_version TEXT
+);
+CREATE TABLE IF NOT EXISTS authors (
+    doi TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    role TEXT,
+    is_corresponding INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (doi, position)
+);
+CREATE TABLE IF NOT EXISTS affiliations (
+    doi TEXT NOT NULL,
+    author_position INTEGER NOT NULL,
+    affiliation TEXT,
+    institution TEXT,
+    institution_norm TEXT,
+    country TEXT
+);
+CREATE TABLE IF NOT EXISTS paper_urls (
+    url TEXT PRIMARY KEY,
+    doi TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS feed_cursors (
+    feed_url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    last_polled_at REAL,
+    last_new_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_papers_journal ON papers (journal_name);
+CREATE INDEX IF NOT EXISTS idx_papers_date ON papers (publication_date);
+CREATE INDEX IF NOT EXISTS idx_affiliations_institution ON affiliations (institution_norm, doi);
+CREATE INDEX IF NOT EXISTS idx_affiliations_country ON affiliations (country, doi);
+CREATE INDEX IF NOT EXISTS idx_affiliations_doi ON affiliations (doi, author_position);
+CREATE INDEX IF NOT EXISTS idx_paper_urls_doi ON paper_urls (doi);
+"""
+
+_DATE_FORMATS = ('%Y-%m-%d', '%d %B %Y', '%d %B, %Y', '%d %b %Y', '%B %d, %Y', '%b %d, %Y', '%Y/%m/%d')
+_CORRESPONDING_HINTS = ('contact author', 'corresponding author')
+
+
+def normalize_date(value):
+    """把各期刊的发表日期（dict/字符串）统一为 YYYY-MM-DD，无法解析时返回None"""
+    if isinstance(value, dict):
+        if value.get("iso_date"):
+            return value["iso_date"][:10]
+        value = value.get("formatted_date")
+    if not value:
+        return None
+    text = " ".join(str(value).split())
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _is_corresponding(author: dict, notes: dict) -> bool:
+    """兼容 Nature（is_corresponding）、Science（marks + notes）、APS（roles）三种作者结构"""
+    if "is_corresponding" in author:
+        return bool(author["is_corresponding"])
+    for mark in author.get("marks") or []:
+        note = (notes or {}).get(mark, "")
+        if mark == "*" or any(hint in note.lower() for hint in _CORRESPONDING_HINTS):
+            return True
+    roles = author.get("roles") or []
+    if isinstance(roles, str):
+        roles = [roles]
+    return any(hint in role.lower() for role in roles for hint in _CORRESPONDING_HINTS)
+
+
+def _split_institution(affiliation: str):
+    """机构名和国家：优先ROR索引，否则沿用 extract_institution_only 的启发式规则"""
+    from nature_extractor import extract_institution_only
+
+    institution, country = extract_institution_only(affiliation)
+    if not country and "," in affiliation:
+        country = affiliation.rsplit(",", 1)[-1].strip()
+    return institution, country
+
+
+class PaperStore:
+    """SQLite论文库"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """给旧版本创建的库补上新增的列"""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(papers)")}
+        if "extractor_version" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE papers ADD COLUMN extractor_version TEXT")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------------------
+    # 写入
+    # ---------------------------
+    def save_paper(self, paper_data, llm_fields: dict = None, input_urls=(), extractor_version: str = None):
+        """
+        保存一篇论文的提取结果（以及可选的LLM字段），同一DOI重复保存时覆盖
+
+        Args:
+            paper_data: 提取器输出（Paper、dict 或其JSON字符串）
+            llm_fields: extract_paper_info 的结果
+            input_urls: 指向这篇论文的原始链接，之后可以据此跳过
+            extractor_version: 产生这份结果的提取器版本（parse_pool.extractor_version）
+
+        Returns:
+            str: 论文的DOI（无DOI时为规范链接）
+        """
+        with self._conn:
+            return self._write_paper(paper_data, llm_fields, input_urls, extractor_version)
+
+    def save_papers(self, records):
+        """
+        在一个事务中保存多篇论文（批量重新提取用），LLM字段保持不变
+
+        Args:
+            records: (paper_data, extractor_version) 序列
+
+        Returns:
+            list[str]: 各论文的DOI
+        """
+        with self._conn:
+            return [self._write_paper(paper_data, None, (), version) for paper_data, version in records]
+
+    def _write_paper(self, paper_data, llm_fields, input_urls, extractor_version):
+        if isinstance(paper_data, Paper):
+            paper_data = paper_data.to_dict()
+        elif isinstance(paper_data, str):
+            paper_data = json.loads(paper_data)
+        url = paper_data.get("url") or (list(input_urls)[0] if input_urls else None)
+        paper = canonicalize(url)
+        doi = paper_key(paper)
+
+        authors = paper_data.get("authors") or []
+        notes = paper_data.get("notes") or {}
+        author_rows = []
+        affiliation_rows = []
+        countries = list(paper_data.get("countries") or [])
+        for position, author in enumerate(authors):
+            author_rows.append((
+                doi, position, author.get("name"), author.get("role"),
+                int(_is_corresponding(author, notes))
+            ))
+            for affiliation in author.get("affiliations") or []:
+                institution, country = _split_institution(affiliation)
+                affiliation_rows.append((
+                    doi, position, affiliation, institution, normalize_name(institution), country
+                ))
+                if country and country not in countries:
+                    countries.append(country)
+
+        self._conn.execute("DELETE FROM authors WHERE doi = ?", (doi,))
+        self._conn.execute("DELETE FROM affiliations WHERE doi = ?", (doi,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO papers (doi, url, journal, journal_name, title, publication_date, abstract,"
+            " contributions, countries, paper_json, llm_json, updated_at, extractor_version)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, (SELECT llm_json FROM papers WHERE doi = ?)), ?, ?)",
+            (
+                doi, paper.url, paper.journal, paper_data.get("journal_name"), paper_data.get("title"),
+                normalize_date(paper_data.get("publication_date")), paper_data.get("abstract"),
+                paper_data.get("contributions"), json.dumps(countries, ensure_ascii=False),
+                json.dumps(paper_data, ensure_ascii=False),
+                json.dumps(llm_fields, ensure_ascii=False) if llm_fields is not None else None, doi,
+                time.time(), extractor_version
+            )
+        )
+        self._conn.executemany("INSERT INTO authors VALUES (?, ?, ?, ?, ?)", author_rows)
+        self._conn.executemany("INSERT INTO affiliations VALUES (?, ?, ?, ?, ?, ?)", affiliation_rows)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO paper_urls VALUES (?, ?)",
+            [(u, doi) for u in {url, paper.url, *input_urls} if u]
+        )
+        return doi
+
+    def save_llm_fields(self, doi: str, llm_fields: dict):
+        """只更新LLM字段"""
+        with self._conn:
+            self._conn.execute("UPDATE papers SET llm_json = ?, updated_at = ? WHERE doi = ?",
+                               (json.dumps(llm_fields, ensure_ascii=False), time.time(), doi))
+
+    # ---------------------------
+    # 查询
+    # ---------------------------
+    def lookup_url(self, url: str):
+        """返回URL对应的已保存DOI，未保存时返回None（先查原始URL，再查规范化后的DOI）"""
+        row = self._conn.execute("SELECT doi FROM paper_urls WHERE url = ?", (url,)).fetchone()
+        if row:
+            return row["doi"]
+        key = paper_key(canonicalize(url))
+        row = self._conn.execute("SELECT doi FROM papers WHERE doi = ?", (key,)).fetchone()
+        return row["doi"] if row else None
+
+    def has_url(self, url: str) -> bool:
+        return self.lookup_url(url) is not None
+
+    def filter_new_urls(self, urls):
+        """过滤掉已经保存过的论文链接"""
+        return [url for url in urls if not self.has_url(url)]
+
+    def extractor_versions(self) -> dict:
+        """DOI -> 保存时的提取器版本（实时抓取保存的论文为None）"""
+        return {row["doi"]: row["extractor_version"]
+                for row in self._conn.execute("SELECT doi, extractor_version FROM papers")}
+
+    def get_paper(self, doi: str):
+        """按DOI取回完整记录：提取结果 + llm 字段"""
+        row = self._conn.execute("SELECT * FROM papers WHERE doi = ?", (doi,)).fetchone()
+        return self._row_to_paper(row) if row else None
+
+    def find_papers(self, journal: str = None, institution: str = None, country: str = None,
+                    date_from: str = None, date_to: str = None, corresponding_only: bool = False,
+                    limit: int = None):
+        """
+        组合条件查询
+
+        Args:
+            journal: 期刊名（journal_name，精确匹配）
+            institution: 机构名，按规范化名称匹配
+            country: 国家
+            date_from / date_to: 发表日期范围（YYYY-MM-DD，闭区间）
+            corresponding_only: 只匹配通讯作者的单位
+
+        Returns:
+            list[dict]: 按发表日期倒序的论文记录
+        """
+        clauses, params = [], []
+        if institution or country:
+            sub = ["SELECT af.doi FROM affiliations af"]
+            if corresponding_only:
+                sub.append("JOIN authors au ON au.doi = af.doi AND au.position = af.author_position"
+                           " AND au.is_corresponding = 1")
+            conditions = []
+            if institution:
+                conditions.append("af.institution_norm = ?")
+                params.append(normalize_name(institution))
+            if country:
+                conditions.append("af.country = ?")
+                params.append(country)
+            sub.append("WHERE " + " AND ".join(conditions))
+            clauses.append(f"p.doi IN ({' '.join(sub)})")
+        if journal:
+            clauses.append("p.journal_name = ?")
+            params.append(journal)
+        if date_from:
+            clauses.append("p.publication_date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("p.publication_date <= ?")
+            params.append(date_to)
+
+        sql = "SELECT p.* FROM papers p"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY p.publication_date DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [self._row_to_paper(row) for row in self._conn.execute(sql, params)]
+
+    # ---------------------------
+    # 订阅源游标
+    # ---------------------------
+    def get_feed_cursor(self, feed_url: str) -> dict:
+        """返回订阅源上次轮询的 etag / last_modified，没有时为空dict"""
+        row = self._conn.execute("SELECT * FROM feed_cursors WHERE feed_url = ?", (feed_url,)).fetchone()
+        return dict(row) if row else {}
+
+    def save_feed_cursor(self, feed_url: str, etag: str = None, last_modified: str = None, new_count: int = 0):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_cursors VALUES (?, ?, ?, ?, ?)",
+                (feed_url, etag, last_modified, time.time(), new_count)
+            )
+
+    def _row_to_paper(self, row) -> dict:
+        paper = json.loads(row["paper_json"]) if row["paper_json"] else {}
+        paper.update({
+            "doi": row["doi"],
+            "url": row["url"],
+            "journal": row["journal"],
+            "publication_date_iso": row["publication_date"],
+            "countries": json.loads(row["countries"]) if row["countries"] else [],
+            "llm": json.loads(row["llm_json"]) if row["llm_json"] else None,
+            "extractor_version": row["extractor_version"],
+        })
+        return paper
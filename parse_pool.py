@@ -0,0 +1,192 @@
+"""
+进程池解析阶段
+
+BeautifulSoup 解析和 select/find 都是CPU密集且受GIL限制的，放在并发抓取线程里
+会挤在一个核上。这里把原始页面字节发送到常驻的 ProcessPoolExecutor 工作进程中
+解析，只返回紧凑的dict结果（不回传soup对象），并通过有界的在途任务数
+对抓取阶段施加背压，使批量任务能用满所有核。
+"""
+import functools
+import hashlib
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from paper_identity import canonicalize, dedupe_urls
+
+
+def detect_journal(url: str):
+    """根据URL判断期刊类型：nature / science / aps，无法识别时返回None"""
+    return canonicalize(url).journal
+
+
+def fetch_page(url: str, head_only: bool = False) -> bytes:
+    """下载论文页面原始字节（APS走Playwright，必须在同一线程中调用）；head_only 时只下载到 </head>"""
+    journal = detect_journal(url)
+    if journal == "nature":
+        import nature_extractor as ne
+        return ne.fetch_nature_page(url, head_only=head_only)
+    if journal == "science":
+        import science_extractor as se
+        return se.fetch_science_page(url, head_only=head_only)
+    if journal == "aps":
+        import aps_extractor as ae
+        return ae.get_html_with_playwright(url).encode("utf-8")
+    raise ValueError(f"Unsupported journal URL: {url}")
+
+
+# 各期刊的解析代码；任何一个文件变化都视为提取器换了版本
+EXTRACTOR_SOURCES = {
+    "nature": ("nature_extractor.py", "dom_extractor.py", "paper_model.py"),
+    "science": ("science_extractor.py", "dom_extractor.py", "paper_model.py"),
+    "aps": ("aps_extractor.py", "dom_extractor.py", "paper_model.py"),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def extractor_version(journal: str) -> str:
+    """当前提取器的版本标记：期刊名 + 解析代码内容的哈希，如 aps-3f2a9c1e07b4"""
+    digest = hashlib.sha1()
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for filename in EXTRACTOR_SOURCES[journal]:
+        with open(os.path.join(base_dir, filename), "rb") as f:
+            digest.update(f.read())
+    return f"{journal}-{digest.hexdigest()[:12]}"
+
+
+_parsers = None
+
+
+def _init_worker():
+    """工作进程启动时预先导入解析模块并预热解析器"""
+    global _parsers
+    from bs4 import BeautifulSoup
+    import nature_extractor as ne
+    import science_extractor as se
+    import aps_extractor as ae
+
+    BeautifulSoup("<p></p>", "html.parser")
+    BeautifulSoup("<p></p>", "lxml")
+    _parsers = {
+        "nature": ne.parse_nature_html,
+        "science": se.parse_science_html,
+        "aps": ae.parse_aps_html,
+    }
+
+
+def _parse_page(url: str, page: bytes, fields=None) -> dict:
+    """在工作进程中解析一个页面（bytes/str/mmap），返回紧凑的结果记录；fields 只用于 Nature/Science"""
+    if _parsers is None:
+        _init_worker()
+    journal = detect_journal(url)
+    if journal not in _parsers:
+        raise ValueError(f"Unsupported journal URL: {url}")
+    if fields is not None and journal != "aps":
+        return _parsers[journal](page, url, fields)
+    return _parsers[journal](page, url)
+
+
+def parse_fetched(fetched, fields=None) -> dict:
+    """(url, 页面字节) -> 解析结果；供 pipeline 的进程阶段使用"""
+    url, page = fetched
+    return _parse_page(url, page, fields)
+
+
+class ParsePool:
+    """
+    常驻解析进程池
+
+    在途任务数超过 max_pending 时 submit 会阻塞，从而把背压传导给抓取阶段。
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 2
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+
+    def submit(self, url: str, page: bytes, fields=None):
+        """提交一个页面解析任务，返回Future；队列已满时阻塞等待"""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(_parse_page, url, page, fields)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def extract_batch(urls, fetch_workers: int = 8, parse_workers: int = None):
+    """
+    批量抓取+解析，按完成顺序逐个产出结果记录
+
+    输入先按DOI去重，每篇论文只抓取解析一次，结果的 input_urls 列出对应的全部原始链接。
+    抓取在线程池中进行（APS的Playwright固定在单独一个线程），解析在进程池中进行；
+    抓取中和解析中的任务总数不超过解析池的 max_pending，解析跟不上时不再发起新的抓取。
+
+    Yields:
+        dict: 解析结果；失败时为 {"url": ..., "error": ...}
+    """
+    papers, groups = dedupe_urls(urls)
+    input_urls_of = {paper.url: groups[key] for key, paper in papers.items()}
+    url_iter = iter(paper.url for paper in papers.values())
+    fetching = {}
+    parsing = {}
+
+    with ParsePool(parse_workers) as pool, \
+            ThreadPoolExecutor(max_workers=fetch_workers) as fetch_executor, \
+            ThreadPoolExecutor(max_workers=1) as browser_executor:
+
+        def schedule_fetches():
+            while len(fetching) + len(parsing) < pool.max_pending:
+                url = next(url_iter, None)
+                if url is None:
+                    return
+                executor = browser_executor if detect_journal(url) == "aps" else fetch_executor
+                fetching[executor.submit(fetch_page, url)] = url
+
+        schedule_fetches()
+        while fetching or parsing:
+            done, _ = wait(list(fetching) + list(parsing), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in fetching:
+                    url = fetching.pop(future)
+                    try:
+                        page = future.result()
+                    except Exception as e:
+                        print(f"Error fetching {url}: {e}")
+                        yield {"url": url, "input_urls": input_urls_of[url], "error": str(e)}
+                        continue
+                    parsing[pool.submit(url, page)] = url
+                else:
+                    url = parsing.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        print(f"Error parsing {url}: {e}")
+                        record = {"url": url, "error": str(e)}
+                    record["input_urls"] = input_urls_of[url]
+                    yield record
+            schedule_fetches()
+
+        # Playwright 浏览器只能在创建它的线程中关闭
+        if "aps_extractor" in sys.modules:
+            browser_executor.submit(sys.modules["aps_extractor"].cleanup_browser).result()
+
+
+if __name__ == "__main__":
+    import json
+
+    for record in extract_batch(sys.argv[1:]):
+        print(json.dumps(record, ensure_ascii=False))
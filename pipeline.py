@@ -0,0 +1,381 @@
+"""
+分阶段流水线引擎
+
+main.py 对每个链接顺序执行 抓取 → 解析 → LLM → 保存，而这几步的瓶颈各不相同：
+抓取是网络I/O，解析是CPU（受GIL限制），LLM是限流的远程调用，保存是磁盘I/O。
+这里把它们拆成独立的阶段，阶段之间用有界队列连接：
+- 每个阶段有自己的并发数，运行在线程、进程（ProcessPoolExecutor）或 asyncio 事件循环上
+- 队列满时上游阻塞（背压），慢阶段不会让内存里堆满待处理的页面
+- 某一阶段出错的条目直接送到输出端，带上出错的阶段和原因，不再经过后续阶段
+- 设置 deadline 时每个条目从进入流水线起计时，线程/asyncio 阶段中可以用 deadline 模块读取剩余时间
+- stats() 随时给出每个阶段的队列深度、忙碌的worker数、吞吐量和平均处理时间
+
+用法：
+    stages = [
+        Stage("fetch", fetch_page, workers=8),
+        Stage("parse", parse_page, workers=4, mode="process"),
+        Stage("llm", summarize, workers=4),
+        Stage("export", save, workers=1),
+    ]
+    with Pipeline(stages, progress=5) as pipeline:
+        for result in pipeline.run(urls):
+            print(result.index, result.value, result.error)
+"""
+import asyncio
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import profiling
+from deadline import Deadline, DeadlineExceeded, deadline_scope
+
+MODES = ("thread", "process", "async")
+
+# index：输入序号；error 为None表示成功，否则为 "异常类型: 信息"，stage 为出错的阶段
+Result = namedtuple("Result", "index input value error stage")
+
+_DONE = object()  # 上游阶段已经结束
+_POLL = 0.1  # 等待队列时检查是否已停止的间隔（秒）
+
+
+class _Item:
+    __slots__ = ("index", "input", "value", "error", "stage", "deadline")
+
+    def __init__(self, index, value, deadline):
+        self.index = index
+        self.input = value
+        self.value = value
+        self.error = None
+        self.stage = None
+        self.deadline = deadline
+
+
+class Stage:
+    """
+    流水线的一个阶段
+
+    Args:
+        name: 阶段名（统计和错误信息中使用）
+        fn: 处理函数，接收上一阶段的输出，返回交给下一阶段的值；
+            mode="process" 时必须可以pickle（模块级函数或其 functools.partial），
+            mode="async" 时为协程函数
+        workers: 并发数（线程数 / 进程数 / 同时运行的协程数）
+        mode: "thread"、"process" 或 "async"
+        queue_size: 输入队列容量，默认 workers 的两倍
+        initializer: mode="process" 时工作进程的初始化函数
+        close: 本阶段全部worker结束后调用（例如关闭浏览器）
+    """
+
+    def __init__(self, name: str, fn, workers: int = 1, mode: str = "thread", queue_size: int = None,
+                 initializer=None, close=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown stage mode: {mode} (choose from {', '.join(MODES)})")
+        if workers < 1:
+            raise ValueError(f"Stage {name} needs at least one worker")
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.mode = mode
+        self.queue_size = queue_size or workers * 2
+        self.initializer = initializer
+        self.close = close
+
+        self._lock = threading.Lock()
+        self._executor = None  # mode="process" 的进程池
+        self._loop = None  # mode="async" 的事件循环
+        self._loop_thread = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"processed": 0, "errors": 0, "busy": 0, "busy_seconds": 0.0, "blocked_seconds": 0.0}
+            self._first_started = None
+            self._last_finished = None
+
+    # ---------------------------
+    # 执行环境
+    # ---------------------------
+    def _start(self):
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+        elif self.mode == "async":
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, name=f"{self.name}-loop",
+                                                 daemon=True)
+            self._loop_thread.start()
+
+    def _stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+            self._loop = None
+        if self.close is not None:
+            self.close()
+
+    def _call(self, item: _Item):
+        """在当前worker线程中处理一个条目（进程和协程阶段由这个线程提交并等待）"""
+        seconds = None if item.deadline is None else item.deadline.remaining()
+        if self.mode == "process":
+            # 截止时间不会传到工作进程里，只在提交前检查
+            if seconds is not None and seconds <= 0:
+                raise DeadlineExceeded(f"{self.name}: deadline of {item.deadline.seconds:g}s exceeded")
+            return self._executor.submit(self.fn, item.value).result()
+        if self.mode == "async":
+            return asyncio.run_coroutine_threadsafe(self._call_async(item.value, seconds), self._loop).result()
+        with deadline_scope(seconds):
+            return self.fn(item.value)
+
+    async def _call_async(self, value, seconds):
+        # 协程作为事件循环中的 Task 运行，有自己的上下文，截止时间要在 Task 里设置
+        with deadline_scope(seconds):
+            return await self.fn(value)
+
+    # ---------------------------
+    # 统计
+    # ---------------------------
+    def _begin(self):
+        with self._lock:
+            self.stats["busy"] += 1
+            if self._first_started is None:
+                self._first_started = time.monotonic()
+
+    def _end(self, seconds: float, failed: bool):
+        with self._lock:
+            self.stats["busy"] -= 1
+            self.stats["processed"] += 1
+            self.stats["errors"] += failed
+            self.stats["busy_seconds"] += seconds
+            self._last_finished = time.monotonic()
+
+    def _blocked(self, seconds: float):
+        with self._lock:
+            self.stats["blocked_seconds"] += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            first, last = self._first_started, self._last_finished
+        if first is not None and stats["busy"]:
+            last = time.monotonic()
+        elapsed = (last - first) if first is not None and last is not None else 0.0
+        processed = stats["processed"]
+        stats.update({
+            "mode": self.mode,
+            "workers": self.workers,
+            "per_second": round(processed / elapsed, 2) if elapsed > 0 else None,
+            "mean_seconds": round(stats["busy_seconds"] / processed, 3) if processed else None,
+            # 下游队列满、等待放入的时间：这个值大说明瓶颈在下游
+            "blocked_seconds": round(stats["blocked_seconds"], 2),
+            "busy_seconds": round(stats["busy_seconds"], 2),
+        })
+        return stats
+
+
+class Pipeline:
+    """
+    由若干 Stage 组成的流水线；run() 可以多次调用，但同一时间只能运行一次
+
+    Args:
+        stages: 按顺序排列的阶段
+        deadline: 每个条目从进入流水线起的总时限（秒）
+        progress: 每隔多少秒把各阶段的统计打印到stderr；None时不打印
+    """
+
+    def __init__(self, stages, deadline: float = None, progress: float = None):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Stage names must be unique: {names}")
+        self.stages = list(stages)
+        self.deadline = deadline
+        self.progress = progress
+        self._queues = []
+        self._output = None
+        self._running = False
+        self._stopped = threading.Event()
+
+    # ---------------------------
+    # 队列操作（停止后不再阻塞）
+    # ---------------------------
+    def _put(self, q, item) -> bool:
+        while not self._stopped.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stopped.is_set():
+            try:
+                return q.get(timeout=_POLL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    # ---------------------------
+    # worker
+    # ---------------------------
+    def _feed(self, inputs):
+        """把输入逐个放进第一个阶段的队列（队列满时在这里阻塞）"""
+        first = self._queues[0]
+        try:
+            for index, value in enumerate(inputs):
+                deadline = Deadline(self.deadline) if self.deadline is not None else None
+                if not self._put(first, _Item(index, value, deadline)):
+                    return
+        finally:
+            for _ in range(self.stages[0].workers):
+                self._put(first, _DONE)
+
+    def _work(self, stage_no: int, live: list, live_lock: threading.Lock):
+        stage = self.stages[stage_no]
+        inbox = self._queues[stage_no]
+        last = stage_no == len(self.stages) - 1
+        outbox = self._output if last else self._queues[stage_no + 1]
+        try:
+            while True:
+                item = self._get(inbox)
+                if item is _DONE:
+                    return
+                if item.error is None:
+                    stage._begin()
+                    started = time.monotonic()
+                    failed = False
+                    try:
+                        # --profile 时按输入（论文链接）归到各自的时间线上
+                        with profiling.trace(item.input, f"stage.{stage.name}"):
+                            item.value = stage._call(item)
+                    except Exception as e:
+                        failed = True
+                        item.error = f"{type(e).__name__}: {e}"
+                        item.stage = stage.name
+                    stage._end(time.monotonic() - started, failed)
+                # 出错的条目跳过后续阶段，直接送到输出端
+                target = self._output if item.error is not None else outbox
+                started = time.monotonic()
+                if not self._put(target, item):
+                    return
+                stage._blocked(time.monotonic() - started)
+        finally:
+            with live_lock:
+                live[stage_no] -= 1
+                finished = live[stage_no] == 0
+            if finished:
+                try:
+                    stage._stop()
+                finally:
+                    # 本阶段的最后一个worker退出：通知下游阶段
+                    count = 1 if last else self.stages[stage_no + 1].workers
+                    for _ in range(count):
+                        self._put(outbox, _DONE)
+
+    def _report(self, done: threading.Event):
+        while not done.wait(self.progress):
+            print(self.format_stats(), file=sys.stderr)
+
+    # ---------------------------
+    # 运行
+    # ---------------------------
+    def run(self, inputs):
+        """
+        处理 inputs 中的每个值，按完成顺序产出 Result
+
+        提前停止迭代（break 或异常）会让所有阶段尽快退出；已经在处理中的调用会执行完
+        """
+        if self._running:
+            raise RuntimeError("Pipeline is already running")
+        self._running = True
+        self._stopped.clear()
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        self._output = queue.Queue(maxsize=self.stages[-1].queue_size)
+        for stage in self.stages:
+            stage.reset_stats()
+            stage._start()
+
+        live = [stage.workers for stage in self.stages]
+        live_lock = threading.Lock()
+        threads = [threading.Thread(target=self._feed, args=(inputs,), name="pipeline-feed", daemon=True)]
+        for stage_no, stage in enumerate(self.stages):
+            threads += [threading.Thread(target=self._work, args=(stage_no, live, live_lock),
+                                         name=f"{stage.name}-{n}", daemon=True)
+                        for n in range(stage.workers)]
+        reported = threading.Event()
+        if self.progress:
+            threads.append(threading.Thread(target=self._report, args=(reported,), name="pipeline-stats",
+                                            daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(self._output)
+                if item is _DONE:
+                    return
+                yield Result(item.index, item.input, item.value, item.error, item.stage)
+        finally:
+            self._stopped.set()
+            reported.set()
+            for thread in threads:
+                thread.join()
+            self._running = False
+
+    def map(self, inputs) -> list:
+        """处理全部输入，按输入顺序返回 Result 列表"""
+        return sorted(self.run(inputs), key=lambda result: result.index)
+
+    # ---------------------------
+    # 统计
+    # ---------------------------
+    def stats(self) -> dict:
+        """每个阶段的统计；queued 为该阶段输入队列中等待的条目数"""
+        stats = {}
+        for stage_no, stage in enumerate(self.stages):
+            snapshot = stage.snapshot()
+            q = self._queues[stage_no] if self._queues else None
+            snapshot["queued"] = q.qsize() if q is not None else 0
+            snapshot["queue_size"] = stage.queue_size
+            stats[stage.name] = snapshot
+        return stats
+
+    def format_stats(self) -> str:
+        parts = []
+        for name, stats in self.stats().items():
+            rate = "-" if stats["per_second"] is None else f"{stats['per_second']:.2f}/s"
+            parts.append(f"{name}: {stats['processed']} done ({stats['errors']} err), "
+                         f"{stats['busy']}/{stats['workers']} busy, queue {stats['queued']}/{stats['queue_size']}, "
+                         f"{rate}")
+        return " | ".join(parts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+
+
+def parse_stage_workers(spec) -> dict:
+    """
+    "fetch=8,parse=4" -> {"fetch": 8, "parse": 4}
+
+    Raises:
+        ValueError: 格式不对或数量小于1
+    """
+    workers = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, sep, count = part.partition("=")
+        if not sep or not count.strip().isdigit() or int(count) < 1:
+            raise ValueError(f"Invalid stage workers: {part!r} (expected NAME=COUNT)")
+        workers[name.strip()] = int(count)
+    return workers
@@ -0,0 +1,303 @@
+"""
+采样剖析与逐篇论文的时间线（Chrome trace-event 格式）
+
+汇总指标说明不了偶尔一篇要90秒的论文慢在哪里。--profile 模式下：
+- span(name) 标出各步骤的边界（Playwright 导航/等待、BeautifulSoup 解析、
+  extract_institution_only、LLM调用、Excel写入、流水线阶段……），记录为 "X" 事件
+- trace(url) 把其中的 span 归到一篇论文；键通过 contextvars 传递，
+  用 copy_context() 提交到其他线程（浏览器线程、对冲请求）的工作也归到同一篇论文
+- 后台线程每隔 interval 秒对正在执行 span 的线程取一次调用栈（sys._current_frames），
+  连续相同的栈帧合并成火焰图式的 "X" 事件，与 span 显示在同一条时间线上
+- 结束时每篇论文写一个 JSON 文件，可以在 chrome://tracing 或 https://ui.perfetto.dev 中打开；
+  summary.json 按耗时从长到短列出全部论文，run.json 是整个运行的时间线
+
+没有启动剖析时 span()/trace() 返回空的上下文管理器，开销可以忽略。
+
+用法：
+    profiling.start()
+    with profiling.trace(url):
+        with profiling.span("llm.chat"):
+            ...
+    summary = profiling.stop_and_write("profile")
+"""
+import contextlib
+import contextvars
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+DEFAULT_PROFILE_DIR = "profile"
+DEFAULT_INTERVAL = 0.005  # 采样间隔（秒）
+MAX_STACK_DEPTH = 128
+RUN_KEY = "run"  # 不属于任何论文的事件
+
+_NULL = contextlib.nullcontext()
+_key = contextvars.ContextVar("trace_key", default=None)
+_profiler = None
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "args", "key", "tid", "start")
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.key = _key.get()
+        self.tid = threading.get_ident()
+        self.profiler._enter(self.tid, self.key)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler._exit(self, end, exc[0])
+
+
+class Profiler:
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events = {}  # 键 -> [span事件]
+        self._active = {}  # 线程id -> [键]（正在执行的 span，采样只取这些线程）
+        self._samples = {}  # 线程id -> [(时间, 键, 栈帧code元组)]
+        self._thread_names = {}
+        self._frame_names = {}
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+
+    def _us(self, t: float) -> float:
+        return round((t - self.started_at) * 1e6, 1)
+
+    # ---------------------------
+    # span
+    # ---------------------------
+    def _enter(self, tid, key):
+        with self._lock:
+            self._active.setdefault(tid, []).append(key)
+            if tid not in self._thread_names:
+                self._thread_names[tid] = threading.current_thread().name
+
+    def _exit(self, span: _Span, end: float, error):
+        event = {"name": span.name, "cat": "span", "ph": "X", "ts": self._us(span.start),
+                 "dur": round((end - span.start) * 1e6, 1), "pid": 1, "tid": span.tid}
+        args = dict(span.args)
+        if error is not None:
+            args["error"] = error.__name__
+        if args:
+            event["args"] = args
+        with self._lock:
+            stack = self._active.get(span.tid)
+            if stack:
+                stack.pop()
+                if not stack:
+                    del self._active[span.tid]
+            self._events.setdefault(span.key or RUN_KEY, []).append(event)
+
+    # ---------------------------
+    # 采样
+    # ---------------------------
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            now = time.perf_counter()
+            with self._lock:
+                active = {tid: keys[-1] for tid, keys in self._active.items() if keys and tid != own}
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for tid, key in active.items():
+                frame = frames.get(tid)
+                codes = []
+                while frame is not None and len(codes) < MAX_STACK_DEPTH:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.reverse()
+                self._samples.setdefault(tid, []).append((now, key, tuple(codes)))
+            del frames
+
+    def _frame_name(self, code) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            qualname = getattr(code, "co_qualname", code.co_name)
+            name = self._frame_names[code] = \
+                f"{qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return name
+
+    def _sample_events(self) -> dict:
+        """把每个线程的连续采样合并成火焰图事件，按键分组"""
+        events = {}
+        gap = self.interval * 3  # 超过这个间隔没有采样，说明线程在两次采样之间离开了 span
+        for tid, samples in self._samples.items():
+            opened = []  # [(code, 开始时间, 键)]
+            last = None
+
+            def close(depth, end):
+                while len(opened) > depth:
+                    code, start, key = opened.pop()
+                    events.setdefault(key or RUN_KEY, []).append({
+                        "name": self._frame_name(code), "cat": "sample", "ph": "X", "ts": self._us(start),
+                        "dur": round((end - start) * 1e6, 1), "pid": 1, "tid": tid,
+                    })
+
+            for now, key, codes in samples:
+                if last is not None and now - last > gap:
+                    close(0, last + self.interval)
+                depth = 0
+                while (depth < len(opened) and depth < len(codes)
+                       and opened[depth][0] is codes[depth] and opened[depth][2] == key):
+                    depth += 1
+                close(depth, now)
+                opened.extend((code, now, key) for code in codes[depth:])
+                last = now
+            if last is not None:
+                close(0, last + self.interval)
+        return events
+
+    # ---------------------------
+    # 输出
+    # ---------------------------
+    def start(self):
+        self._sampler.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._sampler.join()
+
+    def _metadata(self, tids) -> list:
+        return [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                 "args": {"name": self._thread_names.get(tid, str(tid))}} for tid in sorted(tids)]
+
+    def write(self, out_dir: str) -> list:
+        """
+        写出 out_dir/<论文>.json、run.json 和 summary.json
+
+        Returns:
+            summary：[{"paper", "seconds", "trace", "spans": {span名: 累计秒数}}]，按耗时降序
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        with self._lock:
+            events = {key: list(values) for key, values in self._events.items()}
+        for key, values in self._sample_events().items():
+            events.setdefault(key, []).extend(values)
+
+        summary = []
+        everything = []
+        for key, values in events.items():
+            everything.extend(dict(event, args=dict(event.get("args", {}), paper=key)) for event in values)
+            if key == RUN_KEY:
+                continue
+            spans = [event for event in values if event["cat"] == "span"]
+            if not spans:
+                continue
+            start = min(event["ts"] for event in spans)
+            end = max(event["ts"] + event["dur"] for event in spans)
+            totals = {}
+            for event in spans:
+                totals[event["name"]] = totals.get(event["name"], 0) + event["dur"] / 1e6
+            filename = _trace_filename(key)
+            _write_trace(os.path.join(out_dir, filename), values + self._metadata({e["tid"] for e in values}),
+                         {"paper": key})
+            summary.append({"paper": key, "seconds": round((end - start) / 1e6, 3), "trace": filename,
+                            "spans": {name: round(seconds, 3) for name, seconds in
+                                      sorted(totals.items(), key=lambda item: -item[1])}})
+        _write_trace(os.path.join(out_dir, "run.json"),
+                     everything + self._metadata({event["tid"] for event in everything}), {})
+        summary.sort(key=lambda item: -item["seconds"])
+        with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        return summary
+
+
+def _trace_filename(key: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", re.sub(r"^https?://", "", key)).strip("_")[:80]
+    return f"{slug}_{hashlib.md5(key.encode('utf-8')).hexdigest()[:8]}.json"
+
+
+def _write_trace(path: str, events: list, metadata: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "metadata": metadata}, f, ensure_ascii=False)
+
+
+# ---------------------------
+# 模块级接口
+# ---------------------------
+def enabled() -> bool:
+    return _profiler is not None
+
+
+def start(interval: float = DEFAULT_INTERVAL) -> Profiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(interval)
+        _profiler.start()
+    return _profiler
+
+
+def stop_and_write(out_dir: str = DEFAULT_PROFILE_DIR) -> list:
+    """停止采样并写出全部时间线；没有启动剖析时返回空列表"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return []
+    profiler.stop()
+    return profiler.write(out_dir)
+
+
+def span(name: str, **args):
+    """标出一个步骤；args 作为事件参数显示在时间线上"""
+    profiler = _profiler
+    if profiler is None:
+        return _NULL
+    return _Span(profiler, name, args)
+
+
+@contextlib.contextmanager
+def _traced_scope(key, name):
+    token = _key.set(key)
+    try:
+        with span(name):
+            yield
+    finally:
+        _key.reset(token)
+
+
+def trace(key, name: str = "paper"):
+    """把 with 块内（包括 copy_context 提交到其他线程）的 span 归到 key（通常是论文链接）"""
+    if _profiler is None or key is None:
+        return _NULL
+    return _traced_scope(str(key), name)
+
+
+def traced(name: str = None):
+    """装饰器：每次调用记为一个 span"""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _profiler is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def print_summary(summary: list, out_dir: str, top: int = 5):
+    if not summary:
+        print(f"Profile: no paper traces recorded (see {os.path.join(out_dir, 'run.json')})")
+        return
+    print(f"Profile written to {out_dir}/ ({len(summary)} papers); slowest:")
+    for item in summary[:top]:
+        steps = [(name, seconds) for name, seconds in item["spans"].items() if name != "paper"]
+        spans = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in steps[:4])
+        print(f"  {item['seconds']:8.2f}s  {item['paper']}  [{spans}]  -> {item['trace']}")
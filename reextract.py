@@ -0,0 +1,183 @@
+"""
+从页面缓存批量重新提取
+
+修改了提取器（选择器、作者/单位解析……）之后，不必重新抓取：遍历缓存目录中的
+*.html，用当前的提取器在进程池中重新解析，结果写回论文库并标上提取器版本
+（parse_pool.extractor_version）。全程不发网络请求，已保存的LLM字段保持不变。
+
+- 工作进程直接用 mmap 映射缓存文件：找来源链接只扫描 </head> 之前的部分，
+  解析时由 BeautifulSoup 一次读出，主进程不读页面内容，也不通过管道传送页面
+- 来源链接优先取 aps_extractor 写在页面开头的 source-url 标记，
+  旧缓存没有标记时依次尝试 canonical 链接、og:url、citation_doi
+- 论文库中已经是当前版本的论文默认跳过（--force 全部重新提取）
+- 写库在主进程中进行，每 --batch 篇一个事务
+
+用法：
+    python reextract.py
+    python reextract.py --cache-dir /tmp/aps_cache --db papers.db --workers 8
+    python reextract.py --force --jsonl reextracted.jsonl
+"""
+import glob
+import json
+import mmap
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from paper_identity import canonicalize, paper_key
+from paper_store import DEFAULT_DB_PATH, PaperStore
+from parse_pool import _init_worker, _parse_page, extractor_version
+
+DEFAULT_CACHE_DIR = os.getenv("APS_CACHE_DIR", "/tmp/aps_cache")
+DEFAULT_BATCH = 200
+
+_SOURCE_RE = re.compile(rb"<!-- source-url: (\S+) -->")
+_TAG_RES = (
+    re.compile(rb"<link\b[^>]*\brel=[\"']canonical[\"'][^>]*>", re.I),
+    re.compile(rb"<meta\b[^>]*\bproperty=[\"']og:url[\"'][^>]*>", re.I),
+)
+_DOI_TAG_RE = re.compile(rb"<meta\b[^>]*\bname=[\"']citation_doi[\"'][^>]*>", re.I)
+_ATTR_RE = re.compile(rb"\b(?:href|content)=[\"']([^\"']+)[\"']", re.I)
+_HEAD_END = b"</head>"
+
+# 工作进程中：DOI -> 论文库里的提取器版本
+_stored_versions = {}
+_force = False
+
+
+def source_url(page, end: int = None):
+    """从页面开头（默认到 </head>）找出论文链接，找不到时返回None"""
+    if end is None:
+        end = page.find(_HEAD_END)
+        end = len(page) if end < 0 else end
+    match = _SOURCE_RE.match(page, 0, min(end, 4096))
+    if match:
+        return match.group(1).decode("utf-8", "replace")
+    for tag_re in _TAG_RES:
+        tag = tag_re.search(page, 0, end)
+        attr = tag and _ATTR_RE.search(tag.group(0))
+        if attr and attr.group(1).startswith(b"http"):
+            return attr.group(1).decode("utf-8", "replace")
+    tag = _DOI_TAG_RE.search(page, 0, end)
+    attr = tag and _ATTR_RE.search(tag.group(0))
+    if attr:
+        return "https://doi.org/" + attr.group(1).decode("utf-8", "replace").removeprefix("doi:")
+    return None
+
+
+def _init_reextract_worker(stored_versions: dict, force: bool):
+    global _stored_versions, _force
+    _stored_versions = stored_versions
+    _force = force
+    _init_worker()
+
+
+def reextract_file(path: str) -> dict:
+    """
+    在工作进程中重新提取一个缓存页面
+
+    Returns:
+        dict: {"path", "url", "version", "paper"}；跳过时带 "skipped"，失败时带 "error"
+    """
+    record = {"path": path}
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return dict(record, error="empty file")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as page:
+                url = source_url(page)
+                if url is None:
+                    return dict(record, error="source URL not found")
+                paper = canonicalize(url)
+                if paper.journal is None:
+                    return dict(record, url=url, error="unsupported journal")
+                version = extractor_version(paper.journal)
+                record.update(url=url, version=version)
+                if not _force and _stored_versions.get(paper_key(paper)) == version:
+                    return dict(record, skipped=True)
+                record["paper"] = _parse_page(url, page)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def cache_files(cache_dir: str) -> list:
+    return sorted(glob.glob(os.path.join(cache_dir, "*.html")))
+
+
+def reextract(cache_dir: str = DEFAULT_CACHE_DIR, db_path: str = DEFAULT_DB_PATH, workers: int = None,
+              force: bool = False, batch: int = DEFAULT_BATCH, jsonl: str = None) -> dict:
+    """
+    重新提取 cache_dir 中的全部页面并写入论文库
+
+    Returns:
+        dict: 统计（files / reextracted / skipped / failed / errors / wall_s / versions）
+    """
+    paths = cache_files(cache_dir)
+    workers = workers or os.cpu_count() or 1
+    stats = {"files": len(paths), "reextracted": 0, "skipped": 0, "failed": 0, "errors": {}, "versions": {}}
+    started = time.perf_counter()
+    pending = []
+    out = open(jsonl, "w", encoding="utf-8") if jsonl else None
+
+    with PaperStore(db_path) as store:
+        def flush():
+            store.save_papers(pending)
+            pending.clear()
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_reextract_worker,
+                                     initargs=(store.extractor_versions(), force)) as executor:
+                # 每个任务只传文件路径；chunksize 减少小页面的进程间往返
+                chunksize = max(1, min(64, len(paths) // (workers * 4) or 1))
+                for done, record in enumerate(executor.map(reextract_file, paths, chunksize=chunksize), 1):
+                    if "error" in record:
+                        stats["failed"] += 1
+                        stats["errors"][record["path"]] = record["error"]
+                    elif record.get("skipped"):
+                        stats["skipped"] += 1
+                    else:
+                        stats["reextracted"] += 1
+                        stats["versions"][record["version"]] = stats["versions"].get(record["version"], 0) + 1
+                        pending.append((record["paper"], record["version"]))
+                        if out:
+                            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        if len(pending) >= batch:
+                            flush()
+                    if done % 500 == 0:
+                        print(f"  {done}/{len(paths)} pages ({stats['reextracted']} re-extracted)")
+            flush()
+        finally:
+            if out:
+                out.close()
+
+    stats["wall_s"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-run the current extractors over the cached pages (no network)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="paper store to update")
+    parser.add_argument("--workers", type=int, help="parse processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="also re-extract papers already at the current version")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="papers per store transaction")
+    parser.add_argument("--jsonl", help="also write the re-extracted records to this file")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.cache_dir):
+        parser.error(f"cache directory not found: {args.cache_dir}")
+    stats = reextract(args.cache_dir, args.db, args.workers, args.force, args.batch, args.jsonl)
+    errors = stats.pop("errors")
+    print(json.dumps(stats, indent=2, ensure_ascii=False))
+    for path, error in list(errors.items())[:10]:
+        print(f"  failed: {path}: {error}")
+    if len(errors) > 10:
+        print(f"  ... and {len(errors) - 10} more")
+
+
+if __name__ == "__main__":
+    main()
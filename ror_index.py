@@ -0,0 +1,317 @@
+"""
+离线ROR机构索引
+
+从本地ROR数据dump（https://ror.readme.io/docs/data-dump，json或zip，v1/v2 schema均可）
+构建一个紧凑的二进制索引文件，运行时通过mmap加载，按ROR ID或规范化后的
+机构名/别名/缩写做O(1)查找，得到规范机构名、上级机构和国家。
+
+构建索引：
+    python ror_index.py build v1.xx-ror-data.zip ror_index.bin
+查询：
+    python ror_index.py lookup ror_index.bin "Stanford University"
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import unicodedata
+import zipfile
+from collections import namedtuple
+
+RORRecord = namedtuple("RORRecord", "ror_id name country country_code parent_id parent_name")
+
+DEFAULT_INDEX_PATH = os.getenv("ROR_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ror_index.bin"))
+
+_MAGIC = b"RORIDX01"
+_HEADER = struct.Struct("<8sIIQQ")  # magic, 槽位数, 记录数, 槽位表偏移, 记录偏移表偏移
+_SLOT = struct.Struct("<QI")  # 键哈希, 记录编号
+_OFFSET = struct.Struct("<Q")
+_FIELD_SEP = "\x1f"
+
+_ROR_ID_RE = re.compile(r'(?:https?://)?(?:www\.)?ror\.org/([0-9a-z]{9})\b|^([0-9a-z]{9})$')
+_PARENTHESES_RE = re.compile(r'\s*\([^)]*\)')
+_NON_WORD_RE = re.compile(r'[^\w]+')
+_DIGIT_RE = re.compile(r'\d')
+
+# ROR的国家名 -> extract_institution_only 启发式规则使用的写法，
+# 同一篇论文部分单位命中ROR、部分没有命中时国家不会以两种名字各出现一次
+_COUNTRY_NAMES = {
+    "United States": "USA",
+    "United States of America": "USA",
+    "United Kingdom": "UK",
+    "United Kingdom of Great Britain and Northern Ireland": "UK",
+}
+
+
+def normalize_name(name: str) -> str:
+    """机构名规范化：去重音、小写、去标点、合并空白、去掉开头的 the"""
+    if not name:
+        return ""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = _NON_WORD_RE.sub(" ", name.lower()).strip()
+    if name.startswith("the "):
+        name = name[4:]
+    return name
+
+
+def normalize_country(country: str) -> str:
+    """把ROR的国家名统一成启发式规则的写法（United States -> USA）"""
+    return _COUNTRY_NAMES.get(country, country)
+
+
+def extract_ror_id(text: str):
+    """从 'https://ror.org/05f950310' 或 '05f950310' 中取出ROR ID"""
+    if not text:
+        return None
+    match = _ROR_ID_RE.search(text.strip())
+    if match:
+        return match.group(1) or match.group(2)
+    return None
+
+
+def _key_hash(key: str) -> int:
+    # 0 表示空槽位，因此哈希值强制为非零
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+# ---------------------------
+# 读取ROR dump
+# ---------------------------
+def _load_dump(dump_path):
+    """读取ROR dump（.json 或包含json的 .zip），返回记录列表"""
+    if dump_path.endswith(".zip"):
+        with zipfile.ZipFile(dump_path) as zf:
+            names = [n for n in zf.namelist() if n.endswith(".json")]
+            if not names:
+                raise ValueError(f"No JSON file found in {dump_path}")
+            # 优先使用v2 schema
+            names.sort(key=lambda n: "schema_v2" not in n)
+            with zf.open(names[0]) as f:
+                return json.load(f)
+    with open(dump_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _parse_dump_record(org):
+    """兼容v1/v2 schema，返回 (RORRecord, 主名称列表, 别名列表, 缩写列表)"""
+    ror_id = extract_ror_id(org.get("id", ""))
+
+    if "names" in org:  # v2
+        display, labels, aliases, acronyms = None, [], [], []
+        for entry in org.get("names", []):
+            types = entry.get("types", [])
+            value = entry.get("value", "")
+            if "ror_display" in types:
+                display = value
+            if "label" in types:
+                labels.append(value)
+            if "alias" in types:
+                aliases.append(value)
+            if "acronym" in types:
+                acronyms.append(value)
+        name = display or (labels[0] if labels else "")
+        country, country_code = "", ""
+        for location in org.get("locations", []):
+            details = location.get("geonames_details", {})
+            country = details.get("country_name", "")
+            country_code = details.get("country_code", "")
+            break
+    else:  # v1
+        name = org.get("name", "")
+        labels = [label.get("label", "") for label in org.get("labels", [])]
+        aliases = list(org.get("aliases", []))
+        acronyms = list(org.get("acronyms", []))
+        country = org.get("country", {}).get("country_name", "")
+        country_code = org.get("country", {}).get("country_code", "")
+
+    parent_id, parent_name = "", ""
+    for rel in org.get("relationships", []):
+        if rel.get("type", "").lower() == "parent":
+            parent_id = extract_ror_id(rel.get("id", "")) or ""
+            parent_name = rel.get("label", "")
+            break
+
+    record = RORRecord(*(field or "" for field in (ror_id, name, country, country_code, parent_id, parent_name)))
+    return record, [name] + labels, aliases, acronyms
+
+
+# ---------------------------
+# 构建索引
+# ---------------------------
+def build_ror_index(dump_path: str, index_path: str = DEFAULT_INDEX_PATH) -> int:
+    """
+    从ROR dump构建mmap索引文件
+
+    Args:
+        dump_path: ROR数据dump路径（.json 或 .zip）
+        index_path: 输出索引文件路径
+
+    Returns:
+        int: 收录的机构数
+    """
+    records = []
+    keys = {}  # 规范化键 -> 记录编号，先到先得
+
+    parsed = [_parse_dump_record(org) for org in _load_dump(dump_path)]
+    parsed = [p for p in parsed if p[0].ror_id]
+
+    # 缩写只在唯一对应一个机构时才收录
+    acronym_counts = {}
+    for _, _, _, acronyms in parsed:
+        for acronym in set(map(normalize_name, acronyms)):
+            acronym_counts[acronym] = acronym_counts.get(acronym, 0) + 1
+
+    for record, _, _, _ in parsed:
+        keys["ror:" + record.ror_id] = len(records)
+        records.append(record)
+
+    # 按优先级收录：主名称/多语言名称 > 别名 > 缩写
+    for level in (1, 2, 3):
+        for record_no, (_, names, aliases, acronyms) in enumerate(parsed):
+            candidates = (names, aliases, acronyms)[level - 1]
+            for candidate in candidates:
+                key = normalize_name(candidate)
+                if not key or (level == 3 and acronym_counts.get(key, 0) > 1):
+                    continue
+                keys.setdefault(key, record_no)
+
+    n_slots = 1
+    while n_slots < len(keys) * 2:
+        n_slots <<= 1
+
+    slots = [(0, 0)] * n_slots
+    mask = n_slots - 1
+    for key, record_no in keys.items():
+        h = _key_hash(key)
+        i = h & mask
+        while slots[i][0]:
+            i = (i + 1) & mask
+        slots[i] = (h, record_no)
+
+    blob = bytearray()
+    offsets = []
+    for record in records:
+        offsets.append(len(blob))
+        blob += (_FIELD_SEP.join(record) + "\n").encode("utf-8")
+
+    slot_offset = _HEADER.size
+    offsets_offset = slot_offset + n_slots * _SLOT.size
+    blob_offset = offsets_offset + len(records) * _OFFSET.size
+
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, n_slots, len(records), slot_offset, offsets_offset))
+        f.write(b"".join(_SLOT.pack(h, r) for h, r in slots))
+        f.write(b"".join(_OFFSET.pack(blob_offset + o) for o in offsets))
+        f.write(blob)
+    os.replace(tmp_path, index_path)
+    return len(records)
+
+
+# ---------------------------
+# 查询
+# ---------------------------
+class RORIndex:
+    """mmap加载的ROR索引，按ROR ID或机构名O(1)查找"""
+
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH):
+        self._file = open(index_path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._n_slots, self._n_records, self._slot_offset, self._offsets_offset = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"Not a ROR index file: {index_path}")
+        self._mask = self._n_slots - 1
+
+    def __len__(self):
+        return self._n_records
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def _get(self, key: str):
+        if not key:
+            return None
+        h = _key_hash(key)
+        i = h & self._mask
+        while True:
+            slot_h, record_no = _SLOT.unpack_from(self._mm, self._slot_offset + i * _SLOT.size)
+            if slot_h == 0:
+                return None
+            if slot_h == h:
+                return self._record(record_no)
+            i = (i + 1) & self._mask
+
+    def _record(self, record_no: int) -> RORRecord:
+        (start,) = _OFFSET.unpack_from(self._mm, self._offsets_offset + record_no * _OFFSET.size)
+        end = self._mm.find(b"\n", start)
+        record = RORRecord(*self._mm[start:end].decode("utf-8").split(_FIELD_SEP))
+        return record._replace(country=normalize_country(record.country))
+
+    def lookup_id(self, ror_id: str):
+        """按ROR ID（或ror.org链接）查找"""
+        ror_id = extract_ror_id(ror_id)
+        return self._get("ror:" + ror_id) if ror_id else None
+
+    def lookup_name(self, name: str):
+        """按机构名/别名/缩写查找"""
+        return self._get(normalize_name(name)) or self._get(normalize_name(_PARENTHESES_RE.sub("", name)))
+
+    def resolve_affiliation(self, affiliation: str, ror_id: str = None):
+        """
+        解析一条完整的单位地址
+
+        优先使用ROR ID；否则依次尝试整条地址和从后往前的每个逗号分段
+        （跳过最后的国家分段和含邮编的分段），返回第一个命中的机构记录，找不到时返回None
+        """
+        if ror_id:
+            record = self.lookup_id(ror_id)
+            if record:
+                return record
+        record = self.lookup_name(affiliation)
+        if record:
+            return record
+        parts = affiliation.split(",")
+        for part in reversed(parts[:-1] if len(parts) > 1 else parts):
+            if _DIGIT_RE.search(part):
+                continue
+            record = self.lookup_name(part)
+            if record:
+                return record
+        return None
+
+
+_default_index = None
+_default_index_loaded = False
+
+
+def get_default_ror_index():
+    """获取默认位置（ROR_INDEX_PATH 或 data/ror_index.bin）的索引，不存在时返回None"""
+    global _default_index, _default_index_loaded
+    if not _default_index_loaded:
+        _default_index_loaded = True
+        if os.path.exists(DEFAULT_INDEX_PATH):
+            _default_index = RORIndex(DEFAULT_INDEX_PATH)
+    return _default_index
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    if len(sys.argv) >= 4 and sys.argv[1] == "build":
+        start = time.time()
+        count = build_ror_index(sys.argv[2], sys.argv[3])
+        print(f"Indexed {count} organizations into {sys.argv[3]} in {time.time() - start:.1f}s")
+    elif len(sys.argv) >= 4 and sys.argv[1] == "lookup":
+        index = RORIndex(sys.argv[2])
+        for query in sys.argv[3:]:
+            print(query, "->", index.resolve_affiliation(query, extract_ror_id(query)))
+    else:
+        print("Usage: python ror_index.py build <ror-dump.json|zip> <index.bin>")
+        print("       python ror_index.py lookup <index.bin> <name or ROR ID>...")
@@ -1,9 +1,16 @@
 import requests
 from bs4 import BeautifulSoup
-import json
 import time
 import random
 import re
+from dom_extractor import DocumentExtractor, meta_content
+from paper_model import Paper
+from single_flight import FETCH, PARSE, coalesce
+from journal_standin import route_url
+from field_projection import AUTHOR_FIELDS, head_only, parse_head, read_head, wants
+from deadline import check, timeout_for
+from hedging import FETCH_HEDGE, hedged
+from profiling import span
 
 def clean_text(text: str) -> str:
     """Clean extracted text by removing extra whitespace and normalizing"""
@@ -27,52 +34,12 @@ def _extract_publication_date(soup) -> str:
         return clean_text(date_element.get_text())
     return ""
 
-def _extract_title(soup) -> str:
-    """Extract title from Science.org paper"""
-    title_selectors = [
-        'h1.article-title',
-        'h1[property="headline"]', 
-        'h1.core-title',
-        'title'
-    ]
-    
-    for selector in title_selectors:
-        title_element = soup.select_one(selector)
-        if title_element:
-            return clean_text(title_element.get_text())
-    return ""
+# 复用连接池：常驻服务和批量任务中不必每篇论文重新建立TLS连接
+_session = requests.Session()
 
-def _extract_journal_name(soup) -> str:
-    """Extract journal name from Science.org paper"""
-    # Try multiple selectors for Science journal name
-    journal_selectors = [
-        'meta[name="citation_journal_title"]',
-        'meta[property="og:site_name"]',
-        '.journal-banner-title',
-        '.journal-title',
-        'h1.journal-name',
-        '.core-self-citation-journal-name'
-    ]
-    
-    for selector in journal_selectors:
-        if selector.startswith('meta'):
-            journal_elem = soup.select_one(selector)
-            if journal_elem:
-                content = journal_elem.get('content', '').strip()
-                if content and content.lower() not in ['science.org', 'science']:
-                    return content
-        else:
-            journal_elem = soup.select_one(selector)
-            if journal_elem:
-                text = clean_text(journal_elem.get_text())
-                if text and text.lower() not in ['science.org', 'science']:
-                    return text
-    
-    # Fallback: extract from URL pattern or default to Science
-    # Science journals follow pattern: science.org/doi/...
-    return "Science"
-
-def parse_science_authors(url: str):
+@coalesce(FETCH)
+def fetch_science_page(url: str, head_only: bool = False) -> bytes:
+    """Download the raw Science.org article page (only up to </head> when head_only), retrying on 403/network errors"""
     # FIXED: Complete browser headers that actually work
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -91,37 +58,117 @@ def parse_science_authors(url: str):
     for attempt in range(max_retries):
         try:
             # Random delay to avoid being flagged as bot
-            time.sleep(random.uniform(1, 3))
-            
-            resp = requests.get(url, headers=headers, timeout=30)
-            resp.raise_for_status()
+            with span("http.wait", reason="random delay"):
+                time.sleep(random.uniform(1, 3))
+            check("science fetch")
+
+            with span("http.get", attempt=attempt + 1, head_only=head_only):
+                resp = hedged(FETCH_HEDGE, _session.get, route_url(url), headers=headers, stream=head_only,
+                              timeout=timeout_for(30, "science fetch"))
+                resp.raise_for_status()
             break
             
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 403 and attempt < max_retries - 1:
                 print(f"Attempt {attempt + 1} failed with 403, retrying...")
-                time.sleep(random.uniform(2, 5))  # Longer delay on 403
+                with span("http.wait", reason="403 backoff"):
+                    time.sleep(random.uniform(2, 5))  # Longer delay on 403
                 continue
             else:
                 raise
         except requests.exceptions.RequestException as e:
             if attempt < max_retries - 1:
                 print(f"Attempt {attempt + 1} failed: {e}, retrying...")
-                time.sleep(random.uniform(2, 5))
+                with span("http.wait", reason="retry backoff"):
+                    time.sleep(random.uniform(2, 5))
                 continue
             else:
                 raise
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    authors_section = soup.find("section", id="tab-contributors")
-
-    if not authors_section:
+    return read_head(resp) if head_only else resp.content
+
+@coalesce(PARSE)
+def parse_science_authors(url: str, fields=None) -> Paper:
+    if head_only(fields):
+        # Title, journal and date are usually all in the citation_* meta tags; skip the rest of the page
+        info = parse_head(fetch_science_page(url, head_only=True), url, "science", fields)
+        if info:
+            return Paper.from_dict(info)
+    return Paper.from_dict(parse_science_html(fetch_science_page(url), url, fields))
+
+def _abstract_from_section(abstract_section) -> str:
+    paragraphs = abstract_section.find_all("div", role="paragraph")
+    if paragraphs:
+        return ' '.join(clean_text(p.get_text()) for p in paragraphs)
+    return None
+
+def _clean_element_text(elem) -> str:
+    return clean_text(elem.get_text())
+
+def _journal_from_meta(elem) -> str:
+    content = meta_content(elem)
+    return content if content and content.lower() not in ['science.org', 'science'] else None
+
+def _journal_from_text(elem) -> str:
+    text = clean_text(elem.get_text())
+    return text if text and text.lower() not in ['science.org', 'science'] else None
+
+# Every field the page parser needs, traversed in a single pass over the document.
+# Selector chains are listed in initial fallback order and reordered by hit rate (selector_registry).
+SCIENCE_FIELDS = (
+    DocumentExtractor('science')
+    .add_field('authors_section', [('section#tab-contributors', lambda section: section)])
+    .add_field('abstract', [('section#abstract', _abstract_from_section)], default="")
+    .add_field('publication_date', [
+        ('div.core-date-published span[property="datePublished"]', _clean_element_text),
+    ], default="")
+    .add_field('title', [
+        ('h1.article-title', _clean_element_text),
+        ('h1[property="headline"]', _clean_element_text),
+        ('h1.core-title', _clean_element_text),
+    ], fallback=[
+        # <title> 带站点后缀，只作兜底，不参与按命中率重排
+        ('title', _clean_element_text),
+    ], default="")
+    .add_field('journal_name', [
+        ('meta[name="citation_journal_title"]', _journal_from_meta),
+        ('meta[property="og:site_name"]', _journal_from_meta),
+        ('.journal-banner-title', _journal_from_text),
+        ('.journal-title', _journal_from_text),
+        ('h1.journal-name', _journal_from_text),
+        ('.core-self-citation-journal-name', _journal_from_text),
+    ], default="Science")
+)
+
+def _science_dom_fields(fields):
+    """DOM fields needed for the requested paper fields (None = all)"""
+    if fields is None:
+        return None
+    names = {name for name in fields if name in ('title', 'journal_name', 'publication_date', 'abstract')}
+    if wants(fields, 'notes', *AUTHOR_FIELDS):
+        names.add('authors_section')
+    return names
+
+def parse_science_html(html, url: str, fields=None) -> dict:
+    """
+    Extract structured author information from an already downloaded Science.org page (str or bytes)
+
+    fields: paper fields to extract (see field_projection); None extracts everything
+    """
+    want_authors = wants(fields, *AUTHOR_FIELDS)
+    want_notes = wants(fields, "notes", "corresponding_authors", "corresponding_institutions")
+    with span("bs4.parse", parser="html.parser"):
+        soup = BeautifulSoup(html, "html.parser")
+    values = SCIENCE_FIELDS.project(_science_dom_fields(fields)).extract(soup)
+    authors_section = values.get("authors_section")
+
+    if not authors_section and (want_authors or want_notes):
         raise ValueError("Authors section not found - page structure may have changed")
 
     authors_data = []
 
     # Extract all authors
-    for author_div in authors_section.select(".core-authors [property='author']"):
+    for author_div in (authors_section.select(".core-authors [property='author']") if want_authors else ()):
         author_info = {}
 
         heading = author_div.find("div", class_="heading")
@@ -157,15 +204,15 @@ def parse_science_authors(url: str):
 
         authors_data.append(author_info)
 
-    # Funding information
-    funding_section = authors_section.find("section", class_="core-funding")
+    # Funding information (not part of the result yet, so only parsed for full extractions)
+    funding_section = authors_section.find("section", class_="core-funding") if fields is None else None
     funding_info = []
     if funding_section:
         for div in funding_section.find_all("div", role="paragraph"):
             funding_info.append(div.get_text(" ", strip=True))
 
-    # Notes information
-    notes_section = authors_section.find("section", class_="core-authors-notes")
+    # Notes information (also tells which author marks mean "corresponding author")
+    notes_section = authors_section.find("section", class_="core-authors-notes") if want_notes else None
     notes_info = {}
     if notes_section:
         for note in notes_section.find_all("div", role="doc-footnote"):
@@ -174,11 +221,11 @@ def parse_science_authors(url: str):
             if label and content:
                 notes_info[label.get_text(strip=True)] = content.get_text(" ", strip=True)
 
-    # Extract abstract, publication date, title, and journal name
-    abstract = _extract_abstract(soup)
-    publication_date = _extract_publication_date(soup)
-    title = _extract_title(soup)
-    journal_name = _extract_journal_name(soup)
+    # Abstract, publication date, title, and journal name came from the same traversal
+    abstract = values.get("abstract")
+    publication_date = values.get("publication_date")
+    title = values.get("title")
+    journal_name = values.get("journal_name")
 
     result = {
         "authors": authors_data,
@@ -191,7 +238,6 @@ def parse_science_authors(url: str):
         "url": url
     }
 
-    result = json.dumps(result, indent=4)
     return result
 
 
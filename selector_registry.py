@@ -0,0 +1,166 @@
+"""
+自调优的选择器回退链
+
+各提取器用固定顺序的选择器列表做回退（标题、期刊名、APS页面加载等待……）。
+这里把每条链预编译一次，持久化记录每个选择器的命中次数，并按命中率重排链中的
+"可互换"部分，让最常成功的选择器最先尝试。
+
+链分两段：
+- selectors：互相可替代的选择器（同一个数据在不同改版页面中的位置），按命中率重排
+- fallback：兜底选择器（如 <title>），结果质量较差，始终按原顺序放在最后
+
+命中统计保存在 data/selector_stats.json（环境变量 SELECTOR_STATS_PATH 可改），
+多进程各自累加增量、保存时在文件锁内合并（atomic_json）。`python selector_registry.py` 查看统计，
+某条链的首选选择器命中率骤降时，通常意味着出版商改版了页面。
+"""
+import atexit
+import json
+import os
+import threading
+
+import soupsieve
+
+from atomic_json import merge_json
+
+DEFAULT_STATS_PATH = os.getenv("SELECTOR_STATS_PATH", os.path.join("data", "selector_stats.json"))
+# 每个选择器至少尝试这么多次之后才参与重排，避免少量样本造成抖动
+MIN_TRIES = 5
+SAVE_EVERY = 50
+
+
+class SelectorChain:
+    def __init__(self, registry, name: str, selectors, fallback=()):
+        self.registry = registry
+        self.name = name
+        self.selectors = tuple(selectors)
+        self.fallback = tuple(fallback)
+        self._compiled = {selector: soupsieve.compile(selector) for selector in self.selectors + self.fallback}
+
+    def order(self):
+        """当前尝试顺序：可互换部分按命中率降序（样本不足的保持原位置），兜底部分在最后"""
+        rates = {selector: self.registry.hit_rate(self.name, selector) for selector in self.selectors}
+        position = {selector: i for i, selector in enumerate(self.selectors)}
+        ranked = sorted(self.selectors, key=lambda s: (-(rates[s] if rates[s] is not None else 1.0), position[s]))
+        return ranked + list(self.fallback)
+
+    def record(self, selector: str, hit: bool):
+        self.registry.record(self.name, selector, hit)
+
+    def find(self, soup, handler=None, default=None):
+        """
+        按当前顺序在 soup 中查找，返回第一个 handler(elem) 非None的结果
+
+        handler 缺省时返回命中的元素本身
+        """
+        for selector in self.order():
+            elem = self._compiled[selector].select_one(soup)
+            value = None
+            if elem is not None:
+                value = handler(elem) if handler else elem
+            self.record(selector, value is not None)
+            if value is not None:
+                return value
+        return default
+
+
+class SelectorRegistry:
+    def __init__(self, path: str = DEFAULT_STATS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._chains = {}
+        self._totals = {}    # {chain: {selector: [tries, hits]}}，包括磁盘上的历史
+        self._pending = {}   # 尚未写盘的增量
+        self._unsaved = 0
+        self._load()
+        atexit.register(self.save)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for chain, selectors in data.items():
+            self._totals[chain] = {selector: list(counts) for selector, counts in selectors.items()}
+
+    def chain(self, name: str, selectors, fallback=()) -> SelectorChain:
+        """取得（首次调用时创建并预编译）一条选择器链"""
+        chain = self._chains.get(name)
+        if chain is None:
+            chain = self._chains[name] = SelectorChain(self, name, selectors, fallback)
+        return chain
+
+    def record(self, chain: str, selector: str, hit: bool):
+        with self._lock:
+            for table in (self._totals, self._pending):
+                counts = table.setdefault(chain, {}).setdefault(selector, [0, 0])
+                counts[0] += 1
+                counts[1] += int(hit)
+            self._unsaved += 1
+            should_save = self._unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def hit_rate(self, chain: str, selector: str):
+        counts = self._totals.get(chain, {}).get(selector)
+        if not counts or counts[0] < MIN_TRIES:
+            return None
+        return counts[1] / counts[0]
+
+    def stats(self) -> dict:
+        """{chain: [{selector, tries, hits, hit_rate}]}，按当前尝试顺序排列"""
+        with self._lock:
+            totals = {chain: {s: list(c) for s, c in selectors.items()} for chain, selectors in self._totals.items()}
+        result = {}
+        for chain, selectors in totals.items():
+            order = self._chains[chain].order() if chain in self._chains else list(selectors)
+            order += [s for s in selectors if s not in order]
+            result[chain] = [
+                {"selector": s, "tries": selectors.get(s, [0, 0])[0], "hits": selectors.get(s, [0, 0])[1],
+                 "hit_rate": round(selectors[s][1] / selectors[s][0], 3) if selectors.get(s, [0])[0] else None}
+                for s in order
+            ]
+        return result
+
+    def save(self):
+        """把增量合并进磁盘上的统计（其他进程可能同时在写）；写入失败时增量留到下次保存"""
+        with self._lock:
+            pending, self._pending, self._unsaved = self._pending, {}, 0
+        if not pending or not self.path:
+            return
+
+        def merge(data):
+            for chain, selectors in pending.items():
+                for selector, (tries, hits) in selectors.items():
+                    counts = data.setdefault(chain, {}).setdefault(selector, [0, 0])
+                    counts[0] += tries
+                    counts[1] += hits
+
+        try:
+            merge_json(self.path, merge, indent=1)
+        except OSError as e:
+            print(f"Could not save selector stats to {self.path}: {e}")
+            with self._lock:
+                for chain, selectors in pending.items():
+                    for selector, (tries, hits) in selectors.items():
+                        counts = self._pending.setdefault(chain, {}).setdefault(selector, [0, 0])
+                        counts[0] += tries
+                        counts[1] += hits
+
+
+_default_registry = None
+
+
+def get_registry() -> SelectorRegistry:
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = SelectorRegistry()
+    return _default_registry
+
+
+if __name__ == "__main__":
+    for chain_name, rows in get_registry().stats().items():
+        print(chain_name)
+        for row in rows:
+            rate = "   -  " if row["hit_rate"] is None else f"{row['hit_rate']:6.1%}"
+            print(f"  {rate}  {row['hits']:6d}/{row['tries']:<6d}  {row['selector']}")
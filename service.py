@@ -0,0 +1,316 @@
+"""
+常驻提取服务
+
+每次 python main.py / aps_extractor.py 都要启动Chromium、新建HTTP连接、重新导入 pandas/openai，
+结束时再由 cleanup_browser 全部关闭。服务模式把这些都常驻在一个进程里：
+- APS 的 Playwright 浏览器固定在一个专用线程上，跨请求复用
+- Nature/Science 页面用复用连接池的 requests.Session 抓取，在常驻的解析进程池中解析
+- ROR索引、论文库和LLM客户端只加载一次；已处理过的论文直接从论文库返回
+
+接口（HTTP 或 Unix socket）：
+    POST /extract   {"url": ..., "refresh": false, "fields": null, "deadline": null}
+    POST /batch     {"urls": [...], "refresh": false, "pack": 1, "fields": null, "deadline": null}
+    GET  /status
+
+用法：
+    python service.py                               # http://127.0.0.1:8765
+    python service.py --listen unix:/tmp/paper-extractor.sock
+"""
+import contextvars
+import json
+import os
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from paper_identity import canonicalize, dedupe_urls, paper_key
+from paper_model import Paper
+from paper_store import DEFAULT_DB_PATH, PaperStore
+from field_projection import head_only, needs_llm, parse_fields, parse_head, project
+from parse_pool import ParsePool, fetch_page
+from selector_registry import get_registry
+from service_client import DEFAULT_SERVICE_ADDRESS, parse_address
+from single_flight import FETCH, LLM, PARSE
+import hedging
+from deadline import DEFAULT_PAPER_DEADLINE, deadline_scope
+
+
+class ExtractionService:
+    """服务的核心，与传输方式无关；所有公开方法都是线程安全的"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, fetch_workers: int = 8, parse_workers: int = None,
+                 request_workers: int = 16, deadline: float = DEFAULT_PAPER_DEADLINE):
+        import main as pipeline  # 导入 openai/pandas 等，只在启动时付一次代价
+
+        self._pipeline = pipeline
+        self.db_path = db_path
+        self.deadline = deadline  # 每篇论文的默认时限（秒），请求中可以覆盖
+        self.started_at = time.time()
+        self._parse_pool = ParsePool(parse_workers)
+        self._fetch_executor = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="fetch")
+        # Playwright 同步API只能在创建浏览器的线程中使用
+        self._browser_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="browser")
+        self._request_executor = ThreadPoolExecutor(max_workers=request_workers, thread_name_prefix="request")
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "papers_extracted": 0, "papers_from_store": 0, "errors": 0, "in_flight": 0}
+
+    # ---------------------------
+    # 提取
+    # ---------------------------
+    def _store(self) -> PaperStore:
+        """每个线程一个SQLite连接"""
+        store = getattr(self._local, "store", None)
+        if store is None:
+            store = self._local.store = PaperStore(self.db_path)
+        return store
+
+    def _count(self, name: str, delta: int = 1):
+        with self._stats_lock:
+            self._stats[name] += delta
+
+    @staticmethod
+    def _run_in(executor, fn, *args):
+        """在线程池中执行并等待结果；带上当前上下文，使截止时间传到执行线程"""
+        return executor.submit(contextvars.copy_context().run, fn, *args).result()
+
+    def fetch_paper(self, url: str, fields=None) -> Paper:
+        """抓取并解析一篇论文（不调用LLM）；fields 只用于 Nature/Science"""
+        journal = canonicalize(url).journal
+        if journal == "aps":
+            import aps_extractor as ae
+            paper = self._run_in(self._browser_executor, ae.scrape_aps_authors, url)
+            if paper.extra.get("error"):
+                raise RuntimeError(paper.extra["error"])
+            return paper
+        if journal not in ("nature", "science"):
+            raise ValueError(f"Unsupported journal URL: {url}")
+        if head_only(fields):
+            head = self._run_in(self._fetch_executor, fetch_page, url, True)
+            info = parse_head(head, url, journal, fields)
+            if info:
+                return Paper.from_dict(info)
+        page = self._run_in(self._fetch_executor, fetch_page, url)
+        return Paper.from_dict(self._parse_pool.submit(url, page, fields).result())
+
+    def _stored_result(self, url: str, fields=None):
+        store = self._store()
+        doi = store.lookup_url(url)
+        stored = store.get_paper(doi) if doi else None
+        if stored and (stored["llm"] or not needs_llm(fields)):
+            self._count("papers_from_store")
+            result = {"url": url, "doi": doi, "llm": stored["llm"], "cached": True}
+            if fields is not None:
+                result["paper"] = project(Paper.from_dict(stored), fields)
+            return result
+        return None
+
+    def extract(self, url: str, refresh: bool = False, fields=None, deadline: float = None) -> dict:
+        """
+        提取一篇论文并调用LLM，结果写入论文库
+
+        fields 见 field_projection：结果中多一个 "paper"（投影后的字段），
+        不需要 summary 时不调用LLM，也不写入论文库。
+        deadline 为这篇论文的总时限（秒），默认用服务启动时的设置
+        """
+        self._count("in_flight")
+        try:
+            with deadline_scope(deadline or self.deadline):
+                return self._extract(url, refresh, fields)
+        except Exception as e:
+            self._count("errors")
+            return {"url": url, "error": f"{type(e).__name__}: {e}"}
+        finally:
+            self._count("in_flight", -1)
+
+    def _extract(self, url: str, refresh: bool, fields) -> dict:
+        fields = parse_fields(fields)
+        paper_id = canonicalize(url)
+        if not refresh:
+            stored = self._stored_result(paper_id.url, fields)
+            if stored:
+                return stored
+        if not needs_llm(fields):
+            paper = self.fetch_paper(paper_id.url, fields)
+            self._count("papers_extracted")
+            return {"url": url, "doi": paper_key(paper_id), "llm": None, "paper": project(paper, fields),
+                    "cached": False}
+        paper = self.fetch_paper(paper_id.url)
+        llm = self._pipeline.process_paper(paper)
+        self._count("papers_extracted")
+        doi = paper_key(paper_id)
+        if llm is not None:
+            doi = self._store().save_paper(paper, llm, input_urls=[url])
+        result = {"url": url, "doi": doi, "llm": llm, "cached": False}
+        if fields is not None:
+            result["paper"] = project(paper, fields)
+        return result
+
+    def batch(self, urls, refresh: bool = False, pack: int = 1, fields=None, deadline: float = None):
+        """批量提取：按DOI去重后并发处理，结果按输入顺序返回；pack > 1 时把多篇论文打包进一个LLM请求"""
+        papers, groups = dedupe_urls(urls)
+        results = {}
+        if pack > 1 and parse_fields(fields) is None:
+            results = self._batch_packed(papers, refresh, pack, deadline)
+        else:
+            futures = {key: self._request_executor.submit(self.extract, paper.url, refresh, fields, deadline)
+                       for key, paper in papers.items()}
+            results = {key: future.result() for key, future in futures.items()}
+        key_of = {input_url: key for key, input_urls in groups.items() for input_url in input_urls}
+        return [dict(results[key_of[url]], url=url) for url in urls]
+
+    def _fetch_within(self, url: str, deadline: float = None) -> Paper:
+        """在截止时间内抓取一篇论文；上下文变量不会传到线程池，要在执行线程中设置"""
+        with deadline_scope(deadline or self.deadline):
+            return self.fetch_paper(url)
+
+    def _batch_packed(self, papers, refresh, pack, deadline=None):
+        # 截止时间只约束每篇论文的抓取，与 main_batch 的打包模式一致
+        results = {}
+        pending = {}
+        for key, paper in papers.items():
+            stored = None if refresh else self._stored_result(paper.url)
+            if stored:
+                results[key] = stored
+            else:
+                pending[key] = self._request_executor.submit(self._fetch_within, paper.url, deadline)
+        fetched = {}
+        for key, future in pending.items():
+            try:
+                fetched[key] = future.result()
+            except Exception as e:
+                self._count("errors")
+                results[key] = {"error": f"{type(e).__name__}: {e}"}
+        if fetched:
+            summaries = self._pipeline.summarize_packed(fetched, pack)
+            for key, paper in fetched.items():
+                llm = summaries.get(key)
+                self._count("papers_extracted")
+                doi = self._store().save_paper(paper, llm, input_urls=[papers[key].url]) if llm else key
+                results[key] = {"doi": doi, "llm": llm, "cached": False}
+        return results
+
+    def status(self) -> dict:
+        import sys
+
+        ae = sys.modules.get("aps_extractor")
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "db_path": self.db_path,
+            "parse_workers": self._parse_pool.max_workers,
+            "browser_running": bool(ae and ae._browser_instance is not None),
+            "coalesced": {group.name: dict(group.stats, in_flight=group.in_flight()) for group in (FETCH, PARSE, LLM)},
+            "selectors": get_registry().stats(),
+            "hedging": hedging.stats(),
+        })
+        return stats
+
+    def close(self):
+        import sys
+
+        if "aps_extractor" in sys.modules:
+            self._browser_executor.submit(sys.modules["aps_extractor"].cleanup_browser).result()
+        for executor in (self._request_executor, self._fetch_executor, self._browser_executor):
+            executor.shutdown(wait=True)
+        self._parse_pool.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: ExtractionService = None
+
+    def address_string(self):
+        # Unix socket 的客户端地址是空字符串
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send_json(self, status: int, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._send_json(200, self.service.status())
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        self.service._count("requests")
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {"error": f"invalid JSON: {e}"})
+            return
+        try:
+            parse_fields(body.get("fields"))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        if self.path == "/extract" and body.get("url"):
+            self._send_json(200, self.service.extract(body["url"], refresh=bool(body.get("refresh")),
+                                                      fields=body.get("fields"), deadline=body.get("deadline")))
+        elif self.path == "/batch" and isinstance(body.get("urls"), list):
+            results = self.service.batch(body["urls"], refresh=bool(body.get("refresh")),
+                                         pack=int(body.get("pack") or 1), fields=body.get("fields"),
+                                         deadline=body.get("deadline"))
+            self._send_json(200, results)
+        else:
+            self._send_json(400, {"error": "expected POST /extract {url} or POST /batch {urls}"})
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service: ExtractionService, address: str = DEFAULT_SERVICE_ADDRESS):
+    handler = type("Handler", (_Handler,), {"service": service})
+    kind, target = parse_address(address)
+    if kind == "unix":
+        if os.path.exists(target):
+            os.unlink(target)
+        return _UnixHTTPServer(target, handler)
+    return ThreadingHTTPServer(target, handler)
+
+
+def serve(address: str = DEFAULT_SERVICE_ADDRESS, db_path: str = DEFAULT_DB_PATH, parse_workers: int = None,
+          deadline: float = DEFAULT_PAPER_DEADLINE):
+    service = ExtractionService(db_path, parse_workers=parse_workers, deadline=deadline)
+    server = make_server(service, address)
+    print(f"Extraction service listening on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        kind, target = parse_address(address)
+        if kind == "unix" and os.path.exists(target):
+            os.unlink(target)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resident paper extraction service")
+    parser.add_argument("--listen", default=DEFAULT_SERVICE_ADDRESS,
+                        help="http://host:port or unix:/path/to.sock (default: %(default)s)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite paper store (default: %(default)s)")
+    parser.add_argument("--parse-workers", type=int)
+    parser.add_argument("--deadline", type=float, default=DEFAULT_PAPER_DEADLINE, metavar="SECONDS",
+                        help="default end-to-end time limit per paper")
+    parser.add_argument("--hedge", default=None, metavar="fetch,llm", help="enable hedged requests (default: $HEDGE)")
+    args = parser.parse_args()
+    hedging.configure(args.hedge)
+    serve(args.listen, args.db, args.parse_workers, args.deadline)
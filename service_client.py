@@ -0,0 +1,109 @@
+"""
+提取服务的轻量客户端
+
+只依赖标准库，导入很快；main.py 在服务运行时把请求转发过去，否则在本进程内处理。
+
+用法：
+    python service_client.py status
+    python service_client.py extract URL
+    python service_client.py batch URL [URL ...] [--pack 4] [--fields title,abstract] [--deadline 120]
+"""
+import http.client
+import json
+import os
+import socket
+from urllib.parse import urlsplit
+
+DEFAULT_SERVICE_ADDRESS = os.getenv("PAPER_SERVICE_ADDRESS", "http://127.0.0.1:8765")
+
+
+def parse_address(address: str):
+    """'unix:/path.sock' -> ('unix', path)；'http://host:port' -> ('tcp', (host, port))"""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    parts = urlsplit(address if "://" in address else "http://" + address)
+    return "tcp", (parts.hostname or "127.0.0.1", parts.port or 8765)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float = None):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class ServiceClient:
+    def __init__(self, address: str = DEFAULT_SERVICE_ADDRESS, timeout: float = 3600):
+        self.address = address
+        self.timeout = timeout
+
+    def _connection(self, timeout: float):
+        kind, target = parse_address(self.address)
+        if kind == "unix":
+            return _UnixHTTPConnection(target, timeout=timeout)
+        return http.client.HTTPConnection(*target, timeout=timeout)
+
+    def _request(self, method: str, path: str, body=None, timeout: float = None):
+        conn = self._connection(timeout or self.timeout)
+        try:
+            payload = json.dumps(body).encode("utf-8") if body is not None else None
+            headers = {"Content-Type": "application/json"} if payload is not None else {}
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            data = json.loads(response.read() or b"null")
+            if response.status >= 400:
+                raise RuntimeError(f"service returned {response.status}: {data}")
+            return data
+        finally:
+            conn.close()
+
+    def is_running(self) -> bool:
+        try:
+            self._request("GET", "/status", timeout=0.5)
+            return True
+        except (OSError, RuntimeError, ValueError):
+            return False
+
+    def status(self) -> dict:
+        return self._request("GET", "/status")
+
+    def extract(self, url: str, refresh: bool = False, fields=None, deadline: float = None) -> dict:
+        return self._request("POST", "/extract", {"url": url, "refresh": refresh, "fields": fields,
+                                                  "deadline": deadline})
+
+    def batch(self, urls, refresh: bool = False, pack: int = 1, fields=None, deadline: float = None):
+        """deadline 为每篇论文的总时限（秒），None 时用服务启动时的设置"""
+        return self._request("POST", "/batch", {"urls": list(urls), "refresh": refresh, "pack": pack,
+                                                "fields": fields, "deadline": deadline})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Client for the resident extraction service")
+    parser.add_argument("--address", default=DEFAULT_SERVICE_ADDRESS)
+    parser.add_argument("command", choices=("status", "extract", "batch"))
+    parser.add_argument("urls", nargs="*")
+    parser.add_argument("--refresh", action="store_true", help="ignore results already in the paper store")
+    parser.add_argument("--pack", type=int, default=1)
+    parser.add_argument("--fields", help="comma-separated fields to extract (default: everything)")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="end-to-end time limit per paper (default: the service's setting)")
+    args = parser.parse_args()
+
+    fields = args.fields.split(",") if args.fields else None
+    client = ServiceClient(args.address)
+    if args.command == "status":
+        result = client.status()
+    elif args.command == "extract":
+        result = [client.extract(url, refresh=args.refresh, fields=fields, deadline=args.deadline)
+                  for url in args.urls]
+    else:
+        result = client.batch(args.urls, refresh=args.refresh, pack=args.pack, fields=fields,
+                              deadline=args.deadline)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -0,0 +1,119 @@
+"""
+单飞（single-flight）请求合并
+
+同一篇论文被多个用户/任务同时提交时，抓取、解析和LLM调用都会各做一遍。
+SingleFlight 按键（规范化后的论文链接）合并并发调用：第一个调用者（leader）真正执行，
+其余调用者等待并共享它的结果或异常；调用结束后立即移除，不做结果缓存。
+
+取消语义：
+- 等待中的调用者超时或被中断，不影响 leader 和其他等待者
+- leader 被中断（KeyboardInterrupt 等 BaseException，而不是普通异常）时，
+  等待者不会拿到这个中断，而是重新竞争、由其中一个重新执行
+- leader 超过了它自己的截止时间（DeadlineExceeded，或截止时间已过时请求超时）同样如此：
+  截止时间是 leader 的，等待者可能还有充足的时间
+"""
+import functools
+import threading
+
+from deadline import DeadlineExceeded, remaining
+from paper_identity import canonicalize, paper_key
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "abandoned")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"executed": 0, "shared": 0}
+
+    def do(self, key, fn, *args, timeout: float = None, **kwargs):
+        """
+        执行 fn(*args, **kwargs)，同一 key 的并发调用只执行一次
+
+        Args:
+            timeout: 等待其他调用者结果的最长时间，超时抛出 TimeoutError（不影响正在执行的调用）
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self.stats["executed"] += 1
+                else:
+                    self.stats["shared"] += 1
+
+            if leader:
+                return self._run(key, call, fn, args, kwargs)
+
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"{self.name}: timed out waiting for in-flight call {key!r}")
+            if call.abandoned:
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    def _run(self, key, call, fn, args, kwargs):
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            left = remaining()
+            if isinstance(e, DeadlineExceeded) or (left is not None and left <= 0):
+                call.abandoned = True
+            else:
+                call.error = e
+            raise
+        except BaseException:
+            call.abandoned = True
+            raise
+        finally:
+            # 先移除再通知：之后到达的调用者会重新执行，而不是拿到已经结束的调用
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# 抓取 / 解析 / LLM 三层各自一个合并组
+FETCH = SingleFlight("fetch")
+PARSE = SingleFlight("parse")
+LLM = SingleFlight("llm")
+
+
+def _hashable(value):
+    """列表/集合参数（如 fields）转成可哈希、与顺序无关的形式"""
+    if isinstance(value, (list, set, frozenset)):
+        return tuple(sorted(value))
+    return value
+
+
+def url_key(url, *args, **kwargs):
+    """默认键：论文的去重键（DOI） + 其余参数"""
+    return (paper_key(canonicalize(url)), tuple(_hashable(arg) for arg in args),
+            tuple(sorted((name, _hashable(value)) for name, value in kwargs.items())))
+
+
+def coalesce(group: SingleFlight, key=url_key):
+    """装饰器：按 key(*args, **kwargs) 合并并发调用；等待别人的结果时不超过当前论文的截止时间"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return group.do((fn.__module__, fn.__qualname__, key(*args, **kwargs)), fn, *args,
+                            timeout=remaining(), **kwargs)
+        return wrapper
+    return decorate
@@ -1,6 +1,5 @@
 import asyncio
 from crawl4ai import *
-import json
 from aps_clean_extractor import extract_aps_clean_content
 
 
@@ -12,8 +11,9 @@ async def main():
         result_json = result.json()
         
         # 将完整的result_json保存为json文件
+        # result.json() 已经是JSON字符串，直接写入，不再二次编码
         with open("result.json", "w") as f:
-            json.dump(result_json, f)
+            f.write(result_json)
             
         # 将完整结果保存为markdown文件
         with open("result.md", "w") as f:
@@ -0,0 +1,410 @@
+"""
+机构名/国家名的中文译名记忆
+
+以前每篇论文都让 DeepSeek 在 system_prompt 的任务2里把同样的单位和国家
+（"École Polytechnique Fédérale de Lausanne" → "洛桑联邦理工学院"、"Stanford University"……）重新翻译一遍。
+这里维护一份本地译名表，按规范化的机构名（ror_index.normalize_name）索引。
+机构名取ROR索引中的规范名称；ROR没有命中时取地址中大学/科研院所一级的那一段（institution_segment），
+同一所大学不同院系的地址共用一个键；两者都没有时才用完整地址：
+- 从论文库中已经通过校验的LLM输出学习（learn_from_store）：逐篇去掉已知的译名，
+  只剩一个未知机构和一个未知中文名时认定二者对应，反复传播直到没有新的对应
+- 论文中还没有译名的单位/国家编号附在新闻稿请求的输入中（news_input），LLM在同一个回复里
+  写新闻稿并逐条给出译名，不多花一次请求；译名经过校验（valid_translation）才写入译名表（apply_answers）
+- 全部单位和国家都有译名时，任务2的字段（单位、其他单位、国家、链接、论文名）直接在本地生成（prefill），
+  LLM只需要写新闻稿（main.news_prompt），输入中附带译名供新闻稿引用
+
+译名表保存在 data/translation_memory.json（环境变量 TRANSLATION_MEMORY_PATH 可改），
+多进程各自累加、保存时合并。
+
+用法：
+    python translation_memory.py learn --db papers.db
+    python translation_memory.py lookup "Stanford University"
+    python translation_memory.py stats
+"""
+import atexit
+import json
+import os
+import re
+import threading
+
+from atomic_json import merge_json
+from paper_store import _is_corresponding
+from ror_index import get_default_ror_index, normalize_name
+
+DEFAULT_TM_PATH = os.getenv("TRANSLATION_MEMORY_PATH", os.path.join("data", "translation_memory.json"))
+KINDS = ("institution", "country")
+SAVE_EVERY = 20
+MAX_UNTRANSLATED = 60  # 一篇论文最多附带这么多待翻译名称，更多时走完整提示
+
+_GLOSSARY_LINE_RE = re.compile(r'^\s*(\d+)\s*[.、:：)）]\s*(.+?)\s*$')
+_ZH_SPLIT_RE = re.compile(r'\s*[，,、；;/]\s*')
+_EMPTY_VALUES = {"", "N/A", "无", "未知", "暂无", "-", "—"}
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+_LATIN_RE = re.compile(r'[A-Za-z]')
+_DIGIT_RE = re.compile(r'\d')
+MAX_TRANSLATION_LENGTH = 40
+# 大学/科研院所一级的机构名，前一组优先（"Institute of Physics, Chinese Academy of Sciences" 取后者）
+_INSTITUTION_LEVELS = (
+    re.compile(r'univers|polytechn|politecnico|academy|académie|akademie|école|ecole|'
+               r'(?-i:\b(?:EPFL|ETH|MIT|Caltech|CNRS|CERN|RIKEN)\b)', re.I),
+    re.compile(r'institut|college|collège|hospital|laborator|cent(?:er|re)\b|foundation|observatory', re.I),
+)
+# 以这些词开头的是下属单位（学院、系、实验室……）
+_SUB_UNIT_RE = re.compile(r'^(?:the\s+)?(?:department|dept\.?|faculty|school|division|college|institute|institut|'
+                          r'center|centre|laboratory|lab|key laboratory|group|section)\s+(?:of|for|de|für)\b', re.I)
+
+
+def valid_translation(name: str, zh: str) -> bool:
+    """
+    译名是否可信：单个以中文为主的名称，不含阿拉伯数字（邮编、门牌号），
+    也不是原文加上修饰（如 "Stanford University（译）"）
+    """
+    zh = (zh or "").strip()
+    if zh in _EMPTY_VALUES or len(zh) > MAX_TRANSLATION_LENGTH or _ZH_SPLIT_RE.search(zh) or _DIGIT_RE.search(zh):
+        return False
+    cjk = len(_CJK_RE.findall(zh))
+    if not cjk or len(_LATIN_RE.findall(zh)) > cjk:
+        return False
+    key = normalize_name(name)
+    return not key or key not in normalize_name(zh)
+
+
+def split_zh_names(text: str) -> list:
+    """把LLM输出的 "洛桑联邦理工学院*，斯坦福大学" 拆成去掉通讯标记的名称列表（保持顺序、去重）"""
+    names = []
+    for part in _ZH_SPLIT_RE.split(text or ""):
+        name = part.strip().rstrip("*＊").strip()
+        if name not in _EMPTY_VALUES and name not in names:
+            names.append(name)
+    return names
+
+
+def institution_segment(address: str):
+    """
+    地址中大学/科研院所一级的那一段，如
+    "Department of Physics, Stanford University, Stanford, CA, USA" → "Stanford University"；找不到时为None
+    """
+    segments = [segment.strip() for segment in (address or "").split(",")]
+    for level in _INSTITUTION_LEVELS:
+        for segment in segments:
+            if level.search(segment) and not _SUB_UNIT_RE.match(segment) and not _DIGIT_RE.search(segment):
+                return segment
+    return None
+
+
+def institution_name(affiliation) -> str:
+    """译名表中的机构名：ROR 命中时为规范机构名，否则为 institution_segment，都没有时为完整地址"""
+    ror_index = get_default_ror_index()
+    record = ror_index.resolve_affiliation(affiliation.address) if ror_index is not None else None
+    if record:
+        return record.name
+    return institution_segment(affiliation.address) or affiliation.address
+
+
+def paper_names(paper) -> dict:
+    """论文中出现的机构名（见 institution_name）和国家名（英文，按出现顺序去重）；解析不出的项为空字符串"""
+    names = {kind: [] for kind in KINDS}
+    for affiliation in paper.affiliations:
+        affiliation.resolve()
+        for kind, value in (("institution", institution_name(affiliation)), ("country", affiliation.country)):
+            value = value or ""
+            if value not in names[kind]:
+                names[kind].append(value)
+    return names
+
+
+class TranslationMemory:
+    def __init__(self, path: str = DEFAULT_TM_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._table = {kind: {} for kind in KINDS}  # {kind: {规范化名称: 中文}}，包括磁盘上的内容
+        self._pending = {kind: {} for kind in KINDS}  # 尚未写盘的新译名
+        self._unsaved = 0
+        self.stats = {"hits": 0, "misses": 0, "learned": 0, "translated": 0, "prefilled": 0}
+        self._load()
+        atexit.register(self.save)
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for kind in KINDS:
+            # 旧版本可能写入过未经校验的译名，读入时一并过滤
+            self._table[kind].update((key, zh) for key, zh in data.get(kind, {}).items() if valid_translation(key, zh))
+
+    def __len__(self):
+        return sum(len(table) for table in self._table.values())
+
+    # ---------------------------
+    # 查询和写入
+    # ---------------------------
+    def lookup(self, kind: str, name: str):
+        key = normalize_name(name)
+        value = self._table[kind].get(key) if key else None
+        with self._lock:
+            self.stats["hits" if value else "misses"] += 1
+        return value
+
+    def add(self, kind: str, name: str, zh: str, source: str = "learned"):
+        """
+        记录一条译名；source 为 "learned"（从校验过的输出学习）或 "translated"（词表请求）
+
+        Returns:
+            是否写入（未通过 valid_translation 的译名丢弃）
+        """
+        key = normalize_name(name)
+        zh = (zh or "").strip()
+        if not key or not valid_translation(name, zh):
+            return False
+        with self._lock:
+            if self._table[kind].get(key) == zh:
+                return False
+            self._table[kind][key] = zh
+            self._pending[kind][key] = zh
+            self.stats[source] += 1
+            self._unsaved += 1
+            should_save = self._unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+        return True
+
+    def missing(self, paper) -> dict:
+        """论文中还没有译名的机构名和国家名 {kind: [英文名]}（解析不出的空名称不算）"""
+        return {kind: [name for name in names if name and not self._table[kind].get(normalize_name(name))]
+                for kind, names in paper_names(paper).items()}
+
+    def glossary(self, paper) -> dict:
+        """论文中已知的译名 {英文名: 中文}，附在新闻稿请求的输入中"""
+        result = {}
+        for kind, names in paper_names(paper).items():
+            for name in names:
+                zh = self._table[kind].get(normalize_name(name)) if name else None
+                if zh:
+                    result[name] = zh
+        return result
+
+    # ---------------------------
+    # 随新闻稿请求补齐译名
+    # ---------------------------
+    def news_input(self, paper):
+        """
+        新闻稿请求的附加输入
+
+        Returns:
+            (extra, untranslated)：extra 并入论文的LLM输入——"zh" 为已知译名，
+            "translate" 为还没有译名的名称（"编号. [机构] 英文名"）；untranslated 为对应的 [(kind, 英文名)]，
+            交给 apply_answers。有单位解析不出机构或国家、或未知名称太多时返回None（走完整提示）
+        """
+        names = paper_names(paper)
+        if not paper.authors or not paper.affiliations or any(not name for kind in KINDS for name in names[kind]):
+            return None
+        missing = self.missing(paper)
+        untranslated = [(kind, name) for kind in KINDS for name in missing[kind]]
+        if len(untranslated) > MAX_UNTRANSLATED:
+            return None
+        extra = {"zh": self.glossary(paper)}
+        if untranslated:
+            extra["translate"] = [f"{number}. [{'机构' if kind == 'institution' else '国家'}] {name}"
+                                  for number, (kind, name) in enumerate(untranslated, 1)]
+        return extra, untranslated
+
+    def apply_answers(self, untranslated, text: str) -> int:
+        """
+        把回复中 "编号. 中文译名" 形式的译名写入译名表（编号对应 news_input 的 untranslated）
+
+        Returns:
+            新增的译名数
+        """
+        added = 0
+        for line in (text or "").splitlines():
+            match = _GLOSSARY_LINE_RE.match(line)
+            if not match or not 1 <= int(match.group(1)) <= len(untranslated):
+                continue
+            kind, name = untranslated[int(match.group(1)) - 1]
+            zh = re.sub(r'^\[(机构|国家)\]\s*', "", match.group(2))
+            if not valid_translation(name, zh):
+                print(f"Rejected translation for {name!r}: {zh!r}")
+            elif self.add(kind, name, zh, source="translated"):
+                added += 1
+        return added
+
+    # ---------------------------
+    # 本地生成任务2的字段
+    # ---------------------------
+    def prefill(self, paper):
+        """
+        全部单位和国家都有译名时，按 system_prompt 任务2的规则在本地生成信息提取字段；
+        否则（有单位解析不出机构/国家，或还有未知译名）返回None，走完整的LLM提示
+        """
+        if not paper.authors or not paper.affiliations:
+            return None
+        names = paper_names(paper)
+        if any(not name for kind in KINDS for name in names[kind]):
+            return None
+        zh = {kind: {name: self._table[kind].get(normalize_name(name)) for name in names[kind]} for kind in KINDS}
+        if any(value is None for kind in KINDS for value in zh[kind].values()):
+            return None
+
+        authors = paper.authors
+        corresponding = [author for author in authors
+                         if _is_corresponding(paper._author_dict(author), paper.notes)]
+        if not corresponding:
+            # 未标识通讯作者时，第一作者为通讯作者
+            corresponding = [authors[0]]
+        key_authors = [author for author in authors
+                       if author is authors[0] or author in corresponding or _is_co_first(paper, author)]
+        starred = {index for author in corresponding for index in author.affiliations}
+        english = [institution_name(affiliation) for affiliation in paper.affiliations]
+
+        def institution_of(index):
+            return zh["institution"][english[index]]
+
+        key_names = []
+        key_seen = set()
+        for author in key_authors:
+            for index in author.affiliations:
+                name = institution_of(index)
+                if name in key_seen:
+                    continue
+                key_seen.add(name)
+                star = any(institution_of(other) == name for other in starred)
+                key_names.append(name + ("*" if star else ""))
+        other_names = []
+        for author in authors:
+            if author in key_authors:
+                continue
+            for index in author.affiliations:
+                name = institution_of(index)
+                if name not in key_seen and name not in other_names:
+                    other_names.append(name)
+        countries = list(dict.fromkeys(zh["country"][name] for name in names["country"]))
+
+        with self._lock:
+            self.stats["prefilled"] += 1
+        return {
+            "第一作者单位/共同作者单位/通讯作者单位": "、".join(key_names) or "无",
+            "其他作者单位": "、".join(other_names) or "无",
+            "单位所属国家": "、".join(countries),
+            "url": paper.url or "N/A",
+            "论文名": paper.title or "N/A",
+        }
+
+    # ---------------------------
+    # 学习
+    # ---------------------------
+    def learn(self, paper, llm_fields: dict) -> int:
+        """
+        从一篇论文校验过的LLM输出中学习：去掉已知译名后，
+        只剩一个未知英文名和一个未知中文名时认定二者对应
+
+        Returns:
+            新增的译名数
+        """
+        if not llm_fields or any(value == "N/A" for value in llm_fields.values()):
+            return 0
+        names = paper_names(paper)
+        outputs = {
+            "institution": split_zh_names(llm_fields.get("第一作者单位/共同作者单位/通讯作者单位", "")) +
+                           split_zh_names(llm_fields.get("其他作者单位", "")),
+            "country": split_zh_names(llm_fields.get("单位所属国家", "")),
+        }
+        added = 0
+        for kind in KINDS:
+            english = [name for name in names[kind] if name]
+            if len(english) != len(names[kind]):
+                continue  # 有解析不出的单位，无法对应
+            known = {self._table[kind].get(normalize_name(name)) for name in english}
+            unknown_english = [name for name in english if not self._table[kind].get(normalize_name(name))]
+            unknown_zh = [name for name in dict.fromkeys(outputs[kind]) if name not in known]
+            if len(unknown_english) == 1 and len(unknown_zh) == 1 and self.add(kind, unknown_english[0], unknown_zh[0]):
+                added += 1
+        return added
+
+    def learn_from_store(self, store) -> int:
+        """遍历论文库中有LLM结果的论文反复学习，直到没有新的对应"""
+        from paper_model import Paper
+
+        papers = [(Paper.from_dict(record), record["llm"]) for record in store.find_papers() if record["llm"]]
+        total = 0
+        while True:
+            added = sum(self.learn(paper, llm) for paper, llm in papers)
+            total += added
+            if not added:
+                return total
+
+    # ---------------------------
+    # 持久化
+    # ---------------------------
+    def save(self):
+        """把新译名合并进磁盘上的译名表（其他进程可能同时在写）；写入失败时新译名留到下次保存"""
+        with self._lock:
+            pending, self._pending, self._unsaved = self._pending, {kind: {} for kind in KINDS}, 0
+        if not any(pending.values()) or not self.path:
+            return
+
+        def merge(data):
+            for kind in KINDS:
+                data.setdefault(kind, {}).update(pending[kind])
+
+        try:
+            merge_json(self.path, merge, ensure_ascii=False, indent=0, sort_keys=True)
+        except OSError as e:
+            print(f"Could not save translation memory to {self.path}: {e}")
+            with self._lock:
+                for kind in KINDS:
+                    # 保存失败期间又学到的译名更新，不覆盖
+                    for key, zh in pending[kind].items():
+                        self._pending[kind].setdefault(key, zh)
+
+
+def _is_co_first(paper, author) -> bool:
+    """共同第一作者：角色中注明 first，或与第一作者共享"同等贡献"标记"""
+    if author.role and "first" in author.role.lower():
+        return True
+    first = paper.authors[0]
+    for mark in set(author.marks) & set(first.marks):
+        note = (paper.notes or {}).get(mark, "")
+        if "equal" in note.lower():
+            return True
+    return False
+
+
+_default_memory = None
+
+
+def get_translation_memory() -> TranslationMemory:
+    global _default_memory
+    if _default_memory is None:
+        _default_memory = TranslationMemory()
+    return _default_memory
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from paper_store import DEFAULT_DB_PATH, PaperStore
+
+    parser = argparse.ArgumentParser(description="Institution/country translation memory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    learn_parser = subparsers.add_parser("learn", help="learn translations from validated LLM outputs in the store")
+    learn_parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    lookup_parser = subparsers.add_parser("lookup", help="look up institution or country names")
+    lookup_parser.add_argument("names", nargs="+")
+    subparsers.add_parser("stats", help="number of stored translations")
+    args = parser.parse_args()
+
+    memory = get_translation_memory()
+    if args.command == "learn":
+        with PaperStore(args.db) as store:
+            print(f"Learned {memory.learn_from_store(store)} translations ({len(memory)} in total)")
+        memory.save()
+    elif args.command == "lookup":
+        for name in args.names:
+            zh = memory.lookup("institution", name) or memory.lookup("country", name)
+            print(f"{name}\t{zh or '-'}")
+    else:
+        print({kind: len(memory._table[kind]) for kind in KINDS})
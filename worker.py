@@ -0,0 +1,163 @@
+"""
+任务队列的 worker 进程
+
+每个 worker 从共享队列租用论文任务，执行现有的提取流程 main.main
+（parse_nature_authors / parse_science_authors / APS 的 crawl_aps + LLM），
+结果写入论文库。处理期间后台线程定期续租；失败时交给队列重试或进入死信。
+增加吞吐量只需在更多进程/机器上启动 worker，不需要手工拆分URL列表。
+
+用法：
+    python worker.py enqueue URL [URL ...]         # 或 --file urls.txt
+    python worker.py run --lanes nature science    # 只消费指定期刊
+    python worker.py run --lane-limit aps=1        # 限制APS同时处理的数量
+    python worker.py stats
+    python worker.py dead / requeue-dead
+"""
+import json
+import threading
+import time
+
+from job_queue import LANES, default_worker_id, open_queue, parse_lane_limits
+from paper_store import DEFAULT_DB_PATH, PaperStore
+
+
+class _Heartbeat(threading.Thread):
+    """处理期间定期续租，防止长任务（APS浏览器渲染、LLM调用）被其他worker接管"""
+
+    def __init__(self, queue, job, worker, visibility_timeout):
+        super().__init__(daemon=True)
+        self._queue = queue
+        self._job = job
+        self._worker = worker
+        self._visibility_timeout = visibility_timeout
+        self._stopped = threading.Event()
+
+    def run(self):
+        interval = max(1.0, self._visibility_timeout / 3)
+        while not self._stopped.wait(interval):
+            if not self._queue.extend(self._job.id, self._worker, self._visibility_timeout):
+                print(f"Lease lost for job {self._job.id}: {self._job.url}")
+                return
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def process_job(job, store: PaperStore):
+    """执行一个任务；论文库中已有LLM结果时直接跳过"""
+    from main import main
+
+    doi = store.lookup_url(job.url)
+    stored = store.get_paper(doi) if doi else None
+    if stored and stored["llm"]:
+        print(f"Already stored, skipping: {job.url}")
+        return stored["llm"]
+
+    extracted = main(job.url, store=store)
+    if extracted is None:
+        raise RuntimeError("extraction or LLM step returned no result")
+    return extracted
+
+
+def run_worker(queue_spec: str = None, db_path: str = DEFAULT_DB_PATH, lanes=None, worker: str = None,
+               visibility_timeout: float = 600, lane_limits: dict = None, poll_interval: float = 5,
+               drain: bool = False):
+    """
+    worker 主循环
+
+    Args:
+        lanes: 只消费这些期刊道，默认全部
+        drain: 队列中没有就绪任务时退出，而不是继续等待
+    """
+    worker = worker or default_worker_id()
+    queue = open_queue(queue_spec, visibility_timeout=visibility_timeout, lane_limits=lane_limits)
+    store = PaperStore(db_path)
+    processed = 0
+    try:
+        while True:
+            job = queue.lease(worker, lanes=lanes)
+            if job is None:
+                if drain:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            if job.attempts > job.max_attempts:
+                # 多次租约过期（worker崩溃）的任务不再尝试
+                queue.fail(job.id, "lease expired too many times", worker)
+                continue
+
+            print(f"[{worker}] job {job.id} ({job.journal}, attempt {job.attempts}/{job.max_attempts}): {job.url}")
+            heartbeat = _Heartbeat(queue, job, worker, visibility_timeout)
+            heartbeat.start()
+            try:
+                process_job(job, store)
+            except Exception as e:
+                heartbeat.stop()
+                state = queue.fail(job.id, f"{type(e).__name__}: {e}", worker)
+                print(f"[{worker}] job {job.id} failed ({state or 'lease lost'}): {e}")
+            else:
+                heartbeat.stop()
+                queue.complete(job.id, worker)
+                processed += 1
+    finally:
+        store.close()
+        queue.close()
+    return processed
+
+
+def _read_urls(args):
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            urls += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return urls
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Distributed paper extraction worker")
+    parser.add_argument("--queue", help="jobs.db path or redis:// URL (default: $JOB_QUEUE_URL or jobs.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = sub.add_parser("enqueue", help="add paper URLs to the queue")
+    enqueue_parser.add_argument("urls", nargs="*")
+    enqueue_parser.add_argument("--file", help="file with one URL per line")
+    enqueue_parser.add_argument("--max-attempts", type=int)
+
+    run_parser = sub.add_parser("run", help="lease and process jobs")
+    run_parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite paper store (default: %(default)s)")
+    run_parser.add_argument("--lanes", nargs="+", choices=LANES, help="only consume these journals")
+    run_parser.add_argument("--lane-limit", action="append", help="max concurrent leases per lane, e.g. aps=1")
+    run_parser.add_argument("--visibility-timeout", type=float, default=600)
+    run_parser.add_argument("--worker-id")
+    run_parser.add_argument("--drain", action="store_true", help="exit when no job is ready")
+
+    sub.add_parser("stats", help="show job counts per lane and state")
+    sub.add_parser("dead", help="list dead-lettered jobs")
+    requeue_parser = sub.add_parser("requeue-dead", help="put dead-lettered jobs back in the queue")
+    requeue_parser.add_argument("--lane", choices=LANES)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        count = run_worker(args.queue, args.db, lanes=args.lanes, worker=args.worker_id,
+                           visibility_timeout=args.visibility_timeout,
+                           lane_limits=parse_lane_limits(args.lane_limit), drain=args.drain)
+        print(f"Processed {count} jobs")
+    else:
+        with open_queue(args.queue) as queue:
+            if args.command == "enqueue":
+                added, skipped = queue.enqueue(_read_urls(args), max_attempts=args.max_attempts)
+                print(f"Enqueued {len(added)} papers")
+                for url in skipped:
+                    print(f"Unsupported URL, skipped: {url}")
+            elif args.command == "stats":
+                print(json.dumps(queue.stats(), indent=2))
+            elif args.command == "dead":
+                for job in queue.dead_letters():
+                    print(json.dumps(job, ensure_ascii=False))
+            elif args.command == "requeue-dead":
+                print(f"Requeued {queue.requeue_dead(args.lane)} jobs")